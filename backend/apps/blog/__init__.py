@@ -4,6 +4,16 @@ from fastapi import FastAPI
 def setup(app: FastAPI):
     # 1. 导入管理应用
     # 2. 注册普通路由
-    from . import admin, apis, events
+    from core.globals import site
+    from core.settings import settings
+
+    from . import admin, apis, events, search, stats
 
     app.include_router(apis.router)
+    # 3. 注册启动事件: 创建全文索引结构(在`site.router.startup()`中执行,此时数据表已创建)
+    site.router.add_event_handler("startup", search.setup_search_backend)
+    # 4. 文章统计: 启动时合并变化量(汇总表未初始化时重新统计);定时合并变化量,每个进程各自执行
+    compactor = stats.StatsCompactor(site.db, settings.stats_compact_interval)
+    site.router.add_event_handler("startup", compactor.compact)
+    app.add_event_handler("startup", compactor.start)
+    app.add_event_handler("shutdown", compactor.stop)
@@ -1,28 +1,49 @@
 import datetime
-from typing import Any, List, Optional
+import logging
+from typing import List, Optional
 
 from core.globals import site
+from core.jobs import JobModelAction
+from core.page_cache import RegistryVersionAdminApp
+from core.responses import FastJSONModelAdmin
+from core.settings import settings
+from core.uploads import ThumbnailModelAdmin
 from fastapi_amis_admin import admin, amis
 from fastapi_amis_admin.admin import AdminAction, AdminApp
 from fastapi_amis_admin.amis.components import (
     ActionType,
+    Chart,
     Dialog,
+    Grid,
+    Page,
     PageSchema,
     TableColumn,
 )
 from fastapi_amis_admin.amis.constants import LevelEnum
 from fastapi_amis_admin.crud.parser import LabelField
-from fastapi_amis_admin.crud.schema import BaseApiOut
 from fastapi_amis_admin.models import IntegerChoices, Field
 from pydantic import BaseModel
 from sqlmodel.sql.expression import Select
 from starlette.requests import Request
 
+from apps.blog.bulk import (
+    BulkCategoryAction,
+    BulkDeleteModelAdmin,
+    BulkRemoveTagAction,
+    BulkStatusAction,
+    BulkTagAction,
+)
+from apps.blog.export import ExportModelAdmin
+from apps.blog.loaders import PrefetchModelAdmin
 from apps.blog.models import Article, Category, Tag
+from apps.blog.pagination import KeysetModelAdmin
+from apps.blog.search import FullTextModelAdmin
+from apps.blog.stats import ArticleStats, read_stats
+
+logger = logging.getLogger("apps.blog")
 
 
-@site.register_admin
-class BlogApp(admin.AdminApp):
+class BlogApp(RegistryVersionAdminApp):
     page_schema = PageSchema(label="博客应用", icon="fa fa-wordpress")
 
     def __init__(self, app: "AdminApp"):
@@ -31,29 +52,80 @@ class BlogApp(admin.AdminApp):
             CategoryAdmin,
             ArticleAdmin,
             TagAdmin,
+            ArticleStatsAdmin,
         )
 
 
-class CategoryAdmin(admin.ModelAdmin):
+# 延迟注册: 首次访问博客应用时才注册路由,见`core/lazy.py`
+site.register_admin(BlogApp, lazy=True)
+
+
+class CategoryAdmin(FastJSONModelAdmin):
     page_schema = PageSchema(label="分类管理", icon="fa fa-folder")
     model = Category
     search_fields = [Category.name]
+    # 文章数量由事件维护,不可编辑;列表中可排序
+    create_exclude = update_exclude = {"article_count", "published_count"}
 
 
-class TagAdmin(admin.ModelAdmin):
+class TagAdmin(FastJSONModelAdmin):
     page_schema = PageSchema(label="标签管理", icon="fa fa-tags")
     model = Tag
     search_fields = [Tag.name]
+    create_exclude = update_exclude = {"article_count", "published_count"}
     link_model_fields = [Tag.articles]
 
 
+class ArticleStatsAdmin(admin.PageAdmin):
+    page_schema = PageSchema(label="文章统计", icon="fa fa-bar-chart")
+    page = Page(title="文章统计")
+
+    async def get_page(self, request: Request) -> Page:
+        page = await super().get_page(request)
+        # 只读取统计汇总表,耗时与文章数量无关.见`apps/blog/stats.py`
+        stats: ArticleStats = await self.site.db.async_run_sync(read_stats, settings.stats_days, is_session=False)
+        page.remark = f"文章总数: {stats.total}"
+        page.body = [
+            Grid(
+                columns=[
+                    {"md": 5, "body": Chart(height="320px", config=self.pie_chart("按状态", stats.status))},
+                    {"md": 7, "body": Chart(height="320px", config=self.bar_chart("按分类", stats.category))},
+                ]
+            ),
+            Chart(height="320px", config=self.line_chart(f"最近{len(stats.day)}天", stats.day)),
+        ]
+        return page
+
+    @staticmethod
+    def pie_chart(title: str, data: List[tuple]) -> dict:
+        return {
+            "title": {"text": title},
+            "tooltip": {"trigger": "item"},
+            "series": [{"type": "pie", "radius": "60%", "data": [{"name": name, "value": value} for name, value in data]}],
+        }
+
+    @staticmethod
+    def bar_chart(title: str, data: List[tuple]) -> dict:
+        return {
+            "title": {"text": title},
+            "tooltip": {"trigger": "axis"},
+            "xAxis": {"type": "category", "data": [name for name, _ in data]},
+            "yAxis": {"type": "value", "minInterval": 1},
+            "series": [{"type": "bar", "data": [value for _, value in data]}],
+        }
+
+    @staticmethod
+    def line_chart(title: str, data: List[tuple]) -> dict:
+        return {**ArticleStatsAdmin.bar_chart(title, data), "series": [{"type": "line", "data": [value for _, value in data]}]}
+
+
 class UserGender(IntegerChoices):
     unknown = 0, "保密"
     man = 1, "男"
     woman = 2, "女"
 
 
-class TestAction(admin.ModelAction):
+class TestAction(JobModelAction):
     action = ActionType.Dialog(tooltip="自定义表单动作", icon="fa fa-star", level=LevelEnum.warning, dialog=Dialog())
 
     # 创建表单数据模型
@@ -64,14 +136,23 @@ class TestAction(admin.ModelAction):
         gender: UserGender = Field(UserGender.unknown, title="性别")
         is_active: bool = Field(True, title="是否激活")
 
-    async def handle(self, request: Request, item_id: List[str], data: schema, **kwargs) -> BaseApiOut[Any]:
+    # 提交后在后台分批执行,每批次最多读取`job_chunk_size`条数据
+    async def handle_chunk(self, item_id: List[str], data: schema) -> None:
         items = await self.admin.fetch_items(*item_id)
-        return BaseApiOut(data={"item_id": item_id, "data": data, "items": list(items)})
+        logger.info("test_action: %s, items: %s", data.username, [item.id for item in items])
 
 
-class ArticleAdmin(admin.ModelAdmin):
+class ArticleAdmin(
+    KeysetModelAdmin, FullTextModelAdmin, PrefetchModelAdmin, ExportModelAdmin, ThumbnailModelAdmin, BulkDeleteModelAdmin
+):
     page_schema = PageSchema(label="文章管理", icon="fa fa-file")
     model = Article
+    # 配置游标分页字段,相邻翻页时不再使用OFFSET
+    cursor_fields = list(Article.keyset_fields())
+    # 配置预加载关联: 当前页所有文章的标签通过一条`IN`查询批量加载
+    list_prefetch = [Article.tags]
+    # 配置缩略图字段: 列表显示缩略图,放大时显示原图
+    thumbnail_fields = [Article.img]
     # 配置列表展示字段
     list_display = [
         Article.id,
@@ -79,6 +160,12 @@ class ArticleAdmin(admin.ModelAdmin):
         Article.img,
         Article.status,
         Category.name,
+        TableColumn(
+            type="each",
+            name="tags",
+            label="标签",
+            items={"type": "tpl", "tpl": "<span class='label label-info m-r-xs'>${name}</span>"},
+        ),
         TableColumn(type="tpl", label="自定义模板列", tpl='<a href="${source}" target="_blank">ID:${id},Title:${title}</a>'),
         Article.create_time,
         Article.description,
@@ -91,11 +178,18 @@ class ArticleAdmin(admin.ModelAdmin):
     ]
     # 配置模糊搜索字段
     search_fields = [Article.title, Category.name]
+    # 配置全文搜索字段: 标题的模糊搜索改为全文搜索(覆盖标题,描述和内容)
+    fulltext_fields = [Article.title]
     # 配置关联模型
     link_model_fields = [Article.tags]
     # 配置自定义动作
     admin_action_maker = [
         lambda self: TestAction(self, name="test_action", label="自定义动作", flags=["item", "bulk"]),
+        # 批量操作: 每批一条`UPDATE`语句,不逐行加载文章
+        lambda self: BulkStatusAction(self, name="bulk_status", label="修改状态", flags=["bulk"]),
+        lambda self: BulkCategoryAction(self, name="bulk_category", label="修改分类", flags=["bulk"]),
+        lambda self: BulkTagAction(self, name="bulk_add_tags", label="添加标签", flags=["bulk"]),
+        lambda self: BulkRemoveTagAction(self, name="bulk_remove_tags", label="移除标签", flags=["bulk"]),
         lambda self: AdminAction(
             self,
             name="iframe_action",
@@ -138,6 +232,21 @@ class ArticleAdmin(admin.ModelAdmin):
                 label="工具条link动作", level=LevelEnum.secondary, link="https://github.com/amisadmin/fastapi_amis_admin"
             ),
         ),
+        # 导出当前筛选结果,流式输出
+        lambda self: AdminAction(
+            self,
+            name="export_csv",
+            label="导出CSV",
+            flags=["toolbar"],
+            getter=lambda request: self.get_export_action(request, "csv"),
+        ),
+        lambda self: AdminAction(
+            self,
+            name="export_ndjson",
+            label="导出NDJSON",
+            flags=["toolbar"],
+            getter=lambda request: self.get_export_action(request, "ndjson"),
+        ),
         lambda self: AdminAction(
             self,
             name="toolbar_action3",
@@ -2,27 +2,57 @@ import datetime
 from typing import List, Optional
 
 from core.globals import site
-from fastapi import APIRouter
+from core.replicas import use_primary
+from core.responses import json_response
+from core.settings import settings
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi_amis_admin.globals.deps import AsyncSess
-from sqlalchemy import insert, select
-
-from apps.blog.models import Article, ArticleStatus
+from sqlalchemy import insert
+from starlette.responses import JSONResponse
+from typing_extensions import Literal
+
+from apps.blog.cache import article_cache
+from apps.blog.ingest import ArticleImporter, ImportResult, iter_csv, iter_ndjson
+from apps.blog.loaders import (
+    ExpandQuery,
+    article_list_rows,
+    article_list_select,
+    article_load_options,
+    to_article_detail,
+    to_article_summary,
+)
+from apps.blog.models import Article, ArticleDetail, ArticleStatus, ArticleSummary
+from apps.blog.pagination import CursorLimitQuery, CursorQuery, keyset_page, keyset_select
+from apps.blog.search import index_articles
 
 router = APIRouter(prefix="/articles", tags=["ArticleAPI"])
 
 
+def article_detail_response(article: Optional[Article], expand: bool) -> JSONResponse:
+    """文章详情响应.文章不存在时返回`null`,不写入缓存"""
+    return JSONResponse(jsonable_encoder(article and to_article_detail(article, expand)))
+
+
 # 方式一: 通过FastAPI依赖自动处理,获取session.(推荐) 特点:
 # 1.同一个请求FastAPI会缓存依赖,对于多级依赖,同一个请求多次使用session对象,会减少session的获取成本.
 # 2.如果`site.db`使用的是`AsyncDatabase`异步连接,则获取的是`AsyncSession`.
 # 3.如果`site.db`使用的是`Database`同步连接,则获取的是`Session`.
 #   2.1.同步Session可以充分利用`sqlalchemy`模型懒加载的特性.
 #   2.2.注意不要在异步方法中使用同步Session,否则可能堵塞异步循环.
-@router.get("/read/{id}", response_model=Optional[Article], summary="读取文章")
-async def read_article(id: int, session: AsyncSess):
-    return await session.get(Article, id)
+@router.get("/read/{id}", response_model=Optional[ArticleDetail], summary="读取文章")
+async def read_article(id: int, session: AsyncSess, expand: ExpandQuery = False):
+    async def load():
+        # 异步Session不支持懒加载,关联数据需通过`options`预加载
+        article = await session.get(Article, id, options=article_load_options() if expand else None)
+        return article_detail_response(article, expand)
+
+    # 读取缓存,未命中时查询数据库
+    return await article_cache.read_through(article_cache.read_key(id, {"expand": expand}), load)
 
 
-@router.get("/update/{id}", response_model=Optional[Article], summary="更新文章")
+# GET请求中写入数据: 使用主库读取,见`core/replicas.py`
+@router.get("/update/{id}", response_model=Optional[Article], summary="更新文章", dependencies=[Depends(use_primary)])
 async def update_article(id: int, session: AsyncSess):
     article = await session.get(Article, id)
     if article:
@@ -39,10 +69,13 @@ async def update_article(id: int, session: AsyncSess):
 #   2.2如果开发一个python包,供其他人使用不能确定连接是同步或异步,应该统一使用`async_`前缀方法.
 
 
-@router.get("/read2/{id}", response_model=Optional[Article], summary="读取文章")
-async def read_article2(id: int):
-    article = await site.db.async_get(Article, id)
-    return article
+@router.get("/read2/{id}", response_model=Optional[ArticleDetail], summary="读取文章")
+async def read_article2(id: int, expand: ExpandQuery = False):
+    async def load():
+        article = await site.db.async_get(Article, id, options=article_load_options() if expand else None)
+        return article_detail_response(article, expand)
+
+    return await article_cache.read_through(article_cache.read_key(id, {"expand": expand}), load)
 
 
 @router.put("/update2/{id}", response_model=Optional[Article], summary="更新文章")
@@ -59,15 +92,45 @@ async def create_article2(data: Article):
     # 新增数据模型根据实际情况自己定义
     stmt = insert(Article).values(data.dict(exclude={"id"}))
     result = await site.db.async_execute(stmt)
+    # Core语句不会触发ORM事件,需手动同步全文索引
+    await site.db.async_run_sync(index_articles, [result.lastrowid])
+    article_cache.invalidate_articles([result.lastrowid])
     return result.lastrowid
 
 
-@router.get("/list2", response_model=List[Article], summary="读取文章列表")
-async def list_article2():
-    # 通用的查询表达式可以写在ORM模型,提供一个方法调用.
-    stmt = select(Article).where(Article.status == ArticleStatus.published.value).limit(10).order_by(Article.create_time)
-    result = await site.db.async_scalars(stmt)
-    return result.all()
+@router.post("/import", response_model=ImportResult, summary="批量导入文章")
+async def import_articles(
+    request: Request,
+    format: Optional[Literal["ndjson", "csv"]] = Query(None, description="数据格式,默认根据`Content-Type`判断"),
+    batch_size: int = Query(1000, ge=1, le=10000, description="每批次写入数量"),
+    create_missing: bool = Query(True, description="自动创建不存在的分类与标签"),
+):
+    """请求体为NDJSON(每行一个文章对象)或CSV(第一行为表头,多个标签以`|`分隔),
+    分类与标签使用名称:`category`,`tags`.请求体以流式读取,不限制文件大小.
+    """
+    if format is None:
+        format = "csv" if "csv" in request.headers.get("content-type", "") else "ndjson"
+    records = iter_csv(request.stream()) if format == "csv" else iter_ndjson(request.stream())
+    return await ArticleImporter(batch_size, create_missing).run(records)
+
+
+@router.get("/list2", response_model=List[ArticleSummary], summary="读取文章列表")
+async def list_article2(cursor: CursorQuery = None, limit: CursorLimitQuery = 10, expand: ExpandQuery = False):
+    async def load():
+        # 通用的查询表达式可以写在ORM模型,提供一个方法调用.
+        # 游标分页: 下一页游标通过响应头`X-Next-Cursor`返回,为空表示没有更多数据.
+        # 只查询列表字段,不读取正文与描述
+        # 快速JSON响应: 不逐行校验`ArticleSummary`,直接编码字典.单个路由可以直接指定`fast = True`
+        fast = settings.fast_json
+        stmt = article_list_select(expand, fast).where(Article.status == ArticleStatus.published.value)
+        stmt = keyset_select(stmt, Article.keyset_fields(), cursor, limit)
+        result = await site.db.async_execute(stmt)
+        items, next_cursor = keyset_page(article_list_rows(result, expand, fast), Article.keyset_fields(), limit)
+        items = [to_article_summary(item, expand, fast) for item in items]
+        return json_response(items, fast=fast, headers={"X-Next-Cursor": next_cursor})
+
+    params = {"cursor": cursor, "limit": limit, "expand": expand}
+    return await article_cache.read_through(article_cache.list_key("list2", params), load)
 
 
 # 方式三: 通过注册中间件,在每次请求时自动获取session,并在请求结束时自动关闭session.
@@ -75,10 +138,13 @@ async def list_article2():
 # 1.如果`site.db`使用的是`AsyncDatabase`异步连接,则获取的是`AsyncSession`.
 # 2.如果`site.db`使用的是`Database`同步连接,则获取的是`Session`.
 # 建议在`core.globals.py`中建立一个`db`对象,用于管理数据库连接.
-@router.get("/read3/{id}", response_model=Optional[Article], summary="读取文章")
-async def read_article3(id: int):
-    article = await site.db.session.get(Article, id)
-    return article
+@router.get("/read3/{id}", response_model=Optional[ArticleDetail], summary="读取文章")
+async def read_article3(id: int, expand: ExpandQuery = False):
+    async def load():
+        article = await site.db.session.get(Article, id, options=article_load_options() if expand else None)
+        return article_detail_response(article, expand)
+
+    return await article_cache.read_through(article_cache.read_key(id, {"expand": expand}), load)
 
 
 @router.put("/update3/{id}", response_model=Optional[Article], summary="更新文章")
@@ -95,12 +161,27 @@ async def create_article3(data: Article):
     # 新增数据模型根据实际情况自己定义
     stmt = insert(Article).values(data.dict(exclude={"id"}))
     result = await site.db.session.execute(stmt)
+    await site.db.session.run_sync(index_articles, [result.lastrowid])
+    article_cache.invalidate_articles([result.lastrowid])
     return result.lastrowid
 
 
-@router.get("/list3", response_model=List[Article], summary="读取文章列表")
-async def list_article3():
-    # 通用的查询表达式可以写在ORM模型,提供一个方法调用.
-    stmt = select(Article).where(Article.status == ArticleStatus.published.value).limit(10).order_by(Article.create_time)
-    result = await site.db.session.scalars(stmt)
-    return result.all()
+@router.get("/list3", response_model=List[ArticleSummary], summary="读取文章列表")
+async def list_article3(cursor: CursorQuery = None, limit: CursorLimitQuery = 10, expand: ExpandQuery = False):
+    async def load():
+        # 通用的查询表达式可以写在ORM模型,提供一个方法调用.
+        fast = settings.fast_json
+        stmt = article_list_select(expand, fast).where(Article.status == ArticleStatus.published.value)
+        stmt = keyset_select(stmt, Article.keyset_fields(), cursor, limit)
+        result = await site.db.session.execute(stmt)
+        items, next_cursor = keyset_page(article_list_rows(result, expand, fast), Article.keyset_fields(), limit)
+        items = [to_article_summary(item, expand, fast) for item in items]
+        return json_response(items, fast=fast, headers={"X-Next-Cursor": next_cursor})
+
+    params = {"cursor": cursor, "limit": limit, "expand": expand}
+    return await article_cache.read_through(article_cache.list_key("list3", params), load)
+
+
+@router.get("/cache/stats", summary="文章缓存命中统计")
+async def article_cache_stats():
+    return article_cache.stats()
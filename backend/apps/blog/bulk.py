@@ -0,0 +1,178 @@
+from typing import Any, Dict, List, Optional, Type, Union
+
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.amis.components import ActionType, Dialog, FormItem, Select
+from fastapi_amis_admin.amis.constants import LevelEnum
+from fastapi_amis_admin.amis.types import SchemaNode
+from fastapi_amis_admin.crud.schema import BaseApiOut
+from fastapi_amis_admin.models import Field
+from fastapi_amis_admin.utils.pydantic import ModelField
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Connection, Row
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from apps.blog.events import receive_bulk_delete, receive_bulk_link, receive_bulk_update
+from apps.blog.models import Article, ArticleStatus, ArticleTagLink, Category, Tag
+
+# 文章批量操作: 选中的文章按`bulk_chunk_size`分批,每批执行一条`UPDATE/DELETE ... WHERE id IN (...)`,
+# 不逐行加载ORM对象.所有批次在请求的同一事务中执行.
+# - 语句通过连接直接执行,不触发ORM事件.执行前读取一次受影响的文章,执行后调用`apps/blog/events.py`中的
+#   `receive_bulk_*`,按批次维护分类与标签的文章数量,文章统计,全文索引与文章缓存.
+
+
+def article_rows(connection: Connection, item_id: List[int]) -> List[Row]:
+    """修改前的文章: (id, status, category_id, create_time)"""
+    return connection.execute(
+        select(Article.id, Article.status, Article.category_id, Article.create_time).where(Article.id.in_(item_id))
+    ).all()
+
+
+def update_articles(session: Session, item_id: List[int], values: Dict[str, Any]) -> int:
+    """修改一批文章的字段,返回修改的文章数量"""
+    connection = session.connection()
+    rows = article_rows(connection, item_id)
+    result = connection.execute(update(Article).where(Article.id.in_(item_id)).values(**values))
+    receive_bulk_update(connection, rows, values)
+    return result.rowcount
+
+
+def link_tags(session: Session, item_id: List[int], tag_ids: List[int], remove: bool = False) -> int:
+    """为一批文章添加标签;`remove`为True时移除标签.返回标签关联改变的文章数量"""
+    connection = session.connection()
+    rows = article_rows(connection, item_id)
+    clause = ArticleTagLink.article_id.in_(item_id) & ArticleTagLink.tag_id.in_(tag_ids)
+    exists = set(connection.execute(select(ArticleTagLink.article_id, ArticleTagLink.tag_id).where(clause)).all())
+    if remove:
+        links = list(exists)
+        if links:
+            connection.execute(delete(ArticleTagLink).where(clause))
+    else:
+        # 只插入不存在的关联
+        links = [(row.id, tag_id) for row in rows for tag_id in tag_ids if (row.id, tag_id) not in exists]
+        if links:
+            connection.execute(insert(ArticleTagLink), [{"article_id": a, "tag_id": t} for a, t in links])
+    receive_bulk_link(connection, rows, links, -1 if remove else 1)
+    return len({article_id for article_id, _ in links})
+
+
+def delete_articles(session: Session, item_id: List[int]) -> None:
+    """删除一批文章: 先删除标签关联,再删除文章"""
+    connection = session.connection()
+    rows = article_rows(connection, item_id)
+    links = connection.execute(
+        select(ArticleTagLink.article_id, ArticleTagLink.tag_id).where(ArticleTagLink.article_id.in_(item_id))
+    ).all()
+    connection.execute(delete(ArticleTagLink).where(ArticleTagLink.article_id.in_(item_id)))
+    receive_bulk_link(connection, rows, links, -1)
+    connection.execute(delete(Article).where(Article.id.in_(item_id)))
+    receive_bulk_delete(connection, rows)
+
+
+class BulkModelAction(admin.ModelAction):
+    """批量操作动作.子类实现`handle_chunk`,在同步会话中处理一批主键,返回实际修改的文章数量.
+    执行前检查修改权限.
+    """
+
+    bulk_chunk_size: int = 500
+
+    def handle_chunk(self, session: Session, item_id: List[int], data: Optional[BaseModel]) -> int:
+        raise NotImplementedError
+
+    async def handle(self, request: Request, item_id: List[int], data: Optional[BaseModel], **kwargs) -> BaseApiOut[Any]:
+        if not await self.admin.has_update_permission(request, item_id, None):
+            return self.admin.error_no_router_permission(request)
+        count = 0
+        for offset in range(0, len(item_id), self.bulk_chunk_size):
+            count += await self.admin.db.async_run_sync(self.handle_chunk, item_id[offset : offset + self.bulk_chunk_size], data)
+        return BaseApiOut(msg=f"已修改{count}篇文章", data=count)
+
+    async def get_options(self, model: Type[Union[Category, Tag]]) -> List[dict]:
+        result = await self.admin.db.async_execute(select(model.id, model.name).order_by(model.name))
+        return [{"label": name, "value": id} for id, name in result]
+
+
+class BulkStatusAction(BulkModelAction):
+    """批量修改状态"""
+
+    action = ActionType.Dialog(
+        label="修改状态",
+        icon="fa fa-toggle-on",
+        level=LevelEnum.primary,
+        dialog=Dialog(title="批量修改状态"),
+    )
+
+    class schema(BaseModel):
+        status: ArticleStatus = Field(ArticleStatus.published, title="状态")
+
+    def handle_chunk(self, session: Session, item_id: List[int], data: schema) -> int:
+        return update_articles(session, item_id, {"status": data.status})
+
+
+class BulkCategoryAction(BulkModelAction):
+    """批量修改分类"""
+
+    action = ActionType.Dialog(
+        label="修改分类",
+        icon="fa fa-folder",
+        level=LevelEnum.primary,
+        dialog=Dialog(title="批量修改分类"),
+    )
+
+    class schema(BaseModel):
+        category_id: Optional[int] = Field(None, title="分类")
+
+    async def get_form_item(self, request: Request, modelfield: ModelField) -> Union[FormItem, SchemaNode]:
+        options = await self.get_options(Category)
+        return Select(name=modelfield.alias, label="分类", options=options, clearable=True, placeholder="未分类")
+
+    def handle_chunk(self, session: Session, item_id: List[int], data: schema) -> int:
+        return update_articles(session, item_id, {"category_id": data.category_id})
+
+
+class BulkTagAction(BulkModelAction):
+    """批量添加标签"""
+
+    action = ActionType.Dialog(
+        label="添加标签",
+        icon="fa fa-tags",
+        level=LevelEnum.primary,
+        dialog=Dialog(title="批量添加标签"),
+    )
+    remove: bool = False
+
+    class schema(BaseModel):
+        tag_ids: List[int] = Field(..., title="标签")
+
+    async def get_form_item(self, request: Request, modelfield: ModelField) -> Union[FormItem, SchemaNode]:
+        options = await self.get_options(Tag)
+        return Select(name=modelfield.alias, label="标签", options=options, multiple=True, required=True)
+
+    def handle_chunk(self, session: Session, item_id: List[int], data: schema) -> int:
+        return link_tags(session, item_id, data.tag_ids, remove=self.remove)
+
+
+class BulkRemoveTagAction(BulkTagAction):
+    """批量移除标签"""
+
+    action = ActionType.Dialog(
+        label="移除标签",
+        icon="fa fa-eraser",
+        level=LevelEnum.danger,
+        dialog=Dialog(title="批量移除标签"),
+    )
+    remove = True
+
+
+class BulkDeleteModelAdmin(admin.ModelAdmin):
+    """批量删除Mixin: 删除文章时按`bulk_chunk_size`分批执行`DELETE`,不逐行加载与删除ORM对象.
+    删除接口在调用`delete_items`前检查删除权限(`has_delete_permission`).
+    """
+
+    bulk_chunk_size: int = 500
+
+    async def delete_items(self, request: Request, item_id: List[int]) -> List[int]:
+        for offset in range(0, len(item_id), self.bulk_chunk_size):
+            await self.db.async_run_sync(delete_articles, item_id[offset : offset + self.bulk_chunk_size])
+        return item_id
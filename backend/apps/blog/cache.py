@@ -0,0 +1,138 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from core.replicas import use_primary
+from core.settings import settings
+from starlette.responses import Response
+
+# 文章读取接口响应缓存(read-through): 命中时直接返回缓存的JSON,不再查询数据库.
+# - 缓存后端只需实现`get`,`set`,`delete`,`incr`四个方法,与`redis.Redis`接口兼容,
+#   可直接替换为redis客户端: `article_cache.backend = redis.Redis(...)`,或设置`Settings.cache_url`.
+# - 多进程部署时进程内缓存的失效无法通知其他进程,未设置`cache_url`时不使用缓存.
+# - 失效由`apps/blog/events.py`中的ORM监听器触发.`insert`/`update`等Core语句不会触发ORM事件,执行后需手动失效.
+# - 列表缓存通过版本号整体失效;单篇文章按主键删除;分类与标签改变时通过全局版本号使所有缓存失效.
+# - 监听器在flush时执行,早于事务提交,并发读取可能写入旧数据,由TTL兜底.
+# - 配置从库时,未命中缓存的请求从主库读取: 从库可能落后于失效时的主库,读取的旧数据会在TTL内一直被返回.
+
+
+class MemoryCacheBackend:
+    """进程内LRU缓存,支持过期时间.接口与`redis.Redis`的同名方法一致"""
+
+    def __init__(self, max_size: int = 1024):
+        self.max_size = max_size
+        self._data: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            item = self._data.get(name)
+            if item is None:
+                return None
+            value, expire_at = item
+            if expire_at is not None and expire_at <= time.monotonic():
+                del self._data[name]
+                return None
+            self._data.move_to_end(name)
+            return value
+
+    def set(self, name: str, value: Any, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+            self._data.move_to_end(name)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+        return True
+
+    def delete(self, *names: str) -> int:
+        with self._lock:
+            return sum(self._data.pop(name, None) is not None for name in names)
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value, expire_at = self._data.get(name, (0, None))
+            value = int(value) + amount
+            self._data[name] = (value, expire_at)
+            self._data.move_to_end(name)
+            return value
+
+
+class ResponseCache:
+    """接口响应缓存,缓存内容为响应体与响应头"""
+
+    # 不缓存的响应头,由`Response`重新生成
+    skip_headers = {"content-length", "content-type"}
+
+    def __init__(self, backend: Any = None, *, prefix: str = "blog", ttl: int = 300, enabled: bool = True):
+        self.backend = backend or MemoryCacheBackend()
+        self.enabled = enabled
+        self.prefix = prefix
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _version(self, name: str) -> int:
+        return int(self.backend.get(f"{self.prefix}:{name}:version") or 0)
+
+    def read_key(self, id: Any, params: Dict[str, Any]) -> str:
+        """单篇文章缓存键.`read`,`read2`,`read3`返回相同数据,共用缓存"""
+        return f"{self.prefix}:{self._version('global')}:article:{id}:{self._encode_params(params)}"
+
+    def list_key(self, route: str, params: Dict[str, Any]) -> str:
+        """文章列表缓存键"""
+        version = f"{self._version('global')}:{self._version('list')}"
+        return f"{self.prefix}:{version}:{route}:{self._encode_params(params)}"
+
+    @staticmethod
+    def _encode_params(params: Dict[str, Any]) -> str:
+        return json.dumps(params, sort_keys=True, default=str, separators=(",", ":"))
+
+    async def read_through(self, key: str, loader: Callable[[], Awaitable[Response]]) -> Response:
+        """读取缓存,未命中时调用`loader`生成响应并写入缓存.
+        只缓存响应体不为`null`的200响应: 不存在的数据不缓存,任意主键的请求不会占满缓存.
+        `loader`使用主库查询,见`core/replicas.py`
+        """
+        if not self.enabled:
+            return await loader()
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.hits += 1
+            data = json.loads(cached)
+            return Response(data["body"], headers={**data["headers"], "X-Cache": "HIT"}, media_type="application/json")
+        self.misses += 1
+        use_primary()
+        response = await loader()
+        if response.status_code == 200 and response.body != b"null":
+            headers = {k: v for k, v in response.headers.items() if k not in self.skip_headers}
+            self.backend.set(key, json.dumps({"body": response.body.decode(), "headers": headers}), ex=self.ttl)
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+    def invalidate_articles(self, ids: Iterable[Any] = ()) -> None:
+        """文章改变: 删除指定文章的缓存,并使所有列表缓存失效"""
+        keys = [self.read_key(id, {"expand": expand}) for id in ids if id is not None for expand in (False, True)]
+        if keys:
+            self.backend.delete(*keys)
+        self.backend.incr(f"{self.prefix}:list:version")
+
+    def invalidate_all(self) -> None:
+        """分类或标签改变: 文章详情中包含分类与标签,所有缓存失效"""
+        self.backend.incr(f"{self.prefix}:global:version")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / total if total else 0.0}
+
+
+def create_backend() -> Any:
+    if settings.cache_url:
+        import redis  # 可选依赖: pip install redis
+
+        return redis.Redis.from_url(settings.cache_url)
+    return MemoryCacheBackend()
+
+
+article_cache = ResponseCache(create_backend(), enabled=bool(settings.cache_url) or settings.workers <= 1)
+"""文章接口响应缓存"""
@@ -0,0 +1,193 @@
+import re
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, inspect, select, update
+from sqlalchemy.engine import Connection, Result
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from apps.blog.models import Article, ArticleStatus, ArticleTagLink, Category, Tag
+
+# 分类与标签的文章数量(冗余字段`article_count`,`published_count`),列表中直接读取,不再分组统计.
+# - ORM增删改(flush)时按变化量增量更新,见`apps/blog/events.py`.
+# - 通过`session.execute`执行的`insert`/`update`/`delete`语句(例如关联标签接口)不经过flush,
+#   执行后重新统计受影响的分类与标签.
+# - 直接使用连接执行的语句(例如批量导入,后台批量操作)需自行调用`CounterDeltas`或`recount_*`.
+# - 重新统计全部计数:
+#     python -m apps.blog.counters
+
+
+def is_published(status: Any) -> bool:
+    return status == ArticleStatus.published
+
+
+def _history_values(attr) -> Tuple[Any, Any]:
+    """属性在本次flush中的(原值, 新值)"""
+    history = attr.history
+    if not history.has_changes():
+        value = history.unchanged[0] if history.unchanged else None
+        return value, value
+    return (history.deleted[0] if history.deleted else None), (history.added[0] if history.added else None)
+
+
+class CounterDeltas:
+    """累计分类与标签文章数量的变化量,合并为少量`UPDATE`语句执行"""
+
+    def __init__(self):
+        self.categories: Dict[int, List[int]] = defaultdict(lambda: [0, 0])  # id: [文章数量, 已发布数量]
+        self.tags: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+        self.article_tags: Dict[int, int] = defaultdict(int)  # 文章id: 当前关联的所有标签的已发布数量变化量
+
+    def add_category(self, category_id: Optional[int], articles: int, published: int) -> None:
+        if category_id is not None:
+            delta = self.categories[category_id]
+            delta[0] += articles
+            delta[1] += published
+
+    def add_tag(self, tag_id: Optional[int], articles: int, published: int) -> None:
+        if tag_id is not None:
+            delta = self.tags[tag_id]
+            delta[0] += articles
+            delta[1] += published
+
+    def add_row(self, article_id: int, status: Any, category_id: Optional[int], delta: int) -> None:
+        """批量修改的文章: 修改前(`delta`为-1)与修改后(`delta`为1)的状态与分类,标签关联不变"""
+        published = is_published(status)
+        self.add_category(category_id, delta, delta * published)
+        if published:
+            self.article_tags[article_id] += delta
+
+    def add_article(self, article: Article, *, created: bool = False, deleted: bool = False) -> None:
+        """根据文章在本次flush中的变化(新增,删除,状态,分类,标签)累计变化量"""
+        state = inspect(article)
+        old_category, new_category = _history_values(state.attrs.category_id)
+        old_status, new_status = _history_values(state.attrs.status)
+        old_published = not created and is_published(old_status)
+        new_published = not deleted and is_published(new_status)
+        if not created:
+            self.add_category(old_category, -1, -old_published)
+        if not deleted:
+            self.add_category(new_category, 1, new_published)
+        # 标签: 当前关联的标签(flush后数据库中的关联)已发布数量按状态变化调整;新增与移除的标签再修正
+        tags = state.attrs.tags.history
+        added, removed = tags.added, tags.deleted
+        if deleted:
+            added, removed = (), [*tags.unchanged, *tags.deleted]
+        elif new_published != old_published:
+            self.article_tags[article.id] += new_published - old_published
+        for tag in added:
+            self.add_tag(tag.id, 1, old_published)
+        for tag in removed:
+            self.add_tag(tag.id, -1, -old_published)
+
+    def apply(self, connection: Connection) -> None:
+        for model, deltas in ((Category, self.categories), (Tag, self.tags)):
+            groups: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+            for id_, (articles, published) in deltas.items():
+                if articles or published:
+                    groups[(articles, published)].append(id_)
+            for (articles, published), ids in groups.items():
+                connection.execute(
+                    update(model)
+                    .where(model.id.in_(ids))
+                    .values(article_count=model.article_count + articles, published_count=model.published_count + published)
+                )
+        groups = defaultdict(list)
+        for article_id, published in self.article_tags.items():
+            if published:
+                groups[published].append(article_id)
+        for published, ids in groups.items():
+            tag_ids = select(ArticleTagLink.tag_id).where(ArticleTagLink.article_id.in_(ids))
+            connection.execute(update(Tag).where(Tag.id.in_(tag_ids)).values(published_count=Tag.published_count + published))
+
+
+def recount_categories(connection: Connection, ids: Iterable[int] = None) -> None:
+    """重新统计分类的文章数量,`ids`为None时统计全部"""
+    articles = select(func.count()).where(Article.category_id == Category.id)
+    published = articles.where(Article.status == ArticleStatus.published)
+    stmt = update(Category).values(article_count=articles.scalar_subquery(), published_count=published.scalar_subquery())
+    if ids is not None:
+        stmt = stmt.where(Category.id.in_(list(ids)))
+    connection.execute(stmt)
+
+
+def recount_tags(connection: Connection, ids: Iterable[int] = None) -> None:
+    """重新统计标签的文章数量,`ids`为None时统计全部"""
+    articles = select(func.count()).select_from(ArticleTagLink).where(ArticleTagLink.tag_id == Tag.id)
+    published = articles.join(Article, Article.id == ArticleTagLink.article_id).where(Article.status == ArticleStatus.published)
+    stmt = update(Tag).values(article_count=articles.scalar_subquery(), published_count=published.scalar_subquery())
+    if ids is not None:
+        stmt = stmt.where(Tag.id.in_(list(ids)))
+    connection.execute(stmt)
+
+
+def reconcile(connection: Connection) -> None:
+    """重新统计全部分类与标签的文章数量"""
+    recount_categories(connection)
+    recount_tags(connection)
+
+
+def inserted_values(state: ORMExecuteState, key: str) -> Set[Any]:
+    """INSERT语句中某列的值: 来自`execute`参数或`values()`(多行时参数名为`<key>_m<n>`)"""
+    params = state.parameters or {}
+    rows = params if isinstance(params, list) else [params]
+    values = {row[key] for row in rows if key in row}
+    if isinstance(params, list):
+        # ORM批量插入(参数为列表)的语句不能单独编译,值只来自参数
+        return values
+    pattern = re.compile(rf"{key}(_m\d+)?")
+    values.update(v for k, v in state.statement.compile().params.items() if pattern.fullmatch(k))
+    return values
+
+
+def execute_with_recount(state: ORMExecuteState) -> Optional[Result]:
+    """`do_orm_execute`事件: 执行修改文章或文章标签关联的语句,并重新统计受影响的分类与标签"""
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return None
+    name = getattr(state.statement.table, "name", None)
+    if name not in (Article.__tablename__, ArticleTagLink.__tablename__):
+        return None
+    session: Session = state.session
+    connection = session.connection()
+    whereclause = None if state.is_insert else state.statement.whereclause
+    categories: Set[int] = set()
+    tags: Set[int] = set()
+    article_ids: List[int] = []
+    if name == ArticleTagLink.__tablename__:
+        if state.is_insert:
+            tags.update(inserted_values(state, "tag_id"))
+        else:
+            tags.update(connection.scalars(select(ArticleTagLink.tag_id).where(whereclause).distinct()))
+    elif state.is_insert:
+        categories.update(inserted_values(state, "category_id"))
+    else:
+        article_ids = list(connection.scalars(select(Article.id).where(whereclause)))
+        categories.update(connection.scalars(select(Article.category_id).where(Article.id.in_(article_ids)).distinct()))
+        tags.update(
+            connection.scalars(select(ArticleTagLink.tag_id).where(ArticleTagLink.article_id.in_(article_ids)).distinct())
+        )
+    result = state.invoke_statement()
+    if state.is_update and article_ids:
+        # 分类可能被修改,加上修改后的分类
+        categories.update(connection.scalars(select(Article.category_id).where(Article.id.in_(article_ids)).distinct()))
+    categories.discard(None)
+    tags.discard(None)
+    if categories:
+        recount_categories(connection, categories)
+    if tags:
+        recount_tags(connection, tags)
+    return result
+
+
+def main():
+    from core.globals import sync_db
+
+    with sync_db.engine.begin() as connection:
+        reconcile(connection)
+        for model in (Category, Tag):
+            total = connection.scalar(select(func.count()).select_from(model))
+            print(f"recounted {total} {model.__tablename__}")
+
+
+if __name__ == "__main__":
+    main()
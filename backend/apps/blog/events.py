@@ -1,7 +1,15 @@
-from sqlalchemy import event
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.engine import Result, Row
 from sqlalchemy.future import Connection
+from sqlalchemy.orm import ORMExecuteState, Session
 
-from apps.blog.models import Article
+from apps.blog.cache import article_cache
+from apps.blog.counters import CounterDeltas, execute_with_recount, inserted_values, is_published, recount_tags
+from apps.blog.models import Article, ArticleTagLink, Category, Tag
+from apps.blog.search import SEARCH_FIELDS, get_search_backend
+from apps.blog.stats import StatDeltas, execute_with_stats
 
 
 @event.listens_for(Article, "before_insert")
@@ -9,6 +17,7 @@ def receive_before_insert(mapper, connection: Connection, article: Article):
     """监听创建文章"""
     # sess = object_session(article)
     # do something
+    article_cache.invalidate_articles()
 
 
 @event.listens_for(Article.status, "set")
@@ -16,3 +25,139 @@ def receive_set(article: Article, value, old, initiator):
     """监听文章状态改变"""
     # sess = object_session(article)
     # do something
+    if value != old:
+        article_cache.invalidate_articles([article.id])
+
+
+@event.listens_for(Article, "after_insert")
+def receive_after_insert(mapper, connection: Connection, article: Article):
+    """同步全文索引: 新增文章"""
+    get_search_backend(connection.dialect.name).index(connection, [article.id])
+    # 主键在插入后才确定,删除可能已缓存的空结果
+    article_cache.invalidate_articles([article.id])
+
+
+@event.listens_for(Article, "after_update")
+def receive_after_update(mapper, connection: Connection, article: Article):
+    """同步全文索引: 仅在搜索字段改变时重建;使文章缓存失效"""
+    state = inspect(article)
+    if any(state.attrs[field.key].history.has_changes() for field in SEARCH_FIELDS):
+        get_search_backend(connection.dialect.name).index(connection, [article.id])
+    article_cache.invalidate_articles([article.id])
+
+
+@event.listens_for(Article, "after_delete")
+def receive_after_delete(mapper, connection: Connection, article: Article):
+    """同步全文索引: 删除文章;使文章缓存失效"""
+    get_search_backend(connection.dialect.name).remove(connection, [article.id])
+    article_cache.invalidate_articles([article.id])
+
+
+@event.listens_for(Category, "after_update")
+@event.listens_for(Category, "after_delete")
+@event.listens_for(Tag, "after_update")
+@event.listens_for(Tag, "after_delete")
+def receive_relation_change(mapper, connection: Connection, target):
+    """文章详情包含分类与标签,改变时使所有文章缓存失效"""
+    article_cache.invalidate_all()
+
+
+@event.listens_for(Session, "after_flush")
+def receive_after_flush(session: Session, flush_context):
+    """维护分类与标签的文章数量: 新增,删除,状态改变,分类改变,标签关联改变;追加文章统计变化量"""
+    deltas = CounterDeltas()
+    stats = StatDeltas()
+    link_tags = set()
+    for objs, kwargs in ((session.new, {"created": True}), (session.dirty, {}), (session.deleted, {"deleted": True})):
+        for obj in objs:
+            if isinstance(obj, Article):
+                deltas.add_article(obj, **kwargs)
+                stats.add_article(obj, **kwargs)
+            elif isinstance(obj, ArticleTagLink):
+                link_tags.add(obj.tag_id)
+    if deltas.categories or deltas.tags or deltas.article_tags:
+        deltas.apply(session.connection())
+    stats.apply(session.connection())
+    if link_tags:
+        # 直接增删关联模型时,关联的文章状态未知,重新统计
+        recount_tags(session.connection(), link_tags)
+
+
+def execute_with_invalidation(state: ORMExecuteState, execute: Callable[[], Optional[Result]]) -> Optional[Result]:
+    """`do_orm_execute`事件: 修改文章或文章标签关联(例如关联标签接口)的语句执行后,使受影响文章的缓存失效.
+    `execute`为同一事件中的其他处理,返回None时直接执行语句.
+    """
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return execute()
+    name = getattr(state.statement.table, "name", None)
+    if name not in (Article.__tablename__, ArticleTagLink.__tablename__):
+        return execute()
+    connection = state.session.connection()
+    ids: Set[Any] = set()
+    if name == ArticleTagLink.__tablename__:
+        if state.is_insert:
+            ids.update(inserted_values(state, "article_id"))
+        else:
+            link_ids = select(ArticleTagLink.article_id).where(state.statement.whereclause).distinct()
+            ids.update(connection.scalars(link_ids))
+    elif not state.is_insert:
+        ids.update(connection.scalars(select(Article.id).where(state.statement.whereclause)))
+    result = execute()
+    if result is None:
+        result = state.invoke_statement()
+    article_cache.invalidate_articles(ids)
+    return result
+
+
+@event.listens_for(Session, "do_orm_execute")
+def receive_do_orm_execute(state: ORMExecuteState):
+    """`session.execute`执行的批量语句不经过flush,执行后重新统计受影响的分类与标签,追加文章统计变化量,使文章缓存失效"""
+    return execute_with_invalidation(state, lambda: execute_with_stats(state, lambda: execute_with_recount(state)))
+
+
+# 批量操作(见`apps/blog/bulk.py`)通过连接直接执行`UPDATE/DELETE ... WHERE id IN (...)`,不触发上述事件.
+# 执行后调用以下函数,按批次执行逐行修改时的处理.`rows`为修改前读取的文章(id, status, category_id, create_time).
+
+
+def receive_bulk_update(connection: Connection, rows: List[Row], values: Dict[str, Any]) -> None:
+    """批量修改文章字段: 维护分类与标签的文章数量,文章统计;搜索字段改变时重建全文索引;使文章缓存失效"""
+    deltas = CounterDeltas()
+    stats = StatDeltas()
+    for row in rows:
+        status, category_id = values.get("status", row.status), values.get("category_id", row.category_id)
+        deltas.add_row(row.id, row.status, row.category_id, -1)
+        deltas.add_row(row.id, status, category_id, 1)
+        stats.add(row.status, row.category_id, row.create_time, -1)
+        stats.add(status, category_id, values.get("create_time", row.create_time), 1)
+    deltas.apply(connection)
+    stats.apply(connection)
+    ids = [row.id for row in rows]
+    if set(values) & {field.key for field in SEARCH_FIELDS}:
+        get_search_backend(connection.dialect.name).index(connection, ids)
+    article_cache.invalidate_articles(ids)
+
+
+def receive_bulk_link(connection: Connection, rows: List[Row], links: List[Tuple[int, int]], delta: int) -> None:
+    """批量添加(`delta`为1)或移除(`delta`为-1)文章标签关联: 维护标签的文章数量;使文章缓存失效.
+    `links`为实际添加或移除的关联(article_id, tag_id)
+    """
+    published = {row.id for row in rows if is_published(row.status)}
+    deltas = CounterDeltas()
+    for article_id, tag_id in links:
+        deltas.add_tag(tag_id, delta, delta * (article_id in published))
+    deltas.apply(connection)
+    article_cache.invalidate_articles([row.id for row in rows])
+
+
+def receive_bulk_delete(connection: Connection, rows: List[Row]) -> None:
+    """批量删除文章(标签关联已通过`receive_bulk_link`移除): 维护分类的文章数量,文章统计;删除全文索引;使文章缓存失效"""
+    deltas = CounterDeltas()
+    stats = StatDeltas()
+    for row in rows:
+        deltas.add_category(row.category_id, -1, -is_published(row.status))
+        stats.add(row.status, row.category_id, row.create_time, -1)
+    deltas.apply(connection)
+    stats.apply(connection)
+    ids = [row.id for row in rows]
+    get_search_backend(connection.dialect.name).remove(connection, ids)
+    article_cache.invalidate_articles(ids)
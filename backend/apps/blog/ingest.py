@@ -0,0 +1,225 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from core.globals import site
+from fastapi_amis_admin.models import Field
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.engine import Connection
+
+from apps.blog.cache import article_cache
+from apps.blog.counters import CounterDeltas, is_published
+from apps.blog.models import Article, ArticleStatus, ArticleTagLink, Category, Tag
+from apps.blog.search import get_search_backend
+from apps.blog.stats import StatDeltas
+
+# 文章批量导入: 逐块读取请求体,逐行解析校验,按批次写入数据库.
+# - 请求体不会整体读入内存,内存占用只与批次大小有关.
+# - 每个批次一个事务,使用executemany批量插入文章及标签关联;某批次失败时,只回滚该批次.
+# - 分类与标签按名称匹配,名称与主键的映射在导入开始时一次性加载到内存.
+# - Core语句不会触发ORM事件,每个批次写入后手动同步全文索引与缓存.
+
+MAX_ERRORS = 1000  # 最多返回的错误行数,避免错误信息占用过多内存
+TAG_SEPARATOR = "|"  # CSV中多个标签的分隔符
+
+
+class ArticleImportRow(BaseModel):
+    """导入行数据"""
+
+    title: str = Field(..., max_length=200)
+    content: str
+    description: str = ""
+    img: str = Field("", max_length=300)
+    source: str = Field("", max_length=200)
+    status: ArticleStatus = ArticleStatus.unpublished
+    create_time: Optional[datetime] = None
+    category: Optional[str] = Field(None, title="分类名称")
+    tags: List[str] = Field([], title="标签名称")
+
+
+class ImportRowError(BaseModel):
+    line: int = Field(..., title="行号")
+    error: str = Field(..., title="错误信息")
+
+
+class ImportResult(BaseModel):
+    total: int = Field(0, title="总行数")
+    inserted: int = Field(0, title="成功行数")
+    failed: int = Field(0, title="失败行数")
+    errors: List[ImportRowError] = Field([], title="错误行,最多返回前1000条")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, str]]:
+    """将字节流按行切分,返回(行号, 行内容)"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, line_no = "", 0
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            line_no += 1
+            yield line_no, line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield line_no + 1, buffer.rstrip("\r")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """解析NDJSON,每行一个JSON对象.解析失败时返回异常对象"""
+    async for line_no, line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        try:
+            yield line_no, json.loads(line)
+        except ValueError as error:
+            yield line_no, error
+
+
+async def iter_csv(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Any]]:
+    """解析CSV,第一行为表头.引号内的字段可以跨行;解析失败时返回异常对象"""
+    header, pending, quotes, start = None, [], 0, 0
+    async for line_no, line in iter_lines(chunks):
+        if not pending:
+            if not line.strip():
+                continue
+            start = line_no
+        pending.append(line)
+        quotes += line.count('"')
+        if quotes % 2:  # 引号未闭合,记录未结束
+            continue
+        record = next(csv.reader(["\n".join(pending)]))
+        pending, quotes = [], 0
+        if header is None:
+            header = [name.strip().lower() for name in record]
+            continue
+        if len(record) != len(header):
+            yield start, ValueError(f"expected {len(header)} columns, got {len(record)}")
+            continue
+        data = dict(zip(header, record))
+        if "tags" in data:
+            data["tags"] = [tag.strip() for tag in data["tags"].split(TAG_SEPARATOR) if tag.strip()]
+        # 空字符串视为未填写,使用默认值
+        yield start, {key: value for key, value in data.items() if value != ""}
+    if pending:
+        yield start, ValueError("unterminated quoted field")
+
+
+def _format_error(error: Exception) -> str:
+    if isinstance(error, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in error.errors())
+    return str(error)
+
+
+class ArticleImporter:
+    """文章批量导入"""
+
+    def __init__(self, batch_size: int = 1000, create_missing: bool = True):
+        self.batch_size = batch_size
+        self.create_missing = create_missing  # 自动创建不存在的分类与标签
+        self.categories: Dict[str, int] = {}
+        self.tags: Dict[str, int] = {}
+        self.result = ImportResult()
+
+    def _load_lookups(self, connection: Connection) -> None:
+        self.categories = dict(connection.execute(select(Category.name, Category.id)).all())
+        self.tags = dict(connection.execute(select(Tag.name, Tag.id)).all())
+
+    def _create_names(self, connection: Connection, categories: List[str], tags: List[str]) -> None:
+        if categories:
+            connection.execute(insert(Category), [{"name": name, "description": "", "status": False} for name in categories])
+        if tags:
+            connection.execute(insert(Tag), [{"name": name} for name in tags])
+        self.categories.update(connection.execute(select(Category.name, Category.id).where(Category.name.in_(categories))).all())
+        self.tags.update(connection.execute(select(Tag.name, Tag.id).where(Tag.name.in_(tags))).all())
+
+    def _insert_batch(self, connection: Connection, rows: List[ArticleImportRow]) -> List[int]:
+        values = []
+        for row in rows:
+            data = row.dict(exclude={"category", "tags"})
+            data["create_time"] = data["create_time"] or datetime.utcnow()
+            data["category_id"] = self.categories.get(row.category) if row.category else None
+            values.append(data)
+        if connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+            stmt = insert(Article).returning(Article.id, sort_by_parameter_order=True)
+            ids = list(connection.execute(stmt, values).scalars())
+        else:
+            # 数据库不支持批量返回主键时,逐行插入
+            ids = [connection.execute(insert(Article).values(data)).inserted_primary_key[0] for data in values]
+        links = [
+            {"article_id": article_id, "tag_id": self.tags[name]}
+            for article_id, row in zip(ids, rows)
+            for name in dict.fromkeys(row.tags)
+        ]
+        if links:
+            connection.execute(insert(ArticleTagLink), links)
+        get_search_backend(connection.dialect.name).index(connection, ids)
+        # Core语句不触发ORM事件,在同一事务中更新分类与标签的文章数量,追加文章统计变化量
+        deltas = CounterDeltas()
+        stats = StatDeltas()
+        for data, row in zip(values, rows):
+            published = is_published(data["status"])
+            deltas.add_category(data["category_id"], 1, published)
+            for name in dict.fromkeys(row.tags):
+                deltas.add_tag(self.tags[name], 1, published)
+            stats.add(data["status"], data["category_id"], data["create_time"], 1)
+        deltas.apply(connection)
+        stats.apply(connection)
+        return ids
+
+    def _add_error(self, line: int, error: str) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < MAX_ERRORS:
+            self.result.errors.append(ImportRowError(line=line, error=error))
+
+    async def _flush(self, batch: List[Tuple[int, ArticleImportRow]]) -> None:
+        missing_categories = {row.category for _, row in batch if row.category and row.category not in self.categories}
+        missing_tags = {name for _, row in batch for name in row.tags if name not in self.tags}
+        if missing_categories or missing_tags:
+            if self.create_missing:
+                await site.db.async_run_sync(
+                    self._create_names, sorted(missing_categories), sorted(missing_tags), is_session=False
+                )
+            else:
+                rows = []
+                for line, row in batch:
+                    names = [row.category] if row.category in missing_categories else []
+                    names += [name for name in row.tags if name in missing_tags]
+                    if names:
+                        self._add_error(line, f"unknown category or tag: {', '.join(names)}")
+                    else:
+                        rows.append((line, row))
+                batch = rows
+        if not batch:
+            return
+        try:
+            ids = await site.db.async_run_sync(self._insert_batch, [row for _, row in batch], is_session=False)
+        except Exception as error:  # 批次事务已回滚,该批次所有行记为失败
+            for line, _ in batch:
+                self._add_error(line, f"batch failed: {getattr(error, 'orig', error)}")
+            return
+        self.result.inserted += len(ids)
+        article_cache.invalidate_articles(ids)
+
+    async def run(self, records: AsyncIterator[Tuple[int, Any]]) -> ImportResult:
+        await site.db.async_run_sync(self._load_lookups, is_session=False)
+        batch: List[Tuple[int, ArticleImportRow]] = []
+        async for line, data in records:
+            self.result.total += 1
+            try:
+                if isinstance(data, Exception):
+                    raise data
+                if not isinstance(data, dict):
+                    raise ValueError("row must be an object")
+                batch.append((line, ArticleImportRow.parse_obj(data)))
+            except (ValueError, ValidationError) as error:
+                self._add_error(line, _format_error(error))
+                continue
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        if batch:
+            await self._flush(batch)
+        return self.result
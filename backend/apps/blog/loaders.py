@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from fastapi import Query
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.crud.schema import ItemListSchema
+from sqlalchemy import select
+from sqlalchemy.engine import Result, Row
+from sqlalchemy.orm import InstrumentedAttribute, Session, load_only, selectinload
+from sqlalchemy.sql import Select
+from starlette.requests import Request
+from typing_extensions import Annotated
+
+from apps.blog.models import Article, ArticleDetail, ArticleSummary
+
+# 关联数据预加载: 使用`selectinload`按主键批量加载一页数据的关联对象(每个关联一条`IN`查询),
+# 避免逐行懒加载产生的N+1查询.异步Session不支持懒加载,访问未加载的关联会抛出`MissingGreenlet`异常.
+# 列表只查询列表字段(`Article.summary_fields`),正文等大字段只在读取详情时加载.
+# 快速JSON响应(`core/responses.py`)且不返回关联数据时,列表直接查询列表字段的列,由查询行构造字典,不创建ORM对象.
+
+ExpandQuery = Annotated[bool, Query(description="是否同时返回文章分类与标签")]
+
+
+def article_load_options() -> list:
+    """文章详情的预加载选项: 分类与标签"""
+    return [selectinload(Article.category), selectinload(Article.tags)]
+
+
+def article_list_options() -> list:
+    """文章列表的加载选项: 只查询列表字段.访问未加载的字段直接抛出异常,不会在异步Session中触发懒加载"""
+    return [load_only(*Article.summary_fields(), raiseload=True)]
+
+
+def article_list_select(expand: bool = False, fast: bool = False) -> Select:
+    """文章列表查询语句.`fast`且不返回关联数据时只查询列,结果为查询行;否则结果为ORM对象"""
+    if fast and not expand:
+        return select(*Article.summary_fields())
+    stmt = select(Article).options(*article_list_options())
+    # 每个关联一条`IN`查询,查询次数与每页数量无关
+    return stmt.options(*article_load_options()) if expand else stmt
+
+
+def article_list_rows(result: Result, expand: bool = False, fast: bool = False) -> list:
+    """`article_list_select`查询结果的数据行"""
+    return result.all() if fast and not expand else result.scalars().all()
+
+
+class PrefetchModelAdmin(admin.ModelAdmin):
+    """关联数据预加载模型管理Mixin.
+    - 列表查询后,按当前页主键一次性加载`list_prefetch`中的关联数据,写入列表数据的同名字段.
+    - 每个关联固定增加一条查询,与每页数量无关.
+    """
+
+    list_prefetch: List[InstrumentedAttribute] = []  # 预加载的关联字段,例如: [Article.tags]
+
+    def _prefetch(self, session: Session, ids: Iterable[Any]) -> Dict[Any, Any]:
+        stmt = (
+            select(self.model)
+            .where(self.pk.in_(ids))
+            .options(load_only(self.pk), *[selectinload(field) for field in self.list_prefetch])
+        )
+        return {getattr(obj, self.pk_name): obj for obj in session.scalars(stmt)}
+
+    async def on_list_after(self, request: Request, result: Result, data: ItemListSchema, **kwargs) -> ItemListSchema:
+        data = await super().on_list_after(request, result, data, **kwargs)
+        if not self.list_prefetch or not data.items:
+            return data
+        objs = await self.db.async_run_sync(self._prefetch, [getattr(item, self.pk_name) for item in data.items])
+        for item in data.items:
+            obj = objs.get(getattr(item, self.pk_name))
+            for field in self.list_prefetch:
+                setattr(item, field.key, getattr(obj, field.key) if obj else None)
+        return data
+
+
+def to_article_detail(article: Optional[Article], expand: bool = False) -> Optional[ArticleDetail]:
+    """转换为文章详情.未预加载关联时不访问关联属性,避免触发懒加载"""
+    if article is None:
+        return None
+    data = article.dict()
+    if expand:
+        data.update(category=article.category, tags=article.tags)
+    return ArticleDetail.parse_obj(data)
+
+
+def article_summary_data(item: Union[Article, Row], expand: bool = False) -> Dict[str, Any]:
+    """文章列表项字典,不做数据校验.`item`为查询行或只加载了列表字段的ORM对象"""
+    if isinstance(item, Row):
+        data = dict(item._mapping)
+    else:
+        data = {field.key: getattr(item, field.key) for field in Article.summary_fields()}
+    if expand:
+        data.update(category=item.category, tags=item.tags)
+    else:
+        data.update(category=None, tags=None)
+    return data
+
+
+def to_article_summary(item: Union[Article, Row], expand: bool = False, fast: bool = False) -> Union[ArticleSummary, dict]:
+    """转换为文章列表项.`fast`时直接返回字典,不通过`ArticleSummary`校验"""
+    data = article_summary_data(item, expand)
+    return data if fast else ArticleSummary.parse_obj(data)
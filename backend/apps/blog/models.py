@@ -3,7 +3,8 @@ from typing import List, Optional
 
 from fastapi_amis_admin.amis.components import ColumnImage, InputImage, InputRichText
 from fastapi_amis_admin.models import IntegerChoices, Field,SQLModel,ChoiceType
-from sqlalchemy import Column, String
+from fastapi_amis_admin.utils.pydantic import create_model_by_model
+from sqlalchemy import Column, Index, String
 from sqlmodel import Relationship
 
 
@@ -19,21 +20,33 @@ class Category(SQLModel, table=True):
     name: str = Field(title="CategoryName", sa_column=Column(String(100), unique=True, index=True, nullable=False))
     description: str = Field(default="", title="Description", amis_form_item="textarea")
     status: bool = Field(False, title="status")
+    # 文章数量,由`apps/blog/counters.py`维护
+    article_count: int = Field(0, title="ArticleCount", sa_column_kwargs={"server_default": "0"})
+    published_count: int = Field(0, title="PublishedCount", sa_column_kwargs={"server_default": "0"})
     articles: List["Article"] = Relationship(back_populates="category")
 
 
 class ArticleTagLink(SQLModel, table=True):
     tag_id: Optional[int] = Field(default=None, foreign_key="tag.id", primary_key=True)
-    article_id: Optional[int] = Field(default=None, foreign_key="article.id", primary_key=True)
+    article_id: Optional[int] = Field(default=None, foreign_key="article.id", primary_key=True, index=True)
 
 
 class Tag(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True, nullable=False)
     name: str = Field(..., title="TagName", sa_column=Column(String(255), unique=True, index=True, nullable=False))
+    article_count: int = Field(0, title="ArticleCount", sa_column_kwargs={"server_default": "0"})
+    published_count: int = Field(0, title="PublishedCount", sa_column_kwargs={"server_default": "0"})
     articles: List["Article"] = Relationship(back_populates="tags", link_model=ArticleTagLink)
 
 
 class Article(SQLModel, table=True):
+    __table_args__ = (
+        # 列表查询: 按状态过滤,按创建时间排序(含游标分页)
+        Index("ix_article_status_create_time", "status", "create_time", "id"),
+        # 后台列表默认排序与游标分页
+        Index("ix_article_create_time_id", "create_time", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True, nullable=False)
     title: str = Field(title="ArticleTitle", max_length=200)
     img: str = Field(
@@ -46,10 +59,55 @@ class Article(SQLModel, table=True):
     description: str = Field(default="", title="ArticleDescription", amis_form_item="textarea")
     status: ArticleStatus = Field(ArticleStatus.unpublished, title="status",sa_type=ChoiceType(ArticleStatus))
     content: str = Field(..., title="ArticleContent", amis_form_item=InputRichText())
-    create_time: Optional[datetime] = Field(default_factory=datetime.utcnow, title="CreateTime")
-    category_id: Optional[int] = Field(default=None, foreign_key="category.id", title="CategoryId")
+    create_time: datetime = Field(default_factory=datetime.utcnow, title="CreateTime")  # 游标分页排序键,不能为NULL
+    category_id: Optional[int] = Field(default=None, foreign_key="category.id", title="CategoryId", index=True)
     source: str = Field(default="", title="ArticleSource", max_length=200)
 
     category: Optional[Category] = Relationship(back_populates="articles")
 
     tags: List[Tag] = Relationship(back_populates="articles", link_model=ArticleTagLink)
+
+    @classmethod
+    def keyset_fields(cls) -> tuple:
+        """游标分页字段,组合唯一且有序"""
+        return cls.create_time, cls.id
+
+    @classmethod
+    def summary_fields(cls) -> tuple:
+        """列表字段: 不包含正文与描述等不限长度的大字段,列表查询只读取这些列"""
+        return cls.id, cls.title, cls.img, cls.status, cls.create_time, cls.category_id, cls.source
+
+
+class ArticleStat(SQLModel, table=True):
+    """文章统计汇总: 按维度(状态,分类,日期)的文章数量,由`apps/blog/stats.py`维护"""
+
+    dimension: str = Field(primary_key=True, max_length=20, title="Dimension")
+    bucket: str = Field(primary_key=True, max_length=50, title="Bucket")
+    count: int = Field(0, title="Count")
+
+
+class ArticleStatDelta(SQLModel, table=True):
+    """文章统计变化量: 文章增删改时追加,定时合并到`ArticleStat`后删除"""
+
+    id: Optional[int] = Field(default=None, primary_key=True, nullable=False)
+    dimension: str = Field(max_length=20, title="Dimension")
+    bucket: str = Field(max_length=50, title="Bucket")
+    delta: int = Field(0, title="Delta")
+
+
+class ArticleDetail(create_model_by_model(Article, "ArticleFields", set_none=True)):
+    """文章详情: 包含分类与标签.关联数据需预加载,未加载时为None"""
+
+    category: Optional[Category] = None
+    tags: Optional[List[Tag]] = None
+
+
+class ArticleSummary(
+    create_model_by_model(
+        Article, "ArticleSummaryFields", include={field.key for field in Article.summary_fields()}, set_none=True
+    )
+):
+    """文章列表项: 不包含正文与描述.关联数据需预加载,未加载时为None"""
+
+    category: Optional[Category] = None
+    tags: Optional[List[Tag]] = None
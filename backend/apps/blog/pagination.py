@@ -0,0 +1,161 @@
+import base64
+import datetime
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from core.responses import FastJSONModelAdmin
+from fastapi import Body, Depends, HTTPException, Query
+from fastapi_amis_admin.amis import AmisAPI
+from fastapi_amis_admin.crud.parser import get_python_type_parse
+from fastapi_amis_admin.crud.schema import BaseApiOut, ItemListSchema, Paginator
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+from starlette import status
+from starlette.requests import Request
+from typing_extensions import Annotated
+
+# 游标分页(keyset pagination): 通过上一页最后一行的排序键定位下一页,
+# 避免`OFFSET`随页码增大而线性扫描,深度翻页与第一页的成本基本一致.
+# 注意: 游标字段组合必须唯一(通常以主键结尾),且不能为NULL(NULL不满足比较条件,该行永远不会出现),
+# 例如文章的`create_time`为NOT NULL.
+
+CursorLimitQuery = Annotated[int, Query(ge=1, le=100, description="每页数量")]
+CursorQuery = Annotated[Optional[str], Query(description="分页游标,取自上一页响应头`X-Next-Cursor`")]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """将排序键值编码为不透明的游标字符串"""
+    data = [v.isoformat() if isinstance(v, (datetime.datetime, datetime.date)) else v for v in values]
+    raw = json.dumps(data, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, fields: Sequence[InstrumentedAttribute]) -> List[Any]:
+    """解析游标字符串,并按字段类型还原排序键值"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        if not isinstance(data, list) or len(data) != len(fields):
+            raise ValueError(cursor)
+        return [get_python_type_parse(field)(value) for field, value in zip(fields, data)]
+    except Exception as error:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "invalid cursor") from error
+
+
+def keyset_clause(fields: Sequence[InstrumentedAttribute], values: Sequence[Any], desc: bool = False):
+    """生成`(a, b) > (x, y)`的等价条件.展开为OR/AND形式,兼容不支持行值比较的数据库.
+    额外添加`a >= x`条件,使数据库可以在(a, b)索引上做范围扫描.
+    """
+    clauses = []
+    for i, field in enumerate(fields):
+        cmp = field < values[i] if desc else field > values[i]
+        clauses.append(and_(*[fields[j] == values[j] for j in range(i)], cmp))
+    bound = fields[0] <= values[0] if desc else fields[0] >= values[0]
+    return and_(bound, or_(*clauses))
+
+
+def keyset_select(
+    sel: Select,
+    fields: Sequence[InstrumentedAttribute],
+    cursor: Optional[str],
+    limit: int,
+    desc: bool = False,
+) -> Select:
+    """为查询添加游标条件与排序.多查询一行,用于判断是否存在下一页"""
+    if cursor:
+        sel = sel.where(keyset_clause(fields, decode_cursor(cursor, fields), desc=desc))
+    return sel.order_by(*[field.desc() if desc else field.asc() for field in fields]).limit(limit + 1)
+
+
+def keyset_page(rows: Sequence[Any], fields: Sequence[InstrumentedAttribute], limit: int) -> Tuple[List[Any], str]:
+    """截取当前页数据,并返回下一页游标;没有下一页时游标为空字符串"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, ""
+    rows = rows[:limit]
+    return rows, encode_cursor([getattr(rows[-1], field.key) for field in fields])
+
+
+class KeysetModelAdmin(FastJSONModelAdmin):
+    """游标分页模型管理Mixin.
+    - 相邻翻页(上一页/下一页)时使用游标查询;跳页或按其他字段排序时回退为OFFSET分页.
+    - 列表响应额外返回`next_cursor`,`prev_cursor`,`cursor_page`,由amis合并到CRUD数据域,并在下次请求时回传.
+    - 游标字段不能为NULL: 修改时清空游标字段的值被忽略,保持原值.
+    """
+
+    cursor_fields: List[InstrumentedAttribute] = []  # 游标字段,例如: [Article.create_time, Article.id]
+
+    def _get_list_cursor(self, request: Request, paginator: Paginator) -> Tuple[bool, Optional[str], bool]:
+        """返回: (是否使用游标查询, 游标, 是否向前翻页)"""
+        if paginator.page == 1:
+            return True, None, False
+        query = request.query_params
+        cursor_page = query.get("cursor_page", "")
+        cursor_page = int(cursor_page) if cursor_page.isdigit() else 0
+        if paginator.page == cursor_page + 1 and query.get("next_cursor"):
+            return True, query["next_cursor"], False
+        if paginator.page == cursor_page - 1 and query.get("prev_cursor"):
+            return True, query["prev_cursor"], True
+        return False, None, False
+
+    def _encode_item_cursor(self, item: Any) -> str:
+        return encode_cursor([getattr(item, self.parser.get_alias(field)) for field in self.cursor_fields])
+
+    @property
+    def route_list(self):
+        async def route(
+            request: Request,
+            sel: self.AnnotatedSelect,  # type: ignore
+            paginator: Annotated[self.paginator, Depends()],  # type: ignore
+            filters: Annotated[self.schema_filter, Body()] = None,  # type: ignore
+        ):
+            if not await self.has_list_permission(request, paginator, filters):
+                return self.error_no_router_permission(request)
+            data = ItemListSchema(items=[])
+            data.query = dict(request.query_params)
+            if await self.has_filter_permission(request, filters):
+                data.filters = await self.on_filter_pre(request, filters)
+                if data.filters:
+                    sel = sel.filter(*self.calc_filter_clause(data.filters))
+            if paginator.show_total:
+                data.total = await self.db.async_scalar(
+                    select(func.count("*")).select_from(sel.with_only_columns(self.pk).subquery())
+                )
+            # 未指定排序或按第一个游标字段排序时,才能使用游标分页
+            keyset = not paginator.orderBy or paginator.orderBy == self.parser.get_alias(self.cursor_fields[0])
+            desc = bool(paginator.orderBy) and paginator.orderDir == "desc"
+            use_cursor, cursor, backward = self._get_list_cursor(request, paginator) if keyset else (False, None, False)
+            if use_cursor:
+                # 向前翻页时反向查询,再将结果倒序
+                sel = keyset_select(sel, self.cursor_fields, cursor, paginator.perPage, desc=desc != backward)
+            else:
+                if keyset:
+                    orderBy = [field.desc() if desc else field.asc() for field in self.cursor_fields]
+                else:
+                    orderBy = self._calc_ordering(paginator.orderBy, paginator.orderDir) or []
+                sel = sel.order_by(*orderBy).limit(paginator.perPage + 1).offset((paginator.page - 1) * paginator.perPage)
+            result = await self.db.async_execute(sel)
+            data = await self.on_list_after(request, result, data)
+            items, has_more = data.items[: paginator.perPage], len(data.items) > paginator.perPage
+            if backward:
+                items.reverse()
+            data.items = items
+            data.hasNext = has_more or backward
+            data.cursor_page = paginator.page
+            data.next_cursor = self._encode_item_cursor(items[-1]) if keyset and items and data.hasNext else ""
+            data.prev_cursor = self._encode_item_cursor(items[0]) if keyset and items and paginator.page > 1 else ""
+            # 游标字段为扩展字段,直接编码返回,避免被`response_model`过滤
+            return self.json_response(BaseApiOut(data=data))
+
+        return route
+
+    async def get_list_table_api(self, request: Request) -> AmisAPI:
+        api = await super().get_list_table_api(request)
+        api.url += "&cursor_page=${cursor_page}&next_cursor=${next_cursor}&prev_cursor=${prev_cursor}"
+        return api
+
+    async def on_update_pre(self, request: Request, obj: Any, item_id: Union[List[str], List[int]], **kwargs) -> Dict[str, Any]:
+        data = await super().on_update_pre(request, obj, item_id, **kwargs)
+        aliases = {self.parser.get_alias(field) for field in self.cursor_fields}
+        return {key: value for key, value in data.items() if value is not None or key not in aliases}
@@ -0,0 +1,176 @@
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from core.globals import site
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.amis.components import FormItem
+from fastapi_amis_admin.amis.types import SchemaNode
+from fastapi_amis_admin.crud.parser import SqlaField
+from fastapi_amis_admin.crud.schema import CrudEnum
+from fastapi_amis_admin.utils.pydantic import ModelField
+from sqlalchemy import column, literal_column, or_, select, table, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from apps.blog.models import Article
+
+# 全文搜索: 覆盖文章标题,描述和内容.
+# - SQLite: 使用FTS5外部内容虚拟表(trigram分词,支持中文子串匹配),不重复存储文章内容,由文章表上的触发器同步.
+#   FTS5或trigram分词不可用(需要SQLite 3.34及以上)时,回退为LIKE模糊匹配.
+# - PostgreSQL: 使用tsvector表达式GIN索引,由数据库自动维护.
+# - 其他数据库: 回退为LIKE模糊匹配.
+
+logger = logging.getLogger("apps.blog.search")
+
+SEARCH_FIELDS = [Article.title, Article.description, Article.content]
+
+
+class SearchBackend:
+    """全文搜索后端基类,默认使用LIKE模糊匹配"""
+
+    name = "like"
+
+    def setup(self, connection: Connection) -> None:
+        """创建索引结构"""
+
+    def index(self, connection: Connection, ids: Iterable[int]) -> None:
+        """从文章表重新读取并索引指定文章"""
+
+    def remove(self, connection: Connection, ids: Iterable[int]) -> None:
+        """从索引中移除指定文章"""
+
+    def search_clause(self, term: str):
+        """返回文章搜索条件.无法使用索引时返回None,由调用方回退为单个字段的LIKE匹配"""
+        return or_(*[field.like(f"%{term}%") for field in SEARCH_FIELDS])
+
+
+class SqliteFtsBackend(SearchBackend):
+    name = "sqlite_fts5"
+    table_name = "article_fts"
+    min_term_length = 3  # trigram分词无法匹配少于3个字符的词,此时回退为LIKE
+
+    def __init__(self):
+        self.fts = table(self.table_name, column("rowid"), *[column(field.key) for field in SEARCH_FIELDS])
+
+    def setup(self, connection: Connection) -> None:
+        columns = ", ".join(field.key for field in SEARCH_FIELDS)
+        sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": self.table_name}
+        ).scalar()
+        if sql and "content=" not in sql:  # 旧版本创建的虚拟表重复存储了文章内容,重建为外部内容表
+            connection.execute(text(f"DROP TABLE {self.table_name}"))
+            sql = None
+        connection.execute(
+            text(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table_name} USING fts5({columns}, "
+                "content='article', content_rowid='id', tokenize='trigram')"
+            )
+        )
+        # 外部内容表删除索引时需要提供原值,因此使用触发器同步,Core语句与批量操作同样生效
+        new = ", ".join(f"new.{field.key}" for field in SEARCH_FIELDS)
+        old = ", ".join(f"old.{field.key}" for field in SEARCH_FIELDS)
+        insert = f"INSERT INTO {self.table_name}(rowid, {columns}) VALUES (new.id, {new});"
+        delete = f"INSERT INTO {self.table_name}({self.table_name}, rowid, {columns}) VALUES ('delete', old.id, {old});"
+        triggers = {
+            "ai": f"AFTER INSERT ON article BEGIN {insert} END",
+            "ad": f"AFTER DELETE ON article BEGIN {delete} END",
+            "au": f"AFTER UPDATE OF {columns} ON article BEGIN {delete} {insert} END",
+        }
+        for suffix, body in triggers.items():
+            connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {self.table_name}_{suffix} {body}"))
+        # 首次创建时,从文章表导入已有数据
+        if sql is None:
+            connection.execute(text(f"INSERT INTO {self.table_name}({self.table_name}) VALUES ('rebuild')"))
+
+    def search_clause(self, term: str):
+        words = term.split()
+        if not words or min(len(word) for word in words) < self.min_term_length:
+            return None
+        # 每个词作为短语匹配,多个词之间为AND关系
+        query = " ".join('"{}"'.format(word.replace('"', '""')) for word in words)
+        return Article.id.in_(select(self.fts.c.rowid).where(literal_column(self.table_name).match(query)))
+
+
+class PostgresFtsBackend(SearchBackend):
+    name = "postgresql_tsvector"
+    index_name = "ix_article_fulltext"
+    # 索引表达式与查询表达式必须完全一致,数据库才能使用该索引
+    document = "to_tsvector('simple', {})".format(
+        " || ' ' || ".join(f"coalesce(article.{field.key}, '')" for field in SEARCH_FIELDS)
+    )
+
+    def setup(self, connection: Connection) -> None:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {self.index_name} ON article USING GIN ({self.document})"))
+
+    def search_clause(self, term: str):
+        query = text("plainto_tsquery('simple', :search_term)").bindparams(search_term=term)
+        return literal_column(self.document).op("@@")(query)
+
+
+search_backends: Dict[str, SearchBackend] = {
+    "sqlite": SqliteFtsBackend(),
+    "postgresql": PostgresFtsBackend(),
+}
+"""按数据库方言注册的全文搜索后端,可替换或扩展"""
+
+
+def get_search_backend(dialect_name: str) -> SearchBackend:
+    return search_backends.get(dialect_name) or SearchBackend()
+
+
+def index_articles(session: Session, ids: Iterable[int]) -> None:
+    """手动同步全文索引.`insert`/`update`等Core语句不会触发ORM事件,执行后需调用此函数"""
+    connection = session.connection()
+    get_search_backend(connection.dialect.name).index(connection, ids)
+
+
+async def setup_search_backend() -> None:
+    """启动时创建全文索引结构.数据库不支持时,回退为LIKE模糊匹配"""
+    dialect_name = site.db.engine.dialect.name
+    backend = get_search_backend(dialect_name)
+    try:
+        await site.db.async_run_sync(backend.setup, is_session=False)
+    except OperationalError as error:
+        logger.warning("full-text search backend %s unavailable, fallback to LIKE: %s", backend.name, error.orig)
+        search_backends[dialect_name] = SearchBackend()
+
+
+class FullTextModelAdmin(admin.ModelAdmin):
+    """全文搜索模型管理Mixin.
+    - `fulltext_fields`中字段的模糊搜索(`[~]`)改为文章全文搜索,覆盖标题,描述和内容,筛选项标注为全文搜索.
+    - 数据库不支持全文索引时,回退为LIKE模糊匹配;词过短无法使用索引时,仅对该字段LIKE匹配.
+    """
+
+    fulltext_fields: List[SqlaField] = []
+    fulltext_label = "(全文)"
+    fulltext_remark = "搜索文章标题,描述和内容;少于3个字符时仅匹配本字段"
+
+    @property
+    def fulltext_aliases(self) -> List[str]:
+        return [self.parser.get_alias(field) for field in self.fulltext_fields]
+
+    async def get_form_item(
+        self, request: Request, modelfield: ModelField, action: CrudEnum
+    ) -> Union[FormItem, SchemaNode, None]:
+        item = await super().get_form_item(request, modelfield, action)
+        if action == CrudEnum.filter and modelfield.name in self.fulltext_aliases and isinstance(item, FormItem):
+            item.label = f"{item.label}{self.fulltext_label}"
+            item.labelRemark = self.fulltext_remark
+        return item
+
+    def calc_filter_clause(self, data: Dict[str, Any]) -> List[Any]:
+        aliases = self.fulltext_aliases
+        backend = get_search_backend(self.db.engine.dialect.name)
+        clauses, others = [], {}
+        for key, value in data.items():
+            # 含有`%`的值为用户自定义的LIKE表达式,保持原样
+            clause: Optional[Any] = None
+            if key in aliases and isinstance(value, str) and value.startswith("[~]") and "%" not in value and value[3:].strip():
+                clause = backend.search_clause(value[3:].strip())
+            if clause is None:
+                others[key] = value
+            else:
+                clauses.append(clause)
+        return clauses + super().calc_filter_clause(others)
@@ -0,0 +1,265 @@
+import asyncio
+import datetime
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, inspect, or_, select, union_all, update
+from sqlalchemy.engine import Connection, Result
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import ORMExecuteState, Session
+from sqlalchemy_database import AsyncDatabase
+
+from apps.blog.counters import _history_values
+from apps.blog.models import Article, ArticleStat, ArticleStatDelta, ArticleStatus, Category
+
+# 文章统计: 按状态,分类,日期(创建时间)的文章数量,预先聚合在汇总表`ArticleStat`中,统计页面不再分组统计文章表.
+# - 文章增删改时只追加变化量(`ArticleStatDelta`),不更新汇总行,避免并发写入同一汇总行.见`apps/blog/events.py`.
+# - 定时合并(`compact`): 将变化量累加到汇总表并删除.读取时汇总表加上未合并的变化量,结果总是最新的.
+#   多进程部署时每个进程各自定时合并,通过条件更新版本号保证同一批变化量只被一个进程合并.
+# - 无法确定影响哪些文章的语句(例如不返回主键的批量插入)追加重建标记,下次合并时重新统计全部数据.
+# - 重新统计:
+#     python -m apps.blog.stats
+
+logger = logging.getLogger("apps.blog.stats")
+
+DIMENSIONS = ("status", "category", "day")
+REBUILD = "rebuild"  # 重建标记的维度
+VERSION = ("meta", "version")  # 汇总表中的版本行: 每次合并加1
+ARTICLE_COLUMNS = (Article.status, Article.category_id, Article.create_time)
+
+
+def article_buckets(status: Any, category_id: Optional[int], create_time: Optional[datetime.datetime]) -> List[Tuple[str, str]]:
+    """文章所属的统计分组: (维度, 分组).未分类的文章分组为空字符串"""
+    buckets = [("category", "" if category_id is None else str(category_id))]
+    if status is not None:
+        buckets.append(("status", str(int(status))))
+    if create_time is not None:
+        buckets.append(("day", create_time.date().isoformat()))
+    return buckets
+
+
+class StatDeltas:
+    """累计统计变化量,合并为一条`INSERT`语句追加"""
+
+    def __init__(self):
+        self.deltas: Dict[Tuple[str, str], int] = defaultdict(int)
+        self.rebuild = False
+
+    def add(self, status: Any, category_id: Optional[int], create_time: Optional[datetime.datetime], delta: int) -> None:
+        for bucket in article_buckets(status, category_id, create_time):
+            self.deltas[bucket] += delta
+
+    def add_rows(self, rows: Iterable[Tuple[Any, Optional[int], Optional[datetime.datetime]]], delta: int) -> None:
+        for row in rows:
+            self.add(*row, delta)
+
+    def add_article(self, article: Article, *, created: bool = False, deleted: bool = False) -> None:
+        """根据文章在本次flush中的变化(新增,删除,状态,分类,创建时间)累计变化量"""
+        state = inspect(article)
+        old, new = zip(*(_history_values(state.attrs[column.key]) for column in ARTICLE_COLUMNS))
+        if not created:
+            self.add(*old, -1)
+        if not deleted:
+            self.add(*new, 1)
+
+    def apply(self, connection: Connection) -> None:
+        values = [{"dimension": key[0], "bucket": key[1], "delta": delta} for key, delta in self.deltas.items() if delta]
+        if self.rebuild:
+            values.append({"dimension": REBUILD, "bucket": "", "delta": 0})
+        if values:
+            connection.execute(insert(ArticleStatDelta), values)
+
+
+def _article_rows(connection: Connection, ids: List[int]) -> list:
+    return connection.execute(select(*ARTICLE_COLUMNS).where(Article.id.in_(ids))).all() if ids else []
+
+
+def execute_with_stats(state: ORMExecuteState, execute: Callable[[], Optional[Result]]) -> Optional[Result]:
+    """`do_orm_execute`事件: 执行修改文章的语句,按执行前后受影响文章的变化追加统计变化量.
+    `execute`为同一事件中的其他处理,返回None时直接执行语句.
+    """
+    if not (state.is_insert or state.is_update or state.is_delete):
+        return execute()
+    if getattr(state.statement.table, "name", None) != Article.__tablename__:
+        return execute()
+    session: Session = state.session
+    connection = session.connection()
+    deltas = StatDeltas()
+    ids: List[int] = []
+    if not state.is_insert:
+        ids = list(connection.scalars(select(Article.id).where(state.statement.whereclause)))
+        deltas.add_rows(_article_rows(connection, ids), -1)
+    result = execute()
+    if result is None:
+        result = state.invoke_statement()
+    if state.is_update:
+        deltas.add_rows(_article_rows(connection, ids), 1)
+    elif state.is_insert:
+        try:
+            ids = [row[0] for row in result.inserted_primary_key_rows]
+        except (AttributeError, InvalidRequestError):  # ORM批量插入等不返回主键
+            ids = [None]
+        if None in ids:
+            deltas.rebuild = True
+        else:
+            deltas.add_rows(_article_rows(connection, ids), 1)
+    deltas.apply(connection)
+    return result
+
+
+def _group_counts(connection: Connection) -> Dict[Tuple[str, str], int]:
+    """分组统计文章表,只在重建时执行"""
+    counts: Dict[Tuple[str, str], int] = defaultdict(int)
+    day = func.date(Article.create_time)
+    for status, category_id, create_date, count in connection.execute(
+        select(Article.status, Article.category_id, day, func.count()).group_by(Article.status, Article.category_id, day)
+    ):
+        # `date()`在SQLite中返回字符串
+        create_time = datetime.datetime.fromisoformat(str(create_date)) if create_date is not None else None
+        for bucket in article_buckets(status, category_id, create_time):
+            counts[bucket] += count
+    return counts
+
+
+def _last_delta_id(connection: Connection) -> Optional[int]:
+    return connection.scalar(select(func.max(ArticleStatDelta.id)))
+
+
+def _version_clause():
+    return (ArticleStat.dimension == VERSION[0]) & (ArticleStat.bucket == VERSION[1])
+
+
+def rebuild(connection: Connection) -> None:
+    """重新统计全部文章,清空汇总表与已有的变化量"""
+    last = _last_delta_id(connection) or 0
+    connection.execute(delete(ArticleStat))
+    connection.execute(delete(ArticleStatDelta).where(ArticleStatDelta.id <= last))
+    values = [{"dimension": key[0], "bucket": key[1], "count": count} for key, count in _group_counts(connection).items()]
+    values.append({"dimension": VERSION[0], "bucket": VERSION[1], "count": 0})
+    connection.execute(insert(ArticleStat), values)
+
+
+def compact(connection: Connection) -> int:
+    """将变化量合并到汇总表,返回合并的变化量数量.在同一事务中执行"""
+    version = connection.scalar(select(ArticleStat.count).where(_version_clause()))
+    if version is None:
+        # 汇总表未初始化
+        rebuild(connection)
+        return 0
+    last = _last_delta_id(connection)
+    if last is None:
+        return 0
+    # 条件更新版本号,其他进程已合并时不再执行
+    result = connection.execute(
+        update(ArticleStat).where(_version_clause(), ArticleStat.count == version).values(count=version + 1)
+    )
+    if result.rowcount != 1:
+        return 0
+    pending = ArticleStatDelta.id <= last
+    merged = connection.scalar(select(func.count()).where(pending))
+    if connection.scalar(select(ArticleStatDelta.id).where(pending, ArticleStatDelta.dimension == REBUILD).limit(1)):
+        rebuild(connection)
+        return merged
+    groups = connection.execute(
+        select(ArticleStatDelta.dimension, ArticleStatDelta.bucket, func.sum(ArticleStatDelta.delta))
+        .where(pending)
+        .group_by(ArticleStatDelta.dimension, ArticleStatDelta.bucket)
+    ).all()
+    for dimension, bucket, delta in groups:
+        if not delta:
+            continue
+        row = (ArticleStat.dimension == dimension) & (ArticleStat.bucket == bucket)
+        updated = connection.execute(update(ArticleStat).where(row).values(count=ArticleStat.count + delta))
+        if updated.rowcount == 0:
+            connection.execute(insert(ArticleStat).values(dimension=dimension, bucket=bucket, count=delta))
+    connection.execute(delete(ArticleStatDelta).where(pending))
+    connection.execute(delete(ArticleStat).where(ArticleStat.dimension.in_(DIMENSIONS), ArticleStat.count == 0))
+    return merged
+
+
+class ArticleStats(NamedTuple):
+    status: List[Tuple[str, int]]  # (状态名称, 数量)
+    category: List[Tuple[str, int]]  # (分类名称, 数量),按数量倒序
+    day: List[Tuple[str, int]]  # (日期, 数量),包含没有文章的日期
+
+    @property
+    def total(self) -> int:
+        return sum(count for _, count in self.status)
+
+
+def read_stats(connection: Connection, days: int = 30, today: Optional[datetime.date] = None) -> ArticleStats:
+    """读取统计结果: 汇总表加上未合并的变化量.只读取汇总行,与文章数量无关;日期只读取最近`days`天"""
+    today = today or datetime.datetime.utcnow().date()
+    since = (today - datetime.timedelta(days=days - 1)).isoformat()
+
+    def recent(model):
+        return model.dimension.in_(DIMENSIONS), or_(model.dimension != "day", model.bucket >= since)
+
+    stats = select(ArticleStat.dimension, ArticleStat.bucket, ArticleStat.count).where(*recent(ArticleStat))
+    pending = (
+        select(ArticleStatDelta.dimension, ArticleStatDelta.bucket, func.sum(ArticleStatDelta.delta))
+        .where(*recent(ArticleStatDelta))
+        .group_by(ArticleStatDelta.dimension, ArticleStatDelta.bucket)
+    )
+    counts: Dict[str, Dict[str, int]] = {dimension: defaultdict(int) for dimension in DIMENSIONS}
+    # 同一条语句读取,避免与合并事务交错时重复或遗漏
+    for dimension, bucket, count in connection.execute(union_all(stats, pending)):
+        counts[dimension][bucket] += count or 0
+    category_ids = [int(bucket) for bucket, count in counts["category"].items() if bucket and count]
+    names = dict(connection.execute(select(Category.id, Category.name).where(Category.id.in_(category_ids))).all())
+    category = [
+        (names.get(int(bucket), bucket) if bucket else "未分类", count) for bucket, count in counts["category"].items() if count
+    ]
+    category.sort(key=lambda item: -item[1])
+    dates = [(today - datetime.timedelta(days=i)).isoformat() for i in range(days - 1, -1, -1)]
+    return ArticleStats(
+        status=[(status.label, counts["status"].get(str(status.value), 0)) for status in ArticleStatus],
+        category=category,
+        day=[(date, counts["day"].get(date, 0)) for date in dates],
+    )
+
+
+class StatsCompactor:
+    """定时合并统计变化量.`interval`为0时不执行"""
+
+    def __init__(self, db: AsyncDatabase, interval: float = 60):
+        self.db = db
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def compact(self) -> int:
+        return await self.db.async_run_sync(compact, is_session=False)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                merged = await self.compact()
+                if merged:
+                    logger.debug("compacted %s stat deltas", merged)
+            except Exception:  # 例如多个进程同时合并时数据库锁定,下次重试
+                logger.exception("compact article stats failed")
+
+    async def start(self) -> None:
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+def main():
+    from core.globals import sync_db
+
+    with sync_db.engine.begin() as connection:
+        rebuild(connection)
+        total = connection.scalar(select(func.count()).select_from(ArticleStat)) - 1
+        print(f"rebuilt {total} article stats")
+
+
+if __name__ == "__main__":
+    main()
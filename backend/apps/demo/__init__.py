@@ -3,4 +3,9 @@ from fastapi import FastAPI
 
 def setup(app: FastAPI):
     # 1. 导入管理应用
+    # 2. 启动时预编译模板
+    from core.templates import precompile
+
     from . import admin
+
+    app.add_event_handler("startup", lambda: precompile(admin.DemoJinja2Admin.templates))
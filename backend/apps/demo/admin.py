@@ -3,6 +3,8 @@ import time
 from typing import Any, Dict, Optional
 
 from core.globals import site
+from core.page_cache import PageCacheAdmin, RegistryVersionAdminApp
+from core.templates import create_templates
 from fastapi_amis_admin import admin
 from fastapi_amis_admin.admin import AdminApp
 from fastapi_amis_admin.admin.site import APIDocsApp
@@ -44,7 +46,7 @@ class GitHubLinkAdmin(admin.LinkAdmin):
 
 
 @site.register_admin
-class AmisPageApp(admin.AdminApp):
+class AmisPageApp(PageCacheAdmin, RegistryVersionAdminApp):
     page_schema = PageSchema(label="AmisPage", icon="fa fa-link", tabsMode=TabsModeEnum.radio)
 
     def __init__(self, app: "AdminApp"):
@@ -56,10 +58,11 @@ class AmisPageApp(admin.AdminApp):
         )
 
 
-class HelloWorldPageAdmin(admin.PageAdmin):
+class HelloWorldPageAdmin(PageCacheAdmin, admin.PageAdmin):
     page_schema = PageSchema(label="HelloWorld", icon="fa fa-link")
     # 通过page类属性直接配置页面信息;
     # Page组件支持属性参考: https://baidu.gitee.io/amis/zh-CN/components/page
+    # 静态页面通过PageCacheAdmin缓存渲染结果,支持ETag/304
     page = Page(title="标题", body="Hello World!")
 
 
@@ -104,7 +107,7 @@ class UserRegFormAdmin(admin.FormAdmin):
 
 
 @site.register_admin
-class TemplatePageApp(admin.AdminApp):
+class TemplatePageApp(PageCacheAdmin, RegistryVersionAdminApp):
     page_schema = PageSchema(label="TemplatePage", icon="fa fa-link", tabsMode=TabsModeEnum.chrome)
 
     def __init__(self, app: "AdminApp"):
@@ -116,7 +119,8 @@ class TemplatePageApp(admin.AdminApp):
 
 
 class DemoJinja2Admin(admin.TemplateAdmin):
-    templates: Jinja2Templates = Jinja2Templates(directory="apps/demo/templates")
+    # 字节码缓存,生产环境不检查模板修改,启动时预编译.见`core/templates.py`
+    templates: Jinja2Templates = create_templates(directory="apps/demo/templates")
 
 
 class SimpleTemplateAdmin(DemoJinja2Admin):
@@ -127,7 +131,9 @@ class SimpleTemplateAdmin(DemoJinja2Admin):
         return {"current_time": datetime.datetime.now()}
 
 
-class ElementTemplateAdmin(DemoJinja2Admin):
+class ElementTemplateAdmin(PageCacheAdmin, DemoJinja2Admin):
+    """静态模板页面: 缓存渲染结果"""
+
     page_schema = PageSchema(label="ElementUI", icon="fa fa-link")
     template_name = "element.html"
 
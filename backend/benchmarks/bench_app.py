@@ -0,0 +1,209 @@
+"""博客应用接口压测: 在进程内通过ASGI调用`main.app`,统计各接口的吞吐量与延迟分位数,输出JSON报告.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_app --articles 10000 --requests 500 --concurrency 10 --output report.json
+    # 使用已生成的数据库,并与上次的报告对比
+    python -m benchmarks.bench_app --db bench.db --reuse --baseline report.json --output report2.json
+
+注意: 数据库连接通过环境变量`DATABASE_URL`/`DATABASE_URL_ASYNC`配置,必须在导入`main`之前设置.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+from sqlalchemy import create_engine
+
+from benchmarks.seed import seed
+
+
+class Case(NamedTuple):
+    """压测用例.`request`根据随机数生成器返回请求参数"""
+
+    name: str
+    request: Callable[[random.Random], Dict[str, Any]]
+
+
+def get_cases(articles: int) -> List[Case]:
+    def random_id(rand: random.Random) -> int:
+        return rand.randint(1, articles)
+
+    admin = "/admin/BlogApp/ArticleAdmin"
+    list_url = f"{admin}/list?page=1&perPage=10"
+    deep_list_url = f"{admin}/list?page={max(articles // 20, 1)}&perPage=10"
+    return [
+        # 后台管理页面
+        Case("admin_site_html", lambda r: {"method": "GET", "url": "/admin/"}),
+        Case("admin_site_json", lambda r: {"method": "POST", "url": "/admin/"}),
+        Case("admin_article_page", lambda r: {"method": "POST", "url": admin}),
+        # 统计页面: 只读取汇总表,耗时与文章数量无关
+        Case("admin_stats_page", lambda r: {"method": "POST", "url": "/admin/BlogApp/page/ArticleStatsAdmin"}),
+        # 模型管理列表: 分页,深分页,筛选,搜索
+        Case("admin_list", lambda r: {"method": "POST", "url": list_url, "json": {}}),
+        Case("admin_list_deep", lambda r: {"method": "POST", "url": deep_list_url, "json": {}}),
+        Case("admin_filter_status", lambda r: {"method": "POST", "url": list_url, "json": {"status": r.randint(0, 3)}}),
+        Case("admin_filter_category", lambda r: {"method": "POST", "url": list_url, "json": {"category_id": r.randint(1, 20)}}),
+        Case("admin_search", lambda r: {"method": "POST", "url": list_url, "json": {"title": f"[~]article {random_id(r)}"}}),
+        # 自定义动作
+        Case(
+            "admin_test_action",
+            lambda r: {
+                "method": "POST",
+                "url": f"{admin}/TestAction/api?item_id={random_id(r)},{random_id(r)}",
+                "json": {"username": "bench", "password": "bench"},
+            },
+        ),
+        # 文章接口
+        Case("api_read", lambda r: {"method": "GET", "url": f"/articles/read/{random_id(r)}"}),
+        Case("api_read_expand", lambda r: {"method": "GET", "url": f"/articles/read2/{random_id(r)}?expand=true"}),
+        Case("api_read3", lambda r: {"method": "GET", "url": f"/articles/read3/{random_id(r)}"}),
+        Case("api_list", lambda r: {"method": "GET", "url": "/articles/list2?limit=20"}),
+        Case("api_list_expand", lambda r: {"method": "GET", "url": "/articles/list3?limit=20&expand=true"}),
+    ]
+
+
+def percentile(values: List[float], p: float) -> float:
+    """最近秩分位数,`values`已排序"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(p / 100 * len(values)) - 1))]
+
+
+def is_api_error(response: httpx.Response) -> bool:
+    """后台管理接口(`BaseApiOut`)出错时HTTP状态码仍为200,通过`status`字段判断"""
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return False
+    body = response.json()
+    return isinstance(body, dict) and "msg" in body and body.get("status", 0) != 0
+
+
+async def run_case(client: httpx.AsyncClient, case: Case, requests: int, concurrency: int, warmup: int, seed_: int) -> dict:
+    rand = random.Random(seed_)
+    for _ in range(warmup):
+        await client.request(**case.request(rand))
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await client.request(**case.request(rand))
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400 or is_api_error(response):
+                errors += 1
+
+    begin = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    seconds = time.perf_counter() - begin
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(seconds, 4),
+        "rps": round(requests / seconds, 2),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, dict]:
+    from main import app  # 导入时读取数据库环境变量
+
+    cases = [case for case in get_cases(args.articles) if not args.cases or case.name in args.cases]
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for case in cases:
+                results[case.name] = await run_case(client, case, args.requests, args.concurrency, args.warmup, args.seed)
+                result = results[case.name]
+                print(
+                    f"{case.name:<24} {result['rps']:>10.1f} req/s  p50 {result['p50_ms']:>8.2f}ms  "
+                    f"p99 {result['p99_ms']:>8.2f}ms  errors {result['errors']}"
+                )
+    return results
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict, results: Dict[str, dict]) -> None:
+    """与基准报告对比吞吐量与p99延迟"""
+    print(f"\ncompare with {baseline['meta'].get('revision')} ({baseline['meta'].get('time')})")
+    for name, result in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        rps = (result["rps"] / base["rps"] - 1) * 100 if base["rps"] else 0
+        p99 = (result["p99_ms"] / base["p99_ms"] - 1) * 100 if base["p99_ms"] else 0
+        print(f"{name:<24} rps {rps:>+7.1f}%  p99 {p99:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="博客应用接口压测")
+    parser.add_argument("--db", default=None, help="SQLite数据库文件,默认使用临时文件")
+    parser.add_argument("--reuse", action="store_true", help="数据库文件已存在时不再生成数据")
+    parser.add_argument("--articles", type=int, default=10000, help="文章数量,建议10000~1000000")
+    parser.add_argument("--requests", type=int, default=500, help="每个用例的请求数量")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--warmup", type=int, default=20, help="每个用例的预热请求数量,不计入统计")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--cases", nargs="*", help="只运行指定的用例")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    parser.add_argument("--baseline", default=None, help="用于对比的JSON报告文件")
+    args = parser.parse_args()
+
+    path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(), "bench_app.db"))
+    if not (args.reuse and os.path.exists(path)):
+        if os.path.exists(path):
+            os.remove(path)
+        begin = time.perf_counter()
+        seed(create_engine(f"sqlite:///{path}"), articles=args.articles, random_seed=args.seed)
+        print(f"seeded {args.articles} articles in {time.perf_counter() - begin:.2f}s")
+    os.environ.update(
+        DATABASE_URL=f"sqlite:///{path}?check_same_thread=False",
+        DATABASE_URL_ASYNC=f"sqlite+aiosqlite:///{path}?check_same_thread=False",
+        DEBUG="false",
+    )
+    os.environ.setdefault("ALLOW_ORIGINS", "[]")
+    results = asyncio.run(run(args))
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "articles": args.articles,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""批量修改文章状态的SQL查询次数与耗时,对比逐行加载ORM对象修改与集合操作(`apps/blog/bulk.py`).
+两种方式都经过事件维护分类与标签的文章数量,文章统计与文章缓存.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_bulk --articles 20000 --selected 10000
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import List
+
+from apps.blog import events  # noqa: F401 注册事件
+from apps.blog.bulk import BulkModelAction, update_articles
+from apps.blog.counters import reconcile
+from apps.blog.models import Article, ArticleStatus, Category, Tag
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from sqlmodel import SQLModel
+
+from benchmarks.bench_eager_loading import count_queries
+from benchmarks.seed import seed
+
+
+def update_rows(session: Session, item_id: List[int], status: ArticleStatus) -> None:
+    """逐行修改: 加载文章对象后修改,flush时逐行执行`UPDATE`"""
+    for article in session.scalars(select(Article).where(Article.id.in_(item_id))):
+        article.status = status
+    session.flush()
+
+
+def run(engine: Engine, item_id: List[int], status: ArticleStatus, bulk: bool, chunk_size: int) -> int:
+    """修改选中文章的状态,返回查询次数"""
+    with Session(engine) as session, count_queries(engine) as statements:
+        for offset in range(0, len(item_id), chunk_size):
+            chunk = item_id[offset : offset + chunk_size]
+            if bulk:
+                update_articles(session, chunk, {"status": status})
+            else:
+                update_rows(session, chunk, status)
+        session.commit()
+    return len(statements)
+
+
+def counters(engine: Engine) -> tuple:
+    with engine.connect() as connection:
+        return (
+            connection.execute(select(Category.id, Category.article_count).order_by(Category.id)).all(),
+            connection.execute(select(Tag.id, Tag.article_count).order_by(Tag.id)).all(),
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章批量操作测试")
+    parser.add_argument("--articles", type=int, default=20000, help="文章数量")
+    parser.add_argument("--selected", type=int, default=10000, help="选中的文章数量")
+    parser.add_argument("--chunk-size", type=int, default=BulkModelAction.bulk_chunk_size, help="每批数量")
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), "bench_bulk.db")
+    engine = create_engine(f"sqlite:///{path}")
+    seed(engine, articles=args.articles)
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        reconcile(connection)
+    item_id = list(range(1, min(args.selected, args.articles) + 1))
+    for bulk, status in ((False, ArticleStatus.disabled), (True, ArticleStatus.published)):
+        begin = time.perf_counter()
+        queries = run(engine, item_id, status, bulk, args.chunk_size)
+        name = "bulk" if bulk else "orm"
+        print(f"{name:<6}{len(item_id):>8} articles{queries:>8} queries{(time.perf_counter() - begin) * 1000:>10.2f} ms")
+    # 两种方式维护的文章数量与重新统计的结果一致
+    maintained = counters(engine)
+    with engine.begin() as connection:
+        reconcile(connection)
+    if counters(engine) != maintained:
+        raise SystemExit("article counters differ from a full recount")
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""统计文章列表加载分类与标签时的SQL查询次数与耗时,对比懒加载与预加载.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_eager_loading --articles 1000 --page-size 100
+"""
+import argparse
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import Iterator, List
+
+from apps.blog.loaders import article_load_options
+from apps.blog.models import Article
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from benchmarks.seed import seed
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[List[str]]:
+    """记录期间执行的SQL语句"""
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def load_page(engine: Engine, page_size: int, eager: bool) -> int:
+    """加载一页文章并访问分类与标签,返回查询次数"""
+    stmt = select(Article).order_by(*Article.keyset_fields()).limit(page_size)
+    if eager:
+        stmt = stmt.options(*article_load_options())
+    with Session(engine) as session, count_queries(engine) as statements:
+        for article in session.scalars(stmt):
+            _ = article.category, list(article.tags)
+    return len(statements)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章关联预加载查询次数测试")
+    parser.add_argument("--articles", type=int, default=1000, help="文章数量")
+    parser.add_argument("--page-size", type=int, default=100, help="每页数量")
+    args = parser.parse_args()
+    path = os.path.join(tempfile.mkdtemp(), "bench_eager_loading.db")
+    engine = create_engine(f"sqlite:///{path}")
+    seed(engine, articles=args.articles)
+    counts = {}
+    for eager in (False, True):
+        begin = time.perf_counter()
+        counts[eager] = load_page(engine, args.page_size, eager)
+        name = "selectinload" if eager else "lazy"
+        print(f"{name:<14}{counts[eager]:>6} queries{(time.perf_counter() - begin) * 1000:>10.2f} ms")
+    # 预加载: 文章,分类,标签各一条查询,与每页数量无关
+    if counts[True] != 3 or load_page(engine, 1, eager=True) != counts[True]:
+        raise SystemExit(f"eager loading should take a fixed number of queries, got {counts[True]}")
+    engine.dispose()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""导入耗时测试: 在新进程中通过`python -X importtime -c "import main"`统计`main`的导入耗时,输出JSON报告.
+`main`的自身耗时(self)为模块级代码的执行耗时,包含安装应用与挂载后台管理系统(注册路由).
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_importtime --runs 5 --output importtime.json
+    # 与上次的报告对比
+    python -m benchmarks.bench_importtime --baseline importtime.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List, Tuple
+
+from benchmarks.bench_app import git_revision
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)")
+
+
+def parse(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """模块: (自身耗时, 累计耗时),单位微秒"""
+    modules = {}
+    for line in stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            modules[match.group(4)] = (int(match.group(1)), int(match.group(2)))
+    return modules
+
+
+def run_once(env: Dict[str, str]) -> Dict[str, Tuple[int, int]]:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], env=env, capture_output=True, text=True, check=True
+    )
+    return parse(result.stderr)
+
+
+def summarize(samples: List[Dict[str, Tuple[int, int]]], top: int) -> dict:
+    def median_ms(name: str, index: int) -> float:
+        return round(statistics.median(sample.get(name, (0, 0))[index] for sample in samples) / 1000, 2)
+
+    modules = {name for sample in samples for name in sample}
+    self_ms = {name: median_ms(name, 0) for name in modules}
+    return {
+        "main_total_ms": median_ms("main", 1),
+        "main_self_ms": median_ms("main", 0),
+        "apps_ms": round(sum(ms for name, ms in self_ms.items() if name == "apps" or name.startswith("apps.")), 2),
+        "core_ms": round(sum(ms for name, ms in self_ms.items() if name == "core" or name.startswith("core.")), 2),
+        "top_self_ms": dict(sorted(self_ms.items(), key=lambda item: -item[1])[:top]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入耗时测试")
+    parser.add_argument("--runs", type=int, default=5, help="导入次数,结果取中位数")
+    parser.add_argument("--top", type=int, default=15, help="输出自身耗时最长的模块数量")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    parser.add_argument("--baseline", default=None, help="用于对比的JSON报告文件")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_importtime.db")
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}?check_same_thread=False",
+        "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{path}?check_same_thread=False",
+        "DEBUG": "false",
+    }
+    env.setdefault("ALLOW_ORIGINS", "[]")
+    run_once(env)  # 预热: 生成字节码缓存
+    result = summarize([run_once(env) for _ in range(args.runs)], args.top)
+    for key in ("main_total_ms", "main_self_ms", "apps_ms", "core_ms"):
+        print(f"{key:<16} {result[key]:>10.1f}")
+    for name, ms in result["top_self_ms"].items():
+        print(f"  {ms:>10.1f}  {name}")
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+        },
+        "results": result,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        print(f"\ncompare with {baseline['meta'].get('revision')} ({baseline['meta'].get('time')})")
+        for key in ("main_total_ms", "main_self_ms", "apps_ms", "core_ms"):
+            base = baseline["results"].get(key)
+            if base:
+                print(f"{key:<16} {base:>10.1f} -> {result[key]:>10.1f}  {(result[key] / base - 1) * 100:>+7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""对比文章表索引添加前后的查询计划与耗时.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_indexes --articles 200000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+from apps.blog.models import Article, ArticleStatus, ArticleTagLink, Category
+from apps.blog.pagination import keyset_clause
+from sqlalchemy import create_engine, func, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from benchmarks.seed import seed
+
+# 本次新增的索引
+INDEXES = [index for table in (Article.__table__, ArticleTagLink.__table__) for index in table.indexes]
+
+
+def hot_queries(conn: Connection) -> Dict[str, Callable]:
+    """业务中的高频查询"""
+    published = ArticleStatus.published.value
+    deep = conn.execute(
+        select(Article.create_time, Article.id).where(Article.status == published).order_by(Article.create_time, Article.id)
+    ).all()[-100]
+    return {
+        # /articles/list* 第一页
+        "list_published": select(Article.id, Article.title)
+        .where(Article.status == published)
+        .order_by(Article.create_time, Article.id)
+        .limit(10),
+        # /articles/list* 深度翻页(游标)
+        "list_published_deep": select(Article.id, Article.title)
+        .where(Article.status == published, keyset_clause(Article.keyset_fields(), deep))
+        .order_by(Article.create_time, Article.id)
+        .limit(10),
+        # ArticleAdmin 列表: 关联分类,按创建时间排序
+        "admin_list": select(Article.id, Article.title, Category.name)
+        .select_from(Article)
+        .outerjoin(Category)
+        .order_by(Article.create_time, Article.id)
+        .limit(10),
+        # 按分类过滤统计
+        "count_by_category": select(func.count()).select_from(Article).where(Article.category_id == 3),
+        # 文章标签关联
+        "tags_of_articles": select(ArticleTagLink.tag_id).where(ArticleTagLink.article_id.in_(list(range(1000, 1100)))),
+    }
+
+
+def explain(conn: Connection, stmt) -> str:
+    compiled = stmt.compile(conn, compile_kwargs={"render_postcompile": True})
+    params = tuple(compiled.params[name] for name in compiled.positiontup)
+    return "; ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled.string}", params))
+
+
+def measure(conn: Connection, stmt, repeat: int) -> float:
+    """返回中位数耗时(毫秒)"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        conn.execute(stmt).all()
+        timings.append((time.perf_counter() - begin) * 1000)
+    return statistics.median(timings)
+
+
+def run(engine: Engine, label: str, repeat: int) -> Dict[str, float]:
+    print(f"\n== {label}")
+    result = {}
+    with engine.connect() as conn:
+        for name, stmt in hot_queries(conn).items():
+            result[name] = measure(conn, stmt, repeat)
+            print(f"{name:<22}{result[name]:>10.3f} ms   {explain(conn, stmt)}")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文章表索引基准测试")
+    parser.add_argument("--articles", type=int, default=100000, help="文章数量")
+    parser.add_argument("--repeat", type=int, default=20, help="每个查询执行次数")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        seed(engine, articles=args.articles)
+        with engine.begin() as conn:
+            for index in INDEXES:
+                index.drop(conn)
+        before = run(engine, "before: without indexes", args.repeat)
+        with engine.begin() as conn:
+            for index in INDEXES:
+                index.create(conn)
+            conn.execute(text("ANALYZE"))
+        after = run(engine, "after: with indexes", args.repeat)
+        print("\n== speedup")
+        for name in before:
+            print(f"{name:<22}{before[name] / after[name]:>9.1f}x")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
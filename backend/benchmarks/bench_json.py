@@ -0,0 +1,115 @@
+"""JSON响应测试: 分别在关闭与开启`Settings.fast_json`时请求大页列表接口,对比吞吐量与延迟,输出JSON报告.
+每种模式在新进程中运行(管理类路由在注册时确定是否使用快速路径),文章接口的响应缓存关闭.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_json --articles 10000 --requests 300 --output json.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+
+from benchmarks.bench_app import Case, git_revision, run_case
+from benchmarks.seed import seed
+
+MODES = {"default": "false", "fast_json": "true"}
+
+
+def get_cases(per_page: int) -> List[Case]:
+    admin = "/admin/BlogApp"
+    articles, tags = f"{admin}/ArticleAdmin/list?perPage={per_page}", f"{admin}/TagAdmin/list?perPage={per_page}"
+    limit = min(per_page, 100)
+    return [
+        Case("admin_article_list", lambda r: {"method": "POST", "url": articles, "json": {}}),
+        Case("admin_tag_list", lambda r: {"method": "POST", "url": tags, "json": {}}),
+        Case("api_list", lambda r: {"method": "GET", "url": f"/articles/list2?limit={limit}"}),
+        Case("api_list_expand", lambda r: {"method": "GET", "url": f"/articles/list3?limit={limit}&expand=true"}),
+    ]
+
+
+async def measure(args: argparse.Namespace) -> Dict[str, dict]:
+    """在当前进程中测量,由子进程执行"""
+    import httpx
+    from apps.blog.cache import article_cache
+    from main import app
+
+    article_cache.enabled = False
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for case in get_cases(args.per_page):
+                results[case.name] = await run_case(client, case, args.requests, args.concurrency, args.warmup, args.seed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON响应测试")
+    parser.add_argument("--db", default=None, help="SQLite数据库文件,默认使用临时文件")
+    parser.add_argument("--reuse", action="store_true", help="数据库文件已存在时不再生成数据")
+    parser.add_argument("--articles", type=int, default=10000, help="文章数量")
+    parser.add_argument("--per-page", type=int, default=100, help="每页数量")
+    parser.add_argument("--requests", type=int, default=300, help="每个用例的请求数量")
+    parser.add_argument("--concurrency", type=int, default=4, help="并发数")
+    parser.add_argument("--warmup", type=int, default=10, help="每个用例的预热请求数量,不计入统计")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(), "bench_json.db"))
+    if not (args.reuse and os.path.exists(path)):
+        if os.path.exists(path):
+            os.remove(path)
+        seed(create_engine(f"sqlite:///{path}"), articles=args.articles, random_seed=args.seed)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}?check_same_thread=False",
+        "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{path}?check_same_thread=False",
+        "DEBUG": "false",
+    }
+    env.setdefault("ALLOW_ORIGINS", "[]")
+
+    command = [sys.executable, "-m", "benchmarks.bench_json", "--child", *sys.argv[1:]]
+    results = {}
+    for mode, value in MODES.items():
+        output = subprocess.check_output(command, env={**env, "FAST_JSON": value}, text=True)
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    for name, base in results["default"].items():
+        fast = results["fast_json"][name]
+        print(
+            f"{name:<20} rps {base['rps']:>9.1f} -> {fast['rps']:>9.1f} ({(fast['rps'] / base['rps'] - 1) * 100:>+6.1f}%)  "
+            f"p50 {base['p50_ms']:>8.2f} -> {fast['p50_ms']:>8.2f}ms  errors {base['errors']}/{fast['errors']}"
+        )
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "articles": args.articles,
+            "per_page": args.per_page,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "orjson": subprocess.call([sys.executable, "-c", "import orjson"], stderr=subprocess.DEVNULL) == 0,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
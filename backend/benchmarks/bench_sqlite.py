@@ -0,0 +1,130 @@
+"""SQLite性能配置测试: 分别在关闭配置,只设置PRAGMA,设置PRAGMA并启用写入队列时,并发执行读写混合请求,
+对比吞吐量,延迟与错误数(例如"database is locked"),输出JSON报告.
+每种模式在新进程中运行,使用同一份生成数据的副本(WAL模式保存在数据库文件中),文章接口的响应缓存关闭.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_sqlite --articles 10000 --requests 1000 --concurrency 20 --output sqlite.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+
+from benchmarks.bench_app import Case, git_revision, run_case
+from benchmarks.seed import seed
+
+MODES = {
+    "default": {"SQLITE_PROFILE": "false"},
+    "pragmas": {"SQLITE_PROFILE": "true", "SQLITE_WRITE_QUEUE": "false"},
+    "pragmas_queue": {"SQLITE_PROFILE": "true", "SQLITE_WRITE_QUEUE": "true"},
+}
+
+
+def get_cases(articles: int, write_ratio: float) -> List[Case]:
+    admin = "/admin/BlogApp/ArticleAdmin"
+
+    def read(r):
+        if r.random() < 0.5:
+            return {"method": "GET", "url": f"/articles/read/{r.randint(1, articles)}"}
+        return {"method": "GET", "url": "/articles/list2?limit=20"}
+
+    def write(r):
+        # 修改文章状态与分类: 经过ORM事件维护分类与标签的文章数量,文章统计
+        data = {"status": r.randint(0, 3), "category_id": r.randint(1, 20)}
+        return {"method": "PUT", "url": f"{admin}/item/{r.randint(1, articles)}", "json": data}
+
+    return [
+        Case("read", read),
+        Case("mixed", lambda r: write(r) if r.random() < write_ratio else read(r)),
+        Case("write", write),
+    ]
+
+
+async def measure(args: argparse.Namespace) -> Dict[str, dict]:
+    """在当前进程中测量,由子进程执行"""
+    import httpx
+    from apps.blog.cache import article_cache
+    from main import app
+
+    article_cache.enabled = False
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for case in get_cases(args.articles, args.write_ratio):
+                results[case.name] = await run_case(client, case, args.requests, args.concurrency, args.warmup, args.seed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite性能配置测试")
+    parser.add_argument("--articles", type=int, default=10000, help="文章数量")
+    parser.add_argument("--requests", type=int, default=1000, help="每个用例的请求数量")
+    parser.add_argument("--concurrency", type=int, default=20, help="并发数")
+    parser.add_argument("--write-ratio", type=float, default=0.2, help="混合用例中写请求的比例")
+    parser.add_argument("--warmup", type=int, default=10, help="每个用例的预热请求数量,不计入统计")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args))))
+        return
+
+    directory = tempfile.mkdtemp()
+    template = os.path.join(directory, "template.db")
+    seed(create_engine(f"sqlite:///{template}"), articles=args.articles, random_seed=args.seed)
+    command = [sys.executable, "-m", "benchmarks.bench_sqlite", "--child", *sys.argv[1:]]
+    results = {}
+    for mode, mode_env in MODES.items():
+        path = os.path.join(directory, f"{mode}.db")
+        shutil.copyfile(template, path)
+        env = {
+            **os.environ,
+            **mode_env,
+            "DATABASE_URL": f"sqlite:///{path}?check_same_thread=False",
+            "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{path}?check_same_thread=False",
+            "DEBUG": "false",
+            "STATS_COMPACT_INTERVAL": "0",
+        }
+        env.setdefault("ALLOW_ORIGINS", "[]")
+        output = subprocess.check_output(command, env=env, text=True)
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+    for name in results["default"]:
+        print(name)
+        for mode, result in results.items():
+            case = result[name]
+            print(
+                f"  {mode:<14} rps {case['rps']:>9.1f}  p50 {case['p50_ms']:>8.2f}ms  "
+                f"p99 {case['p99_ms']:>9.2f}ms  errors {case['errors']}"
+            )
+    shutil.rmtree(directory, ignore_errors=True)
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "articles": args.articles,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "write_ratio": args.write_ratio,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""启动耗时测试: 每次在新进程中导入`main`并启动应用,统计导入耗时,启动事件耗时与首个请求耗时,输出JSON报告.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_startup --runs 5 --output startup.json
+    # 与上次的报告对比
+    python -m benchmarks.bench_startup --baseline startup.json
+
+`--modes`对应`Settings.db_schema`: `create_all`每次启动检查并创建数据表,`check`只比较Alembic迁移版本.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from sqlalchemy import create_engine
+
+from benchmarks.bench_app import git_revision
+from benchmarks.seed import seed
+
+FIRST_REQUEST = "/articles/list2?limit=20"
+STEPS = ("import_ms", "startup_ms", "first_request_ms", "total_ms")
+
+
+def measure() -> Dict[str, float]:
+    """在当前进程中测量,由子进程执行"""
+    begin = time.perf_counter()
+    from main import app
+
+    imported = time.perf_counter()
+
+    async def run():
+        import httpx
+
+        async with app.router.lifespan_context(app):
+            started = time.perf_counter()
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                response = await client.get(FIRST_REQUEST)
+                response.raise_for_status()
+            return started, time.perf_counter()
+
+    started, responded = asyncio.run(run())
+    return {
+        "import_ms": (imported - begin) * 1000,
+        "startup_ms": (started - imported) * 1000,
+        "first_request_ms": (responded - started) * 1000,
+        "total_ms": (responded - begin) * 1000,
+    }
+
+
+def run_mode(mode: str, runs: int, env: Dict[str, str]) -> dict:
+    samples: List[Dict[str, float]] = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-m", "benchmarks.bench_startup", "--child"], env={**env, "DB_SCHEMA": mode}, text=True
+        )
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {step: round(statistics.median(sample[step] for sample in samples), 2) for step in STEPS}
+
+
+def compare(baseline: dict, results: Dict[str, dict]) -> None:
+    print(f"\ncompare with {baseline['meta'].get('revision')} ({baseline['meta'].get('time')})")
+    for mode, result in results.items():
+        base = baseline["results"].get(mode)
+        if not base:
+            continue
+        changes = "  ".join(f"{step} {(result[step] / base[step] - 1) * 100:>+7.1f}%" for step in STEPS if base.get(step))
+        print(f"{mode:<12} {changes}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="启动耗时测试")
+    parser.add_argument("--db", default=None, help="SQLite数据库文件,默认使用临时文件")
+    parser.add_argument("--articles", type=int, default=1000, help="文章数量")
+    parser.add_argument("--runs", type=int, default=5, help="每种模式的启动次数,结果取中位数")
+    parser.add_argument("--modes", nargs="+", default=["create_all", "check"], help="启动时的数据库结构处理模式")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    parser.add_argument("--baseline", default=None, help="用于对比的JSON报告文件")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        print(json.dumps(measure()))
+        return
+
+    path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(), "bench_startup.db"))
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}?check_same_thread=False",
+        "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{path}?check_same_thread=False",
+        "DEBUG": "false",
+    }
+    env.setdefault("ALLOW_ORIGINS", "[]")
+    if not os.path.exists(path):
+        # 通过迁移创建数据库结构,`check`模式要求数据库版本为最新
+        subprocess.check_call([sys.executable, "-m", "alembic", "upgrade", "head"], env=env)
+        seed(create_engine(f"sqlite:///{path}"), articles=args.articles)
+
+    results = {}
+    for mode in args.modes:
+        results[mode] = result = run_mode(mode, args.runs, env)
+        print(f"{mode:<12} " + "  ".join(f"{step} {result[step]:>9.1f}" for step in STEPS))
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "articles": args.articles,
+            "runs": args.runs,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == "__main__":
+    main()
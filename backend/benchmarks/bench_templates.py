@@ -0,0 +1,132 @@
+"""Jinja2模板渲染测试,输出JSON报告:
+- 加载: 新的工作进程中首次加载模板的耗时,对比解析编译模板与从字节码缓存加载.
+- 渲染: 每次请求获取并渲染模板的耗时,对比starlette默认配置(auto_reload,每次检查模板文件)与`core/templates.py`的配置.
+- 页面: 请求`element.html`页面,对比每次渲染与缓存渲染结果(`PageCacheAdmin`).
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_templates --iterations 2000 --output templates.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import tempfile
+import time
+from typing import Callable, Dict
+
+import jinja2
+from starlette.templating import Jinja2Templates
+
+from benchmarks.bench_app import Case, git_revision, run_case
+
+DIRECTORY = "apps/demo/templates"
+CONTEXT = {
+    "request": {"url": "http://bench/simple.html", "client": {"host": "127.0.0.1"}},
+    "current_time": datetime.datetime(2024, 1, 1),
+}
+
+
+def timeit(func: Callable[[], object], iterations: int) -> dict:
+    func()  # 预热
+    begin = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    seconds = time.perf_counter() - begin
+    return {"iterations": iterations, "mean_us": round(seconds / iterations * 1e6, 3)}
+
+
+def measure_load(name: str, iterations: int, cache_dir: str) -> Dict[str, dict]:
+    """每次迭代创建新的Environment,相当于新的工作进程首次加载模板"""
+    bytecode_cache = jinja2.FileSystemBytecodeCache(cache_dir)
+
+    def load(cache):
+        return lambda: jinja2.Environment(loader=jinja2.FileSystemLoader(DIRECTORY), bytecode_cache=cache).get_template(name)
+
+    return {"parse": timeit(load(None), iterations), "bytecode_cache": timeit(load(bytecode_cache), iterations)}
+
+
+def measure_render(name: str, iterations: int, cache_dir: str) -> Dict[str, dict]:
+    from core.settings import settings
+    from core.templates import create_templates, precompile
+
+    settings.template_cache_dir = cache_dir
+    default = Jinja2Templates(directory=DIRECTORY)
+    tuned = create_templates(directory=DIRECTORY)
+    precompile(tuned)
+    return {
+        "default": timeit(lambda: default.get_template(name).render(CONTEXT), iterations),
+        "tuned": timeit(lambda: tuned.get_template(name).render(CONTEXT), iterations),
+    }
+
+
+async def measure_page(args: argparse.Namespace) -> Dict[str, dict]:
+    """请求`element.html`页面.不缓存时将缓存时间设置为0,每次请求重新渲染"""
+    import httpx
+    from apps.demo.admin import ElementTemplateAdmin
+    from core.globals import site
+    from main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        page = site.get_admin_or_create(ElementTemplateAdmin, register=False)
+        url = page.router_path + page.page_path
+        case = Case("element", lambda r: {"method": "GET", "url": url})
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for mode, ttl in (("render", 0), ("cached", None)):
+                page.page_cache_ttl = ttl
+                page._page_cache.clear()
+                results[mode] = await run_case(client, case, args.requests, args.concurrency, args.warmup, args.seed)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jinja2模板渲染测试")
+    parser.add_argument("--iterations", type=int, default=2000, help="加载与渲染的迭代次数")
+    parser.add_argument("--requests", type=int, default=2000, help="页面请求数量")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发数")
+    parser.add_argument("--warmup", type=int, default=10, help="页面预热请求数量,不计入统计")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    args = parser.parse_args()
+    directory = tempfile.mkdtemp()
+    cache_dir = os.path.join(directory, "jinja2")
+    os.makedirs(cache_dir)
+    path = os.path.join(directory, "bench_templates.db")
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{path}?check_same_thread=False")
+    os.environ.setdefault("DATABASE_URL_ASYNC", f"sqlite+aiosqlite:///{path}?check_same_thread=False")
+    os.environ.setdefault("ALLOW_ORIGINS", "[]")
+    os.environ["TEMPLATE_CACHE_DIR"] = cache_dir
+
+    results = {"load": {}, "render": {}}
+    for name in ("simple.html", "element.html"):
+        results["load"][name] = measure_load(name, args.iterations, cache_dir)
+        results["render"][name] = measure_render(name, args.iterations, cache_dir)
+    results["page"] = asyncio.run(measure_page(args))
+
+    for kind in ("load", "render"):
+        for name, modes in results[kind].items():
+            print(f"{kind:<8}{name:<14}" + "".join(f"{mode:>16} {r['mean_us']:>9.1f}us" for mode, r in modes.items()))
+    for mode, r in results["page"].items():
+        print(f"page    element.html  {mode:>8} rps {r['rps']:>9.1f}  p50 {r['p50_ms']:>7.2f}ms  p99 {r['p99_ms']:>7.2f}ms")
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""多进程部署吞吐量测试: 使用`core.server`分别以1,2,4...个工作进程启动服务,通过HTTP压测,统计吞吐量随进程数量的变化.
+
+用法(在backend目录下执行):
+    python -m benchmarks.bench_workers --workers 1 2 4 8 --seconds 10 --clients 4 --output workers.json
+
+压测客户端同样占用CPU,`--clients`个客户端进程与服务进程运行在同一台机器上时,结果偏低.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+from sqlalchemy import create_engine
+
+from benchmarks.bench_app import git_revision, percentile
+from benchmarks.seed import seed
+
+
+def random_url(articles: int, rand: random.Random) -> str:
+    """混合读取请求: 文章详情,文章列表,后台列表"""
+    return rand.choice(
+        [
+            f"/articles/read/{rand.randint(1, articles)}",
+            f"/articles/read3/{rand.randint(1, articles)}",
+            "/articles/list2?limit=20",
+        ]
+    )
+
+
+async def _load(base_url: str, articles: int, seconds: float, concurrency: int, seed_: int) -> dict:
+    rand = random.Random(seed_)
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    response = await client.get(random_url(articles, rand))
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def load(args) -> dict:
+    return asyncio.run(_load(*args))
+
+
+def wait_ready(port: int, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/articles/list2?limit=1", timeout=1)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    raise TimeoutError("server did not start")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run(workers: int, args: argparse.Namespace, env: Dict[str, str]) -> dict:
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "core.server", "--workers", str(workers), "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        wait_ready(port)
+        base_url = f"http://127.0.0.1:{port}"
+        jobs = [(base_url, args.articles, args.seconds, args.concurrency, args.seed + i) for i in range(args.clients)]
+        begin = time.perf_counter()
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(load, jobs)
+        seconds = time.perf_counter() - begin
+    finally:
+        server.terminate()
+        server.wait(30)
+    latencies = sorted(latency for result in results for latency in result["latencies"])
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(result["errors"] for result in results),
+        "rps": round(len(latencies) / seconds, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程部署吞吐量测试")
+    parser.add_argument("--db", default=None, help="SQLite数据库文件,默认使用临时文件")
+    parser.add_argument("--reuse", action="store_true", help="数据库文件已存在时不再生成数据")
+    parser.add_argument("--articles", type=int, default=10000, help="文章数量")
+    parser.add_argument("--workers", type=int, nargs="+", default=None, help="工作进程数量,默认1,2,4...直到CPU核数")
+    parser.add_argument("--seconds", type=float, default=10, help="每轮压测时间(秒)")
+    parser.add_argument("--clients", type=int, default=2, help="压测客户端进程数量")
+    parser.add_argument("--concurrency", type=int, default=32, help="每个客户端进程的并发数")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    parser.add_argument("--output", default=None, help="JSON报告文件")
+    args = parser.parse_args()
+
+    cpus = os.cpu_count() or 1
+    workers = args.workers or [2**i for i in range(cpus.bit_length()) if 2**i <= cpus]
+    path = os.path.abspath(args.db or os.path.join(tempfile.mkdtemp(), "bench_workers.db"))
+    if not (args.reuse and os.path.exists(path)):
+        if os.path.exists(path):
+            os.remove(path)
+        seed(create_engine(f"sqlite:///{path}"), articles=args.articles, random_seed=args.seed)
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{path}?check_same_thread=False",
+        "DATABASE_URL_ASYNC": f"sqlite+aiosqlite:///{path}?check_same_thread=False",
+        "DEBUG": "false",
+    }
+    env.setdefault("ALLOW_ORIGINS", "[]")
+
+    results = []
+    for n in workers:
+        result = run(n, args, env)
+        scaling = result["rps"] / results[0]["rps"] if results and results[0]["rps"] else 1.0
+        result["scaling"] = round(scaling, 2)
+        results.append(result)
+        print(
+            f"workers {n:>3}  {result['rps']:>10.1f} req/s  x{scaling:<5.2f} p50 {result['p50_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms  errors {result['errors']}"
+        )
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": cpus,
+            "articles": args.articles,
+            "seconds": args.seconds,
+            "clients": args.clients,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""生成博客测试数据.
+
+用法(在backend目录下执行):
+    python -m benchmarks.seed --url sqlite:///bench.db --articles 100000
+"""
+import argparse
+import datetime
+import random
+import time
+
+from apps.blog.models import Article, ArticleStatus, ArticleTagLink, Category, Tag
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlmodel import SQLModel
+
+BATCH_SIZE = 10000
+
+
+def seed(
+    engine: Engine,
+    articles: int = 100000,
+    categories: int = 20,
+    tags: int = 50,
+    tags_per_article: int = 3,
+    random_seed: int = 0,
+) -> None:
+    """创建表并批量写入分类,标签,文章及文章标签关联数据"""
+    rand = random.Random(random_seed)
+    SQLModel.metadata.create_all(engine, tables=[Category.__table__, Tag.__table__, Article.__table__, ArticleTagLink.__table__])
+    start = datetime.datetime(2020, 1, 1)
+    statuses = [status.value for status in ArticleStatus]
+    with engine.begin() as conn:
+        conn.execute(insert(Category), [{"id": i, "name": f"category{i}", "description": ""} for i in range(1, categories + 1)])
+        conn.execute(insert(Tag), [{"id": i, "name": f"tag{i}"} for i in range(1, tags + 1)])
+    for offset in range(0, articles, BATCH_SIZE):
+        ids = range(offset + 1, min(offset + BATCH_SIZE, articles) + 1)
+        article_rows = [
+            {
+                "id": i,
+                "title": f"article {i}",
+                "img": "",
+                "description": f"description of article {i}",
+                "status": rand.choice(statuses),
+                "content": f"<p>content of article {i}</p>" * 20,
+                "create_time": start + datetime.timedelta(seconds=rand.randrange(3 * 365 * 86400)),
+                "category_id": rand.randint(1, categories),
+                "source": "",
+            }
+            for i in ids
+        ]
+        link_rows = [
+            {"article_id": i, "tag_id": tag_id}
+            for i in ids
+            for tag_id in rand.sample(range(1, tags + 1), min(tags_per_article, tags))
+        ]
+        with engine.begin() as conn:
+            conn.execute(insert(Article), article_rows)
+            conn.execute(insert(ArticleTagLink), link_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成博客测试数据")
+    parser.add_argument("--url", default="sqlite:///bench.db", help="数据库连接")
+    parser.add_argument("--articles", type=int, default=100000, help="文章数量")
+    parser.add_argument("--categories", type=int, default=20, help="分类数量")
+    parser.add_argument("--tags", type=int, default=50, help="标签数量")
+    args = parser.parse_args()
+    engine = create_engine(args.url)
+    begin = time.perf_counter()
+    seed(engine, articles=args.articles, categories=args.categories, tags=args.tags)
+    print(f"seeded {args.articles} articles in {time.perf_counter() - begin:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import urllib.request
+from typing import Dict, List, Optional, Set
+
+import anyio
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import Settings
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from core.settings import settings
+from core.uploads import CACHE_CONTROL
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# 前端资源本地托管: amis SDK等页面依赖的前端资源保存在本地,由应用提供,不再从CDN加载.
+# 生成资源目录(需要访问npm源;离线环境使用`--source`指定包含`npm pack`生成的`.tgz`文件的目录):
+#     python -m core.assets build
+#     python -m core.assets build --registry https://registry.npmmirror.com
+#     python -m core.assets build --source ./packages
+# - 目录结构与CDN相同(`<包名>@<版本>/...`),位于内容哈希目录下: `<amis_assets_dir>/<哈希>/amis@3.6.3/sdk/sdk.js`.
+#   SDK按相对路径加载的其他文件不需要修改,内容改变时哈希目录改变,浏览器可以长期缓存(`Cache-Control: immutable`).
+#   生成新版本时保留旧的哈希目录,使用旧页面的浏览器仍可加载.
+# - 预压缩: 文本文件生成`.gz`与`.br`(安装`brotli`时)版本,请求时按`Accept-Encoding`选择,不在请求中压缩.
+# - 启用: `Settings.amis_assets`,站点的`amis_cdn`替换为本地资源地址(`/admin/static/amis/<哈希>`).
+
+MANIFEST = "manifest.json"
+# 页面模板(`app.html`)依赖的npm包,及每个包中需要的文件(路径前缀)
+PACKAGES = {
+    settings.amis_pkg: ["sdk/"],
+    "vue@2.7.14": ["dist/vue.min.js"],
+    "history@5.3.0": ["umd/history.production.min.js"],
+}
+COMPRESS_SUFFIXES = {".js", ".css", ".svg", ".json", ".map", ".html", ".txt", ".ttf", ".eot"}
+COMPRESS_MIN_SIZE = 1024  # 小于该大小(字节)的文件不压缩
+ENCODINGS = {"br": ".br", "gzip": ".gz"}  # 优先使用brotli
+
+
+def accepted_encodings(header: str) -> Set[str]:
+    """解析`Accept-Encoding`,返回可接受的编码"""
+    encodings = set()
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        encodings.add(name.strip().lower())
+    return encodings
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """静态文件: 存在预压缩文件且客户端接受该编码时返回压缩文件;响应带有长期缓存头"""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+            for encoding, suffix in ENCODINGS.items():
+                if encoding not in accepted:
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result is not None:
+                    return self.encoded_response(full_path, stat_result, scope, path, encoding)
+        response = await super().get_response(path, scope)
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
+
+    def encoded_response(self, full_path: str, stat_result: os.stat_result, scope: Scope, path: str, encoding: str) -> Response:
+        headers = {"Content-Encoding": encoding, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        response = FileResponse(
+            full_path, stat_result=stat_result, method=scope["method"], media_type=media_type, headers=headers
+        )
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def read_manifest(directory: str) -> Optional[dict]:
+    path = os.path.join(directory, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+class LocalAssetsAdminSite(admin.AdminSite):
+    """前端资源本地托管Mixin: 启用`Settings.amis_assets`时挂载资源目录,页面从本地加载amis SDK"""
+
+    assets_path: str = "/static/amis"
+
+    def __init__(self, settings: Settings, **kwargs):
+        super().__init__(settings, **kwargs)
+        if getattr(settings, "amis_assets", False):
+            directory = settings.amis_assets_dir
+            manifest = read_manifest(directory)
+            if manifest is None:
+                raise RuntimeError(f"前端资源目录{directory}未生成,请先执行: python -m core.assets build")
+            self.fastapi.mount(self.assets_path, PrecompressedStaticFiles(directory=directory), "amis_assets")
+            # 页面模板中的资源地址为`${cdn}/${pkg}/sdk/sdk.js`等
+            settings.amis_cdn = f"{self.router_path}{self.assets_path}/{manifest['hash']}"
+
+
+def fetch_package(package: str, registry: str, source: Optional[str]) -> tarfile.TarFile:
+    """读取npm包: 优先使用`source`目录中的`<名称>-<版本>.tgz`,否则从npm源下载"""
+    name, version = package.rsplit("@", 1)
+    filename = f"{name.split('/')[-1]}-{version}.tgz"
+    if source:
+        return tarfile.open(os.path.join(source, filename))
+    url = f"{registry.rstrip('/')}/{name}/-/{filename}"
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return tarfile.open(fileobj=io.BytesIO(response.read()))
+
+
+def compress(path: str) -> List[str]:
+    """生成预压缩文件,压缩后不小于原文件时不保存.返回生成的文件"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return []
+    variants = {".gz": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants[".br"] = brotli.compress(data, quality=11)
+    created = []
+    for suffix, compressed in variants.items():
+        if len(compressed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            created.append(path + suffix)
+    return created
+
+
+def build(directory: str, registry: str, source: Optional[str] = None) -> dict:
+    """下载并解压前端资源,生成预压缩文件,写入内容哈希目录与清单.返回清单"""
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(dir=directory)
+    os.chmod(staging, 0o755)
+    try:
+        files: Dict[str, str] = {}
+        for package, prefixes in PACKAGES.items():
+            with fetch_package(package, registry, source) as tar:
+                for member in tar.getmembers():
+                    # npm包中的文件位于`package/`目录下
+                    _, _, name = member.name.partition("/")
+                    if not member.isfile() or not name.startswith(tuple(prefixes)) or ".." in name.split("/"):
+                        continue
+                    target = os.path.join(staging, package, name)
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    with tar.extractfile(member) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    with open(target, "rb") as f:
+                        files[f"{package}/{name}"] = hashlib.sha256(f.read()).hexdigest()
+        digest = hashlib.sha256(json.dumps(files, sort_keys=True).encode()).hexdigest()[:16]
+        compressed = 0
+        for relpath in files:
+            if os.path.splitext(relpath)[1] in COMPRESS_SUFFIXES:
+                compressed += len(compress(os.path.join(staging, relpath)))
+        target = os.path.join(directory, digest)
+        if os.path.exists(target):  # 内容相同,已生成
+            shutil.rmtree(staging)
+        else:
+            os.replace(staging, target)
+        manifest = {"hash": digest, "packages": list(PACKAGES), "files": len(files), "compressed": compressed}
+        with open(os.path.join(directory, MANIFEST + ".tmp"), "w") as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(os.path.join(directory, MANIFEST + ".tmp"), os.path.join(directory, MANIFEST))
+        return manifest
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="前端资源本地托管")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="下载并生成前端资源目录")
+    build_parser.add_argument("--directory", default=settings.amis_assets_dir, help="资源目录")
+    build_parser.add_argument("--registry", default="https://registry.npmjs.org", help="npm源")
+    build_parser.add_argument("--source", default=None, help="包含npm包(.tgz)的目录,不从npm源下载")
+    args = parser.parse_args()
+    manifest = build(args.directory, args.registry, args.source)
+    if brotli is None:
+        print("brotli未安装,只生成gzip压缩文件", file=sys.stderr)
+    print(json.dumps(manifest))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,26 @@
 from fastapi import FastAPI
 from fastapi_amis_admin.admin.settings import Settings
-from fastapi_amis_admin.admin.site import AdminSite, APIDocsApp, DocsAdmin, ReDocsAdmin
+from fastapi_amis_admin.admin.site import AdminSite, APIDocsApp, DocsAdmin, FileAdmin, ReDocsAdmin
 from fastapi_amis_admin.amis.components import App
 from sqlalchemy_database import AsyncDatabase, Database
 from starlette.requests import Request
 
 from core import settings
+from core.assets import LocalAssetsAdminSite
+from core.lazy import LazyAdminApp
+from core.page_cache import PageCacheAdmin, RegistryVersionAdminApp
+from core.pool import engine_options, instrument_pool
+from core.replicas import ReplicaRouter
+from core.sqlite import apply_sqlite_profile
+from core.uploads import UploadAdmin
 
-# 同步数据库.
+# 同步数据库.连接池参数通过`Settings`配置,使用情况见`/metrics`
 sync_db = Database.create(
     settings.database_url,
     session_options={
         "expire_on_commit": False,
     },
+    **engine_options("sync_db", settings.database_url),
 )
 
 # 异步数据库
@@ -20,9 +28,40 @@ async_db = AsyncDatabase.create(
     settings.database_url_async,
     echo=settings.debug,
     session_options={"expire_on_commit": False},
+    **engine_options("async_db", settings.database_url_async, is_async=True),
 )
 
-site = AdminSite(settings=settings, engine=async_db)
+instrument_pool("sync_db", sync_db.engine)
+instrument_pool("async_db", async_db.engine)
+# SQLite性能配置: WAL,写入队列等,见`core/sqlite.py`
+apply_sqlite_profile("sync_db", sync_db.engine)
+apply_sqlite_profile("async_db", async_db.engine)
+# 读写分离(可选): 只读请求的查询发送到从库,见`core/replicas.py`
+replica_router = ReplicaRouter(
+    "async_db",
+    async_db.engine,
+    settings.database_replicas,
+    check_interval=settings.replica_check_interval,
+    max_lag=settings.replica_max_lag,
+)
+if replica_router.replicas:
+    async_db.session_maker.configure(sync_session_class=replica_router.session_class())
+
+
+class DemoAdminSite(LazyAdminApp, RegistryVersionAdminApp, PageCacheAdmin, LocalAssetsAdminSite, AdminSite):
+    """- 缓存导航菜单(App)页面Schema,注册或取消注册管理类后自动失效.
+    - 文件上传使用`UploadAdmin`: 内容去重,生成缩略图.
+    - 支持延迟注册管理类: `site.register_admin(..., lazy=True)`.
+    - 启用`Settings.amis_assets`时从本地加载amis SDK,见`core/assets.py`.
+    """
+
+    def __init__(self, settings: Settings, **kwargs):
+        super().__init__(settings, **kwargs)
+        self.unregister_admin(FileAdmin)
+        self.register_admin(UploadAdmin)
+
+
+site = DemoAdminSite(settings=settings, engine=async_db)
 
 
 # 1. 默认后台管理站点,无用户认证与授权系统
@@ -37,7 +76,7 @@ site = AdminSite(settings=settings, engine=async_db)
 
 
 # 3. 自定义后台管理站点
-class NewAdminSite(AdminSite):
+class NewAdminSite(LocalAssetsAdminSite, AdminSite):
     # 自定义应用模板,复制原模板文件修改,原路径: fastapi_amis_admin/amis/templates/app.html
     template_name = "/templates/new_app.html"
 
@@ -0,0 +1,141 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from fastapi import FastAPI
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import Histogram, format_labels, metric_header, register_collector
+from core.settings import settings
+
+# 性能监控(可选,`Settings.instrumentation`开启): 在`main.py`中调用`setup`.
+# - 每个路由的请求耗时.
+# - 每个请求执行的SQL语句数量与总耗时(通过`before_cursor_execute`/`after_cursor_execute`事件).
+# - 慢查询日志: 超过`Settings.slow_query_ms`的SQL语句记录为WARNING日志.
+# 结果通过`/metrics`输出.
+
+logger = logging.getLogger("core.instrumentation")
+
+SQL_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class RequestStats:
+    """当前请求的SQL执行统计"""
+
+    __slots__ = ("statements", "seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.seconds = 0.0
+
+
+_request_stats: "contextvars.ContextVar[Optional[RequestStats]]" = contextvars.ContextVar("request_stats", default=None)
+
+
+class RouteMetrics:
+    """按(请求方法, 路由)统计"""
+
+    def __init__(self):
+        self.requests: Dict[Tuple[str, str, int], int] = defaultdict(int)
+        self.latency: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.sql_statements: Dict[Tuple[str, str], Histogram] = defaultdict(lambda: Histogram(SQL_COUNT_BUCKETS))
+        self.sql_seconds: Dict[Tuple[str, str], Histogram] = defaultdict(Histogram)
+        self.slow_queries = 0
+        self._lock = threading.Lock()
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        key = (method, route)
+        with self._lock:
+            self.requests[(method, route, status)] += 1
+            latency, sql_statements, sql_seconds = self.latency[key], self.sql_statements[key], self.sql_seconds[key]
+        latency.observe(seconds)
+        sql_statements.observe(stats.statements)
+        sql_seconds.observe(stats.seconds)
+
+    def collect(self) -> List[str]:
+        lines = metric_header("http_requests_total", "counter", "请求次数")
+        for (method, route, status), count in list(self.requests.items()):
+            labels = format_labels({"method": method, "route": route, "status": status})
+            lines.append(f"http_requests_total{labels} {count}")
+        histograms = [
+            ("http_request_duration_seconds", "请求耗时", self.latency),
+            ("http_request_sql_statements", "每个请求执行的SQL语句数量", self.sql_statements),
+            ("http_request_sql_seconds", "每个请求执行SQL的总耗时", self.sql_seconds),
+        ]
+        for name, documentation, values in histograms:
+            lines += metric_header(name, "histogram", documentation)
+            for (method, route), histogram in list(values.items()):
+                lines += histogram.render(name, {"method": method, "route": route})
+        lines += metric_header("db_slow_queries_total", "counter", f"执行时间超过{settings.slow_query_ms}ms的SQL语句数量")
+        lines.append(f"db_slow_queries_total {self.slow_queries}")
+        return lines
+
+
+route_metrics = RouteMetrics()
+
+
+def get_route_name(scope: Scope) -> str:
+    """路由模板,例如: `/articles/read/{id}`.挂载的子应用加上挂载路径;未匹配的路由统一记录,避免指标数量无限增长"""
+    route = scope.get("route")
+    if route is None:
+        return "<unmatched>"
+    return scope.get("root_path", "") + route.path
+
+
+class InstrumentationMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_stats.reset(token)
+            route_metrics.observe(scope["method"], get_route_name(scope), status, time.perf_counter() - start, stats)
+
+
+def instrument_engine(engine: Union[Engine, AsyncEngine]) -> None:
+    """记录SQL语句执行耗时.异步引擎的事件注册在同步引擎上"""
+    engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - conn.info["query_start_time"].pop()
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += seconds
+        if seconds * 1000 >= settings.slow_query_ms:
+            route_metrics.slow_queries += 1
+            logger.warning("slow query (%.1f ms): %s", seconds * 1000, statement)
+
+
+def setup(app: FastAPI, engines: Iterable[Union[Engine, AsyncEngine]]) -> None:
+    """开启性能监控.在挂载后台管理系统之后调用,使请求耗时包含数据库会话中间件"""
+    for engine in engines:
+        instrument_engine(engine)
+    app.add_middleware(InstrumentationMiddleware)
+    register_collector(route_metrics.collect)
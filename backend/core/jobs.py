@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from fastapi import Depends
+from fastapi.encoders import jsonable_encoder
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.amis.components import Dialog, Form, Progress, Service, Tpl
+from fastapi_amis_admin.crud.schema import BaseApiOut
+from fastapi_amis_admin.utils.pydantic import PYDANTIC_V2, create_model_by_model
+from pydantic import BaseModel
+from sqlalchemy import or_, select, update
+from sqlalchemy_database import AsyncDatabase
+from starlette.requests import Request
+
+from core.globals import site
+from core.lazy import LazyAdminApp
+from core.models import Job, JobStatus
+from core.settings import settings
+
+# 后台任务队列: 耗时的批量动作提交为任务后立即返回,由后台协程分批执行.
+# - 任务保存在站点数据库的`job`表中(模型见`core/models.py`),进程重启后未完成的任务继续执行.
+# - 每批次处理完成后在同一事务中记录进度,中断后从上次完成的批次继续.
+# - 在`main.py`的启动/关闭事件中调用`job_runner.start()`/`job_runner.stop()`.
+
+logger = logging.getLogger("core.jobs")
+
+JobHandler = Callable[[List[str], Dict[str, Any]], Awaitable[None]]
+"""任务处理函数: 处理一批主键,参数为(主键列表, 表单数据)"""
+
+
+class JobRunner:
+    """任务执行器.最多同时执行`concurrency`个任务"""
+
+    def __init__(self, db: AsyncDatabase, *, concurrency: int = 2, poll_interval: float = 1.0, stale_seconds: int = 600):
+        self.db = db
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval  # 没有任务时的轮询间隔(秒),用于获取其他进程提交的任务
+        self.stale_seconds = stale_seconds  # 执行中的任务超过该时间未更新进度,视为进程已退出,重新执行
+        self.handlers: Dict[str, JobHandler] = {}
+        self._workers: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def register(self, name: str, handler: JobHandler) -> None:
+        self.handlers[name] = handler
+
+    async def enqueue(self, name: str, item_id: List[str], data: Dict[str, Any] = None, *, chunk_size: int = 100) -> Job:
+        """提交任务.使用独立会话立即提交,不依赖请求会话"""
+        payload = {"item_id": list(item_id), "data": data or {}, "chunk_size": chunk_size}
+        job = Job(name=name, payload=json.dumps(payload, ensure_ascii=False), total=len(item_id))
+        async with self.db.session_maker() as session:
+            session.add(job)
+            await session.commit()
+        if self._wakeup:
+            self._wakeup.set()
+        return job
+
+    async def get(self, job_id: int) -> Optional[Job]:
+        async with self.db.session_maker() as session:
+            return await session.get(Job, job_id)
+
+    async def _claim(self) -> Optional[Job]:
+        """领取一个等待中或超时的任务.通过条件更新保证同一任务只被一个协程(进程)领取"""
+        async with self.db.session_maker() as session:
+            while True:
+                now = datetime.utcnow()
+                claimable = or_(
+                    Job.status == JobStatus.pending,
+                    (Job.status == JobStatus.running) & (Job.update_time < now - timedelta(seconds=self.stale_seconds)),
+                )
+                job = await session.scalar(select(Job).where(claimable).order_by(Job.id).limit(1))
+                if job is None:
+                    return None
+                result = await session.execute(
+                    update(Job)
+                    .where(Job.id == job.id, Job.update_time == job.update_time, claimable)
+                    .values(status=JobStatus.running, update_time=now)
+                )
+                await session.commit()
+                if result.rowcount == 1:
+                    await session.refresh(job)
+                    return job
+
+    async def _run(self, job: Job) -> None:
+        payload = json.loads(job.payload)
+        item_id, chunk_size = payload["item_id"], payload["chunk_size"]
+        try:
+            handler = self.handlers.get(job.name)
+            if handler is None and isinstance(site, LazyAdminApp):
+                # 任务名称为动作的路由地址.动作所在的管理类延迟注册时,注册路由后才会创建动作并注册处理函数
+                site.load_lazy_admins(job.name)
+                handler = self.handlers.get(job.name)
+            if handler is None:
+                raise LookupError(f"未注册的任务: {job.name}")
+            for offset in range(job.done, len(item_id), chunk_size):
+                chunk = item_id[offset : offset + chunk_size]
+                # 处理结果与进度在同一事务中提交
+                async with self.db():
+                    await handler(chunk, payload["data"])
+                    await self.db.session.execute(
+                        update(Job).where(Job.id == job.id).values(done=offset + len(chunk), update_time=datetime.utcnow())
+                    )
+            await self._finish(job, JobStatus.success)
+        except Exception as error:
+            logger.exception("job %s(%s) failed", job.id, job.name)
+            await self._finish(job, JobStatus.failed, error=repr(error)[:1000])
+
+    async def _finish(self, job: Job, status: JobStatus, error: str = "") -> None:
+        async with self.db.session_maker() as session:
+            await session.execute(
+                update(Job).where(Job.id == job.id).values(status=status, error=error, update_time=datetime.utcnow())
+            )
+            await session.commit()
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                job = await self._claim()
+                if job:
+                    await self._run(job)
+                    continue
+            except Exception:  # 例如数据库暂时被锁定或连接断开,等待后重试
+                logger.exception("job worker error")
+                await asyncio.sleep(self.poll_interval)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """取消执行中的任务,未完成的批次在下次启动超时后重新执行"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+job_runner = JobRunner(
+    site.db,
+    concurrency=settings.job_concurrency,
+    poll_interval=settings.job_poll_interval,
+    stale_seconds=settings.job_stale_seconds,
+)
+
+
+class JobModelAction(admin.ModelAction):
+    """后台任务模型动作.
+    - 提交表单后创建任务立即返回,选中的数据按`job_chunk_size`分批处理.
+    - 提交后打开进度对话框,通过`Service`轮询任务进度.
+    - 子类实现`handle_chunk`处理一批数据;不在请求上下文中执行,无法获取`request`.
+    - 表单数据保存在任务表中,`job_exclude_fields`中的字段(密码等敏感数据)不保存,`handle_chunk`也无法获取.
+    """
+
+    job_chunk_size: int = 100
+    job_runner: JobRunner = job_runner
+    job_exclude_fields: Set[str] = {"password"}
+
+    def __init__(self, admin, **kwargs):
+        super().__init__(admin, **kwargs)
+        # 任务中的表单数据模型,不包含排除的字段
+        self.job_schema = self.schema and create_model_by_model(
+            self.schema, f"{self.schema.__name__}Job", exclude=self.job_exclude_fields
+        )
+        self.job_runner.register(self.job_name, self.run_chunk)
+
+    @property
+    def job_name(self) -> str:
+        return self.router_path + self.page_path
+
+    async def handle_chunk(self, item_id: List[str], data: Optional[BaseModel]) -> None:
+        raise NotImplementedError
+
+    async def run_chunk(self, item_id: List[str], data: Dict[str, Any]) -> None:
+        schema = self.job_schema.model_validate(data) if PYDANTIC_V2 else self.job_schema.parse_obj(data)
+        await self.handle_chunk(item_id, schema)
+
+    async def handle(self, request: Request, item_id: List[str], data: Optional[BaseModel], **kwargs) -> BaseApiOut[Any]:
+        data = jsonable_encoder(data, exclude=self.job_exclude_fields)
+        job = await self.job_runner.enqueue(self.job_name, item_id, data, chunk_size=self.job_chunk_size)
+        return BaseApiOut(msg="任务已提交,正在后台执行", data=job.progress)
+
+    async def get_form(self, request: Request) -> Form:
+        form = await super().get_form(request)
+        # 提交后打开进度对话框,对话框数据为提交接口返回的任务信息
+        form.feedback = Dialog(
+            title="任务进度",
+            actions=[],
+            body=Service(
+                api=f"get:{self.router_path}{self.page_path}/job/${{id}}",
+                interval=1000,
+                silentPolling=True,
+                stopAutoRefreshWhen=f"${{status >= {JobStatus.success.value}}}",
+                body=[
+                    Progress(value="${percent}"),
+                    Tpl(tpl="${status_label}: ${done}/${total}"),
+                    Tpl(tpl="${error}", className="text-danger", visibleOn="${error}"),
+                ],
+            ),
+        )
+        return form
+
+    def register_router(self):
+        super().register_router()
+        self.router.add_api_route(
+            f"{self.page_path}/job/{{job_id}}",
+            self.route_job,
+            methods=["GET"],
+            response_model=BaseApiOut[Dict[str, Any]],
+            dependencies=[Depends(self.page_permission_depend)],
+        )
+        return self
+
+    @property
+    def route_job(self):
+        async def route(job_id: int):
+            job = await self.job_runner.get(job_id)
+            if job is None or job.name != self.job_name:
+                return BaseApiOut(status=-1, msg="任务不存在")
+            return BaseApiOut(data=job.progress)
+
+        return route
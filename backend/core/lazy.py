@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import List, Optional, Set, Type
+
+from fastapi import APIRouter
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import AdminApp
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+# 延迟注册管理类: 挂载后台管理系统时,注册路由(创建表单,动作,接口模型与FastAPI路由)占大部分启动耗时.
+# - `register_admin(..., lazy=True)`注册的管理类,挂载时只创建实例(导航菜单需要),
+#   在站点路由中添加占位路由,首次访问其路径时才注册路由.
+# - `Settings.admin_prewarm`: 启动后在后台依次注册全部延迟的路由.
+# - 多进程部署时`core/server.py`在fork之前注册全部路由,工作进程直接使用.
+# - 注册前,站点的OpenAPI文档中不包含延迟注册的路由.
+
+logger = logging.getLogger("core.lazy")
+
+
+class LazyAdminRoute(BaseRoute):
+    """延迟注册的管理类的占位路由.匹配管理类路由前缀下的所有请求,首次匹配时注册管理类的路由并替换自身"""
+
+    def __init__(self, app: AdminApp, admin_: admin.RouterAdmin):
+        self.app = app
+        self.admin = admin_
+        self.prefix = admin_.router_path[len(app.site.router_path) :]  # 相对于站点的路径
+        self.router: Optional[APIRouter] = None
+
+    def matches(self, scope: Scope):
+        if scope["type"] in ("http", "websocket"):
+            path = scope["path"]
+            if path == self.prefix or path.startswith(f"{self.prefix}/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, **path_params):
+        raise NoMatchFound(name, path_params)
+
+    def load(self) -> APIRouter:
+        """注册管理类的路由,并在站点路由中替换占位路由"""
+        if self.router is None:
+            self.admin.register_router()
+            router = APIRouter()
+            router.include_router(self.admin.router, prefix=self.app.router_path[len(self.app.site.router_path) :])
+            routes = self.app.site.router.routes
+            if self in routes:
+                index = routes.index(self)
+                routes[index : index + 1] = router.routes
+            self.router = router
+            logger.debug("loaded lazy admin %s", type(self.admin).__name__)
+        return self.router
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.load()(scope, receive, send)
+
+
+class LazyAdminApp(admin.AdminApp):
+    """延迟注册Mixin.`register_admin`增加`lazy`参数,延迟注册的管理类在首次访问时才注册路由"""
+
+    def __init__(self, *args, **kwargs):
+        self._lazy_admins: Set[Type[admin.BaseAdmin]] = set()
+        self._prewarm_task: Optional[asyncio.Task] = None
+        super().__init__(*args, **kwargs)
+
+    def register_admin(self, *admin_cls: Type[admin.BaseAdmin], lazy: bool = False):
+        if lazy:
+            self._lazy_admins.update(cls for cls in admin_cls if cls)
+        return super().register_admin(*admin_cls)
+
+    def unregister_admin(self, *admin_cls: Type[admin.BaseAdmin]):
+        self._lazy_admins.difference_update(admin_cls)
+        super().unregister_admin(*admin_cls)
+
+    def _register_admin_router_all_pre(self):
+        for cls, admin_ in self._registered.items():
+            if isinstance(admin_, admin.ModelAdmin) and cls not in self._lazy_admins:
+                admin_.get_link_model_forms()
+
+    def _register_admin_router_all(self):
+        for cls, admin_ in self._registered.items():
+            if not isinstance(admin_, admin.RouterAdmin):
+                continue
+            if cls not in self._lazy_admins:
+                admin_.register_router()
+                self.router.include_router(admin_.router)
+                continue
+            if isinstance(admin_, AdminApp):
+                admin_._create_admin_instance_all()  # 导航菜单需要子管理类的实例
+            # 占位路由添加到站点路由中.当前应用的路由在注册后被复制到上级路由,之后添加的路由不会生效
+            self.site.router.routes.append(LazyAdminRoute(self, admin_))
+
+    def get_lazy_routes(self, path: Optional[str] = None) -> List[LazyAdminRoute]:
+        """站点中未注册的占位路由.`path`为完整的路由地址时,只返回匹配该地址的占位路由"""
+        routes = [route for route in self.site.router.routes if isinstance(route, LazyAdminRoute)]
+        if path is None:
+            return routes
+        if not path.startswith(self.site.router_path):
+            return []
+        scope = {"type": "http", "path": path[len(self.site.router_path) :]}
+        return [route for route in routes if route.matches(scope)[0] == Match.FULL]
+
+    def load_lazy_admins(self, path: Optional[str] = None) -> None:
+        """注册延迟注册的管理类的路由.`path`为完整的路由地址时,只注册该地址所在的管理类.
+        延迟注册的应用中可能还有延迟注册的管理类,重复执行直到没有匹配的占位路由.
+        """
+        routes = self.get_lazy_routes(path)
+        while routes:
+            for route in routes:
+                route.load()
+            routes = self.get_lazy_routes(path)
+
+    async def prewarm_lazy_admins(self) -> None:
+        """在后台依次注册全部延迟的路由,每注册一个管理类让出一次事件循环"""
+        routes = self.get_lazy_routes()
+        while routes:
+            routes[0].load()
+            await asyncio.sleep(0)
+            routes = self.get_lazy_routes()
+
+    def start_prewarm(self) -> None:
+        self._prewarm_task = asyncio.create_task(self.prewarm_lazy_admins())
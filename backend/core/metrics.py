@@ -0,0 +1,70 @@
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+# 运行指标: 以Prometheus文本格式输出,访问`/metrics`查看.
+# 各模块通过`register_collector`注册采集函数,采集函数返回指标文本行.
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+"""默认耗时分桶(秒)"""
+
+
+def format_labels(labels: Optional[Dict[str, str]]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace('"', '\\"')) for k, v in labels.items()) + "}"
+
+
+class Histogram:
+    """直方图,记录观测值的分桶计数,总和与总数"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个为+Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+            self.count += 1
+
+    def render(self, name: str, labels: Optional[Dict[str, str]] = None) -> List[str]:
+        labels = labels or {}
+        lines, total = [], 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            total += count
+            lines.append(f"{name}_bucket{format_labels({**labels, 'le': str(bound)})} {total}")
+        lines.append(f"{name}_sum{format_labels(labels)} {self.sum}")
+        lines.append(f"{name}_count{format_labels(labels)} {self.count}")
+        return lines
+
+
+def metric_header(name: str, type_: str, documentation: str) -> List[str]:
+    return [f"# HELP {name} {documentation}", f"# TYPE {name} {type_}"]
+
+
+collectors: List[Callable[[], Iterable[str]]] = []
+"""已注册的指标采集函数"""
+
+
+def register_collector(collector: Callable[[], Iterable[str]]) -> Callable[[], Iterable[str]]:
+    collectors.append(collector)
+    return collector
+
+
+def render_metrics() -> str:
+    return "".join(f"{line}\n" for collector in collectors for line in collector())
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", response_class=PlainTextResponse, summary="运行指标")
+async def metrics():
+    return render_metrics()
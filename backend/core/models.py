@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi_amis_admin.models import ChoiceType, Field, IntegerChoices, SQLModel
+from sqlalchemy import Index
+
+# 站点公共模型.只导入模型定义,不创建数据库连接与后台管理站点,供`migrations/env.py`导入
+
+
+class JobStatus(IntegerChoices):
+    pending = 0, "等待中"
+    running = 1, "执行中"
+    success = 2, "已完成"
+    failed = 3, "失败"
+
+
+class Job(SQLModel, table=True):
+    __table_args__ = (Index("ix_job_status_id", "status", "id"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True, nullable=False)
+    name: str = Field(title="JobName", max_length=255)
+    status: JobStatus = Field(JobStatus.pending, title="status", sa_type=ChoiceType(JobStatus))
+    payload: str = Field(default="{}", title="Payload")  # JSON: 主键列表,表单数据,批次大小
+    total: int = Field(default=0, title="Total")
+    done: int = Field(default=0, title="Done")
+    error: str = Field(default="", title="Error")
+    create_time: datetime = Field(default_factory=datetime.utcnow, title="CreateTime")
+    update_time: datetime = Field(default_factory=datetime.utcnow, title="UpdateTime")
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "status": self.status,
+            "status_label": JobStatus(self.status).label,
+            "total": self.total,
+            "done": self.done,
+            "percent": round(self.done * 100 / self.total) if self.total else 100,
+            "error": self.error,
+        }
+
+
+class DatabaseHeartbeat(SQLModel, table=True):
+    """主库心跳: 定时更新时间,从库读取后计算复制延迟.见`core/replicas.py`"""
+
+    id: int = Field(default=1, primary_key=True, nullable=False)
+    time: float = Field(default=0, title="Time")  # 时间戳(秒)
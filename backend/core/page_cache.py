@@ -0,0 +1,109 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional, Type
+
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin import AdminApp
+from fastapi_amis_admin.utils.translation import i18n as _
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+def registry_version(app: AdminApp) -> int:
+    """站点中管理应用注册结构的版本,用于页面缓存失效"""
+    return getattr(app.site, "_registry_version", 0)
+
+
+class RegistryVersionAdminApp(admin.AdminApp):
+    """注册结构版本Mixin: 注册,取消注册或创建管理类实例时递增站点的版本号(`registry_version`).
+    站点及其中的嵌套应用都需使用该Mixin,请求时不再遍历注册结构.
+    """
+
+    def _bump_registry_version(self):
+        site = self.site
+        site._registry_version = getattr(site, "_registry_version", 0) + 1
+
+    def register_admin(self, *admin_cls: Type[admin.BaseAdmin]):
+        result = super().register_admin(*admin_cls)
+        self._bump_registry_version()
+        return result
+
+    def unregister_admin(self, *admin_cls: Type[admin.BaseAdmin]):
+        super().unregister_admin(*admin_cls)
+        self._bump_registry_version()
+
+    def get_admin_or_create(self, admin_cls: Type[admin.BaseAdmin], **kwargs):
+        created = self._registered.get(admin_cls) is None
+        admin_ = super().get_admin_or_create(admin_cls, **kwargs)
+        # 在当前应用中创建了实例
+        if admin_ is not None and created and self._registered.get(admin_cls) is admin_:
+            self._bump_registry_version()
+        return admin_
+
+
+class CachedPage(NamedTuple):
+    body: bytes
+    media_type: Optional[str]
+    etag: str
+    expires: Optional[float]  # 过期时间(`time.monotonic()`),None表示不过期
+
+
+class PageCacheAdmin(admin.PageAdmin):
+    """页面缓存Mixin.
+    - 页面Schema(导航菜单,选项卡页面,静态页面等)首次渲染后缓存序列化结果,之后直接返回缓存的字节.
+    - 管理类注册结构改变时自动失效.
+    - 响应带有`ETag`,浏览器再次请求时如果未改变,返回`304`.
+    - 设置`page_cache_ttl`时缓存到期后重新渲染,用于内容允许在一段时间内不变的页面.
+    """
+
+    page_cache_max_size: int = 100  # 最多缓存的页面数量(按请求方法,缓存键,语言区分)
+    page_cache_ttl: Optional[float] = None  # 缓存时间(秒),None表示不过期
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._page_cache: "OrderedDict[Hashable, CachedPage]" = OrderedDict()
+
+    async def get_page_cache_key(self, request: Request) -> Optional[Hashable]:
+        """页面缓存键,返回None表示不缓存.
+        默认按用户缓存(`request.scope["user"]`,由认证中间件或`fastapi_user_auth`设置),未登录的请求共用缓存;
+        无法识别用户标识时不缓存.
+        """
+        user = request.scope.get("user")
+        if user is None or not getattr(user, "is_authenticated", True):
+            return ""
+        for attr in ("id", "username", "identity"):
+            try:
+                identity = getattr(user, attr, None)
+            except NotImplementedError:  # starlette BaseUser.identity
+                identity = None
+            if identity is not None:
+                return "user", str(identity)
+        return None
+
+    async def _render_page(self, request: Request) -> Response:
+        return await self.page_parser(request, await self.get_page(request))
+
+    @property
+    def route_page(self) -> Callable:
+        async def route(request: Request):
+            key = await self.get_page_cache_key(request)
+            # 请求体中的`_update`会修改页面内容,不使用缓存
+            if key is None or (request.method == "POST" and await request.body()):
+                return await self._render_page(request)
+            key = (request.method, key, _.get_language(), registry_version(self.site))
+            cached = self._page_cache.get(key)
+            if cached is None or (cached.expires is not None and cached.expires <= time.monotonic()):
+                response = await self._render_page(request)
+                if response.status_code != 200:
+                    return response
+                etag = '"{}"'.format(hashlib.md5(response.body).hexdigest())
+                expires = None if self.page_cache_ttl is None else time.monotonic() + self.page_cache_ttl
+                cached = self._page_cache[key] = CachedPage(response.body, response.media_type, etag, expires)
+                while len(self._page_cache) > self.page_cache_max_size:
+                    self._page_cache.popitem(last=False)
+            if request.headers.get("if-none-match") == cached.etag:
+                return Response(status_code=304, headers={"ETag": cached.etag})
+            return Response(cached.body, media_type=cached.media_type, headers={"ETag": cached.etag})
+
+        return route
@@ -0,0 +1,162 @@
+import threading
+import time
+from typing import Any, Dict, List, Type, Union
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from core.metrics import Histogram, format_labels, metric_header, register_collector
+from core.settings import settings
+from core.sqlite import is_profiled
+
+# 数据库连接池: 根据`Settings`生成连接池参数,并通过连接池事件采集使用情况.
+
+
+class PoolMetrics:
+    """连接池指标"""
+
+    def __init__(self, name: str, size: int = 0):
+        self.name = name
+        self.size = size  # 连接池大小,0表示不限制(未使用队列连接池)
+        self.checked_out = 0  # 当前借出的连接数
+        self.checkouts = 0
+        self.connects = 0
+        self.timeouts = 0
+        self.checked_out_histogram = Histogram(buckets=(1, 2, 5, 10, 20, 50, 100))
+        self.overflow_histogram = Histogram(buckets=(0, 1, 2, 5, 10, 20, 50))
+        self.wait_histogram = Histogram()
+        self._lock = threading.Lock()
+
+    @property
+    def overflow(self) -> int:
+        return max(self.checked_out - self.size, 0) if self.size else 0
+
+    def on_checkout(self) -> None:
+        with self._lock:
+            self.checked_out += 1
+            self.checkouts += 1
+        self.checked_out_histogram.observe(self.checked_out)
+        self.overflow_histogram.observe(self.overflow)
+
+    def on_checkin(self) -> None:
+        with self._lock:
+            self.checked_out -= 1
+
+    def on_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+
+pool_metrics: Dict[str, PoolMetrics] = {}
+"""按数据库名称记录的连接池指标"""
+
+
+def instrumented_pool_class(pool_class: Type[Pool], metrics: PoolMetrics) -> Type[Pool]:
+    """创建记录获取连接耗时的连接池类.连接池事件没有"开始等待"事件,因此在`_do_get`中计时"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return pool_class._do_get(self)
+        except exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.wait_histogram.observe(time.perf_counter() - start)
+
+    return type(f"Instrumented{pool_class.__name__}", (pool_class,), {"_do_get": _do_get})
+
+
+def engine_options(name: str, url: str, *, is_async: bool = False) -> Dict[str, Any]:
+    """根据`Settings`生成`create_engine`连接池参数.
+    - 设置了`db_pool_size`时使用队列连接池;否则使用数据库驱动默认的连接池.
+    - 设置了`db_max_connections`时,连接总数按进程数量(`workers`)平均分配给每个进程,不再额外创建连接.
+    - SQLite文件数据库启用性能配置时,默认使用大小为`sqlite_pool_size`的连接池.
+    """
+    url = make_url(url)
+    options: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping, "pool_recycle": settings.db_pool_recycle}
+    if settings.db_max_connections is not None:
+        pool_class = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            pool_size=max(settings.db_max_connections // max(settings.workers, 1), 1),
+            max_overflow=0,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    elif settings.db_pool_size is not None:
+        pool_class = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    elif is_profiled(url):
+        # 复用连接,连接事件中的PRAGMA只在新建连接时执行
+        pool_class = AsyncAdaptedQueuePool if is_async else QueuePool
+        options.update(
+            pool_size=settings.sqlite_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+        )
+    else:
+        pool_class = url.get_dialect().get_pool_class(url)
+    metrics = pool_metrics[name] = PoolMetrics(name, size=options.get("pool_size", 0))
+    options["poolclass"] = instrumented_pool_class(pool_class, metrics)
+    return options
+
+
+# 各数据库设置语句执行超时(毫秒)的语句.SQLite不支持语句超时
+STATEMENT_TIMEOUT_SQL = {
+    "postgresql": "SET statement_timeout = {}",
+    "mysql": "SET SESSION max_execution_time = {}",
+}
+
+
+def instrument_pool(name: str, engine: Union[Engine, AsyncEngine]) -> None:
+    """注册连接池事件: 采集连接池指标,设置语句执行超时"""
+    engine = engine.sync_engine if isinstance(engine, AsyncEngine) else engine
+    metrics = pool_metrics[name]
+    timeout_sql = STATEMENT_TIMEOUT_SQL.get(engine.dialect.name)
+
+    @event.listens_for(engine, "connect")
+    def receive_connect(dbapi_connection, record):
+        metrics.on_connect()
+        if timeout_sql and settings.db_statement_timeout:
+            cursor = dbapi_connection.cursor()
+            cursor.execute(timeout_sql.format(int(settings.db_statement_timeout)))
+            cursor.close()
+
+    @event.listens_for(engine, "checkout")
+    def receive_checkout(dbapi_connection, record, proxy):
+        metrics.on_checkout()
+
+    @event.listens_for(engine, "checkin")
+    def receive_checkin(dbapi_connection, record):
+        metrics.on_checkin()
+
+
+@register_collector
+def collect_pool_metrics() -> List[str]:
+    values = [
+        ("db_pool_size", "gauge", "连接池大小,0表示不限制", "size"),
+        ("db_pool_checked_out", "gauge", "当前借出的连接数", "checked_out"),
+        ("db_pool_overflow", "gauge", "当前超出连接池大小的连接数", "overflow"),
+        ("db_pool_checkouts_total", "counter", "借出连接次数", "checkouts"),
+        ("db_pool_connects_total", "counter", "新建连接次数", "connects"),
+        ("db_pool_timeouts_total", "counter", "获取连接超时次数", "timeouts"),
+    ]
+    histograms = [
+        ("db_pool_checked_out_connections", "借出连接时的借出连接数", "checked_out_histogram"),
+        ("db_pool_overflow_connections", "借出连接时超出连接池大小的连接数", "overflow_histogram"),
+        ("db_pool_wait_seconds", "获取连接耗时(含新建连接)", "wait_histogram"),
+    ]
+    lines = []
+    for name, type_, documentation, attr in values:
+        lines += metric_header(name, type_, documentation)
+        lines += [f"{name}{format_labels({'db': m.name})} {getattr(m, attr)}" for m in pool_metrics.values()]
+    for name, documentation, attr in histograms:
+        lines += metric_header(name, "histogram", documentation)
+        for m in pool_metrics.values():
+            lines += getattr(m, attr).render(name, {"db": m.name})
+    return lines
@@ -0,0 +1,233 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Type
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import format_labels, metric_header, register_collector
+from core.models import DatabaseHeartbeat
+from core.pool import engine_options, instrument_pool, pool_metrics
+from core.settings import settings
+from core.sqlite import apply_sqlite_profile
+
+# 读写分离(可选,配置`Settings.database_replicas`): 主库处理写入,只读请求的查询发送到从库.
+# - 只读请求: GET/HEAD请求,以及后台管理的列表接口(POST `.../list`).其他请求与非请求上下文(后台任务等)只使用主库.
+#   GET请求中需要先读后写的路由添加依赖`Depends(use_primary)`.
+# - 会话中执行写入语句(flush,`insert`/`update`/`delete`,`session.connection()`)后,剩余的语句也使用主库.
+# - 写入后`replica_sticky_seconds`秒内,同一客户端(cookie)的请求只使用主库,读取到自己的写入.
+#   直接使用引擎执行的写入(`is_session=False`)不计入.
+# - 从库选择: 每个会话选择一个从库,使用中的连接数最少,相同时轮询.
+# - 健康检查: 主库定时写入心跳(`DatabaseHeartbeat`),从库读取心跳计算复制延迟(精度为检查间隔).
+#   从库不可用或延迟超过`replica_max_lag`秒时暂停使用,恢复后重新加入.没有可用的从库时使用主库.
+# - 测试: 将主库文件复制为从库文件(例如`sqlite3 amisadmin.db ".backup replica.db"`),
+#   DATABASE_REPLICAS='["sqlite+aiosqlite:///replica.db"]'.不再复制时从库在`replica_max_lag`秒后被暂停使用.
+# 从库状态见`/metrics`.
+
+logger = logging.getLogger("core.replicas")
+
+STICKY_COOKIE = "db_primary"
+_PRIMARY = "replica_primary"  # 会话已写入,之后使用主库
+_REPLICA = "replica"  # 会话选择的从库
+
+
+class RequestRouting:
+    """当前请求的数据库路由"""
+
+    __slots__ = ("read_only", "wrote")
+
+    def __init__(self, read_only: bool):
+        self.read_only = read_only
+        self.wrote = False
+
+
+_request_routing: "ContextVar[Optional[RequestRouting]]" = ContextVar("request_routing", default=None)
+
+
+def use_primary() -> None:
+    """路由依赖: 当前请求只使用主库"""
+    routing = _request_routing.get()
+    if routing is not None:
+        routing.read_only = False
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.healthy = False  # 首次检查通过后才使用
+        self.lag: Optional[float] = None  # 复制延迟(秒)
+        self.ejections = 0
+
+    @property
+    def load(self) -> int:
+        return pool_metrics[self.name].checked_out
+
+
+replica_routers: Dict[str, "ReplicaRouter"] = {}
+"""按数据库名称记录的读写分离路由"""
+
+
+class ReplicaRouter:
+    """从库选择与健康检查"""
+
+    def __init__(self, name: str, primary: AsyncEngine, urls: List[str], *, check_interval: float = 5, max_lag: float = 30):
+        self.name = name
+        self.primary = primary
+        self.replicas: List[Replica] = []
+        for i, url in enumerate(urls):
+            replica_name = f"{name}_replica{i}"
+            engine = create_async_engine(url, **engine_options(replica_name, url, is_async=True))
+            instrument_pool(replica_name, engine)
+            apply_sqlite_profile(replica_name, engine)
+            self.replicas.append(Replica(replica_name, engine))
+        self.check_interval = check_interval
+        self.max_lag = max_lag
+        self._counter = itertools.count()
+        self._task: Optional[asyncio.Task] = None
+        replica_routers[name] = self
+
+    def session_class(self) -> Type["RoutingSession"]:
+        """使用该路由的同步会话类,用于`sessionmaker(sync_session_class=...)`"""
+        return type("RoutingSession", (RoutingSession,), {"router": self})
+
+    def choose(self) -> Optional[Replica]:
+        """选择使用中的连接数最少的可用从库,相同时轮询"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        start = next(self._counter) % len(healthy)
+        return min(healthy[start:] + healthy[:start], key=lambda replica: replica.load)
+
+    async def heartbeat(self) -> Optional[float]:
+        """在主库写入心跳,返回写入前的心跳时间"""
+        now = time.time()
+        async with self.primary.begin() as connection:
+            last = await connection.scalar(select(DatabaseHeartbeat.time).where(DatabaseHeartbeat.id == 1))
+            if last is None:
+                await connection.execute(insert(DatabaseHeartbeat).values(id=1, time=now))
+            else:
+                await connection.execute(update(DatabaseHeartbeat).where(DatabaseHeartbeat.id == 1).values(time=now))
+        return last
+
+    async def check_replica(self, replica: Replica, primary_time: Optional[float]) -> None:
+        try:
+            async with replica.engine.connect() as connection:
+                value = await asyncio.wait_for(
+                    connection.scalar(select(DatabaseHeartbeat.time).where(DatabaseHeartbeat.id == 1)), self.check_interval
+                )
+        except Exception as error:  # 从库不可用,或尚未复制心跳表
+            replica.lag, reason = None, repr(error)
+        else:
+            if value is None or primary_time is None:
+                replica.lag, reason = None, "no heartbeat"
+            else:
+                replica.lag, reason = max(primary_time - value, 0.0), "lagging"
+        healthy = replica.lag is not None and replica.lag <= self.max_lag
+        if replica.healthy and not healthy:
+            replica.ejections += 1
+            logger.warning("replica %s ejected: %s (lag %s)", replica.name, reason, replica.lag)
+        elif healthy and not replica.healthy:
+            logger.info("replica %s healthy (lag %.1fs)", replica.name, replica.lag)
+        replica.healthy = healthy
+
+    async def check(self) -> None:
+        """检查全部从库: 与上次写入的心跳比较(从库有一个检查间隔的时间完成复制),再写入新的心跳"""
+        primary_time = await self.heartbeat()
+        await asyncio.gather(*(self.check_replica(replica, primary_time) for replica in self.replicas))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception:  # 例如主库暂时不可用,下次重试
+                logger.exception("check replicas failed")
+
+    async def start(self) -> None:
+        if self.replicas:
+            await self.check()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+class RoutingSession(Session):
+    """读写分离会话: 只读请求中的查询使用从库,写入与之后的语句使用主库"""
+
+    router: Optional[ReplicaRouter] = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs) -> Engine:
+        routing = _request_routing.get()
+        is_read = not self._flushing and getattr(clause, "is_select", False) and getattr(clause, "_for_update_arg", None) is None
+        if not is_read:
+            self.info[_PRIMARY] = True
+            if routing is not None:
+                routing.wrote = True
+        elif routing is not None and routing.read_only and self.router and not self.info.get(_PRIMARY):
+            replica = self.info.get(_REPLICA)
+            if replica is None:
+                replica = self.info[_REPLICA] = self.router.choose()
+            if replica is not None:
+                return replica.engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+class ReplicaMiddleware:
+    """判断请求是否只读;请求中有写入时设置cookie,之后`replica_sticky_seconds`秒内该客户端的请求只使用主库"""
+
+    def __init__(self, app: ASGIApp, admin_path: str = "/admin"):
+        self.app = app
+        self.admin_path = admin_path
+
+    def is_read_only(self, scope: Scope) -> bool:
+        if STICKY_COOKIE in HTTPConnection(scope).cookies:
+            return False
+        method, path = scope["method"], scope["path"]
+        return method in ("GET", "HEAD") or (method == "POST" and path.startswith(self.admin_path) and path.endswith("/list"))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        routing = RequestRouting(self.is_read_only(scope))
+        token = _request_routing.set(routing)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and routing.wrote and settings.replica_sticky_seconds > 0:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{STICKY_COOKIE}=1; Max-Age={settings.replica_sticky_seconds}; Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_routing.reset(token)
+
+
+@register_collector
+def collect_replica_metrics() -> List[str]:
+    replicas = [replica for router in replica_routers.values() for replica in router.replicas]
+    lines = metric_header("db_replica_healthy", "gauge", "从库是否可用")
+    lines += [f"db_replica_healthy{format_labels({'db': r.name})} {int(r.healthy)}" for r in replicas]
+    lines += metric_header("db_replica_lag_seconds", "gauge", "从库复制延迟,-1表示未知")
+    lines += [f"db_replica_lag_seconds{format_labels({'db': r.name})} {-1 if r.lag is None else r.lag}" for r in replicas]
+    lines += metric_header("db_replica_ejections_total", "counter", "从库被暂停使用的次数")
+    lines += [f"db_replica_ejections_total{format_labels({'db': r.name})} {r.ejections}" for r in replicas]
+    return lines
@@ -0,0 +1,100 @@
+import functools
+import json
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.crud.schema import BaseApiOut, BaseApiSchema
+from starlette.responses import JSONResponse, Response
+
+from core.settings import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+# 快速JSON响应: 列表接口的数据已由查询确定类型,不再逐行通过pydantic校验与`jsonable_encoder`转换,
+# 直接由查询结果的字典序列化;安装`orjson`时使用`orjson`编码,否则使用标准库`json`.
+# - 全局: `Settings.fast_json`,默认关闭.
+# - 路由: `json_response(content, fast=True)`.
+# - 管理类: `FastJSONModelAdmin.fast_json`.
+# 注意: 快速路径不经过`response_model`过滤字段,返回的字典即为响应内容.
+
+
+def json_default(obj: Any) -> Any:
+    """`orjson`与`json`不支持的类型(pydantic模型,ORM对象,`Decimal`,`set`等)由`jsonable_encoder`转换.
+    接口外层结构(`BaseApiOut`,`ItemListSchema`)只浅层转换为字典,其中的数据行继续由编码器直接序列化.
+    """
+    if isinstance(obj, BaseApiSchema):
+        return dict(obj)
+    return jsonable_encoder(obj)
+
+
+def json_dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """直接序列化内容,不经过`jsonable_encoder`"""
+
+    def render(self, content: Any) -> bytes:
+        return json_dumps(content)
+
+
+def json_response(content: Any, fast: Optional[bool] = None, **kwargs) -> Response:
+    """JSON响应.`fast`为None时使用`Settings.fast_json`"""
+    if settings.fast_json if fast is None else fast:
+        return FastJSONResponse(content, **kwargs)
+    return JSONResponse(jsonable_encoder(content), **kwargs)
+
+
+class Record(dict):
+    """列表数据行: 支持属性访问的字典.快速路径中代替`schema_list`实例,不做数据校验"""
+
+    __slots__ = ()
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        self[name] = value
+
+
+class FastJSONModelAdmin(admin.ModelAdmin):
+    """快速JSON响应Mixin.
+    - 列表数据行直接由查询结果构造为`Record`,不再通过`schema_list`校验.
+    - 列表接口直接返回编码后的响应,不再通过`response_model`校验.
+    """
+
+    fast_json: Optional[bool] = None  # 是否使用快速路径,None时使用`Settings.fast_json`
+
+    @property
+    def fast_json_enabled(self) -> bool:
+        return settings.fast_json if self.fast_json is None else self.fast_json
+
+    def list_item(self, values: Dict[str, Any]) -> Any:
+        if self.fast_json_enabled:
+            return Record(values)
+        return super().list_item(values)
+
+    def json_response(self, content: Any, **kwargs) -> Response:
+        return json_response(content, fast=self.fast_json_enabled, **kwargs)
+
+    @property
+    def route_list(self) -> Callable:
+        route = super().route_list
+        if not self.fast_json_enabled:
+            return route
+
+        @functools.wraps(route)  # 保留路由函数签名,FastAPI依赖注入不变
+        async def wrapper(*args, **kwargs):
+            result = await route(*args, **kwargs)
+            return self.json_response(result) if isinstance(result, BaseApiOut) else result
+
+        return wrapper
@@ -0,0 +1,62 @@
+import ast
+from pathlib import Path
+from typing import Any, Dict, Set
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy_database import AsyncDatabase
+
+from core.settings import BACKEND_DIR
+
+# 数据库结构版本检查: 生产环境由Alembic管理数据库结构,启动时只比较迁移版本,不再执行`create_all`.
+#     alembic upgrade head
+
+
+class SchemaVersionError(RuntimeError):
+    """数据库版本与迁移脚本版本不一致"""
+
+
+def _literal_assignments(path: Path, names: Set[str]) -> Dict[str, Any]:
+    values = {}
+    for node in ast.parse(path.read_text(encoding="utf-8")).body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and getattr(node.targets[0], "id", None) in names:
+            values[node.targets[0].id] = ast.literal_eval(node.value)
+    return values
+
+
+def head_revisions() -> Set[str]:
+    """迁移脚本的最新版本(没有被其他脚本作为`down_revision`的版本).
+    只解析`migrations/versions`中脚本的`revision`与`down_revision`,不导入Alembic与迁移脚本,减少启动耗时.
+    """
+    revisions, parents = set(), set()
+    for path in (BACKEND_DIR / "migrations" / "versions").glob("*.py"):
+        values = _literal_assignments(path, {"revision", "down_revision"})
+        if "revision" not in values:
+            continue
+        revisions.add(values["revision"])
+        down = values.get("down_revision")
+        parents.update(down if isinstance(down, (tuple, list)) else [down])
+    return revisions - parents
+
+
+async def current_revisions(db: AsyncDatabase) -> Set[str]:
+    """数据库`alembic_version`表中的版本,未执行过迁移时返回空集合"""
+    try:
+        async with db.engine.connect() as connection:
+            result = await connection.execute(text("SELECT version_num FROM alembic_version"))
+            return set(result.scalars())
+    except (OperationalError, ProgrammingError):  # 表不存在
+        return set()
+
+
+async def check_schema(db: AsyncDatabase, *, allow_unversioned: bool = False) -> None:
+    """数据库版本不是最新的迁移版本时抛出`SchemaVersionError`,使应用启动失败.
+    `allow_unversioned`: 未执行过迁移的数据库(没有版本记录)不检查
+    """
+    heads, current = head_revisions(), await current_revisions(db)
+    if not current and allow_unversioned:
+        return
+    if heads != current:
+        raise SchemaVersionError(
+            f"数据库版本{sorted(current) or '(无)'}与迁移版本{sorted(heads)}不一致,请先执行: alembic upgrade head",
+        )
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+import uvicorn
+
+from core.settings import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: 不支持文件锁与fork
+    fcntl = None
+
+# 多进程部署(生产环境):
+#     python -m core.server --workers 4 --host 0.0.0.0 --port 8000
+# - 主进程预加载应用,在临时子进程中执行一次建表与启动任务后再fork工作进程,工作进程共享监听端口,退出后自动重启.
+# - 每个进程的数据库连接池按`workers`分配,见`Settings.db_max_connections`.
+# - 使用`uvicorn main:app --workers N`或`faa run`(`WORKERS`环境变量)启动时,启动任务在文件锁内依次执行,
+#   建表与创建全文索引只在第一个进程中实际执行,其余进程检查后跳过.
+# - 进程内缓存(文章接口响应缓存,页面缓存)不在进程间共享,见`Settings.cache_url`.
+
+logger = logging.getLogger("core.server")
+
+prepared = False
+"""主进程已执行启动任务,工作进程跳过"""
+
+
+def lock_path() -> str:
+    name = "".join(c if c.isalnum() else "_" for c in settings.name)
+    return os.path.join(tempfile.gettempdir(), f"{name}.startup.lock")
+
+
+@asynccontextmanager
+async def startup_once() -> AsyncIterator[bool]:
+    """启动任务上下文,返回是否需要执行.多个进程同时启动时在文件锁内依次执行,避免并发执行DDL"""
+    if prepared:
+        yield False
+        return
+    if fcntl is None:
+        yield True
+        return
+    fd = os.open(lock_path(), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        # 等待文件锁时不阻塞事件循环
+        await asyncio.get_running_loop().run_in_executor(None, fcntl.flock, fd, fcntl.LOCK_EX)
+        yield True
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+def prepare() -> None:
+    """在临时子进程中执行启动任务.主进程不创建数据库连接,避免工作进程继承连接与连接池中的锁"""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            from main import startup_tasks
+
+            asyncio.run(startup_tasks())
+            code = 0
+        except BaseException:
+            logger.exception("startup failed")
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    if status != 0:
+        raise RuntimeError(f"startup failed with status {status}")
+
+
+def serve(config: uvicorn.Config, sock: socket.socket) -> None:
+    """工作进程: 在共享的监听端口上运行uvicorn"""
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    server = uvicorn.Server(config)
+    asyncio.run(server.serve(sockets=[sock]))
+
+
+def spawn(config: uvicorn.Config, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            serve(config, sock)
+        except BaseException:
+            logger.exception("worker %s exited", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    logger.info("started worker %s", pid)
+    return pid
+
+
+def run(host: str, port: int, workers: int, log_level: str = "info") -> None:
+    global prepared
+    # 在创建数据库引擎之前设置,连接池按进程数量分配
+    settings.workers = workers
+    if not hasattr(os, "fork"):
+        uvicorn.run("main:app", host=host, port=port, workers=workers, log_level=log_level)
+        return
+    from main import app
+
+    from core.globals import site
+
+    config = uvicorn.Config(app, host=host, port=port, log_level=log_level)
+    prepare()
+    prepared = True
+    # 在fork之前注册全部延迟注册的管理类的路由,工作进程直接使用
+    site.load_lazy_admins()
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(config.backlog)
+    sock.set_inheritable(True)
+    logger.info("listening on http://%s:%s with %s workers", host, port, workers)
+
+    children: Dict[int, float] = {}  # 进程id: 启动时间
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(workers):
+        children[spawn(config, sock)] = time.monotonic()
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning("worker %s exited with status %s, restarting", pid, status)
+        if time.monotonic() - started < 1:
+            time.sleep(1)  # 启动即退出时避免频繁重启
+        children[spawn(config, sock)] = time.monotonic()
+    sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多进程运行后台管理系统")
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.workers if settings.workers > 1 else os.cpu_count())
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(levelname)s:     %(message)s")
+    run(args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    # 以`python -m core.server`运行时本模块为`__main__`,通过导入的`core.server`运行,使`prepared`对`main.py`可见
+    from core import server
+
+    server.main()
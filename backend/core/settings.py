@@ -1,7 +1,7 @@
 import os
 import sys
 from pathlib import Path
-from typing import List
+from typing import List, Literal, Optional
 
 from fastapi_amis_admin import admin
 from fastapi_amis_admin.utils.pydantic import PYDANTIC_V2
@@ -22,6 +22,57 @@ class Settings(admin.Settings):
     port: int = 8000
     secret_key: str = ""
     allow_origins: List[str] = None
+    # 多进程部署: 工作进程数量,见`core/server.py`
+    workers: int = 1
+    # 进程间共享的缓存(redis),例如: redis://127.0.0.1:6379/0.多进程部署且未设置时不使用文章接口响应缓存
+    cache_url: Optional[str] = None
+    # 启动时的数据库结构处理:
+    # - create_all: 创建不存在的数据表(开发环境).已有迁移版本记录的数据库版本不是最新时启动失败(不会修改已存在的数据表)
+    # - check: 只比较数据库版本与Alembic迁移版本,不一致时启动失败(生产环境,数据库结构由`alembic upgrade head`管理)
+    # - none: 不处理
+    db_schema: Literal["create_all", "check", "none"] = "create_all"
+    # 数据库连接池.未设置`db_pool_size`时使用数据库驱动默认的连接池(例如: aiosqlite文件数据库默认不使用连接池),
+    # SQLite文件数据库启用性能配置时见`sqlite_pool_size`
+    db_pool_size: Optional[int] = None
+    # 每个数据库允许的连接总数,多进程部署时按进程数量分配: 每个进程`db_max_connections // workers`个连接,不再额外创建
+    db_max_connections: Optional[int] = None
+    db_max_overflow: int = 10  # 超出连接池大小后,最多额外创建的连接数
+    db_pool_timeout: float = 30  # 获取连接的最长等待时间(秒)
+    db_pool_recycle: int = -1  # 连接最长使用时间(秒),超过后重新连接.-1表示不限制
+    db_pool_pre_ping: bool = False  # 借出连接前检测连接是否可用
+    db_statement_timeout: int = 0  # 语句执行超时时间(毫秒),0表示不限制.支持PostgreSQL,MySQL
+    # SQLite性能配置: WAL模式,synchronous=NORMAL,进程内写入队列.见`core/sqlite.py`
+    sqlite_profile: bool = True
+    sqlite_write_queue: bool = True  # 同一进程内的写事务排队执行
+    sqlite_pool_size: int = 10  # 文件数据库未设置`db_pool_size`时的连接池大小
+    sqlite_busy_timeout: int = 5000  # 等待数据库锁的最长时间(毫秒)
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # 内存映射大小(字节)
+    sqlite_cache_size: int = -64 * 1024  # 页缓存大小,负数表示KiB
+    # 读写分离(可选): 从库连接地址(异步驱动),只读请求的查询发送到从库.见`core/replicas.py`
+    database_replicas: List[str] = []
+    replica_check_interval: float = 5  # 从库健康检查间隔(秒)
+    replica_max_lag: float = 30  # 复制延迟超过该时间(秒)的从库暂停使用
+    replica_sticky_seconds: int = 5  # 写入后该时间(秒)内同一客户端的请求只使用主库
+    # Jinja2模板: 字节码缓存目录,未设置时使用系统临时目录.见`core/templates.py`
+    template_bytecode_cache: bool = True
+    template_cache_dir: Optional[str] = None
+    # 前端资源本地托管: 页面从本地加载amis SDK,不使用`amis_cdn`.资源目录由`python -m core.assets build`生成,见`core/assets.py`
+    amis_assets: bool = False
+    amis_assets_dir: str = str(BACKEND_DIR / "static" / "amis")
+    # 启动后在后台注册延迟注册的管理类的路由,避免首次访问时等待.见`core/lazy.py`
+    admin_prewarm: bool = False
+    # 快速JSON响应: 列表接口不再逐行校验数据模型,安装`orjson`时使用`orjson`编码.见`core/responses.py`
+    fast_json: bool = False
+    # 性能监控: 请求耗时,SQL执行次数与耗时,慢查询日志.结果见`/metrics`
+    instrumentation: bool = False
+    slow_query_ms: int = 500  # 慢查询阈值(毫秒)
+    # 文章统计: 汇总表定时合并变化量的间隔(秒),0表示不合并;统计页面显示最近`stats_days`天.见`apps/blog/stats.py`
+    stats_compact_interval: float = 60
+    stats_days: int = 30
+    # 后台任务: 耗时的批量动作在后台分批执行
+    job_concurrency: int = 2  # 每个进程同时执行的任务数量
+    job_poll_interval: float = 1.0  # 没有任务时的轮询间隔(秒)
+    job_stale_seconds: int = 600  # 执行中的任务超过该时间未更新进度,视为中断并重新执行
 
 
 # 设置FAA_GLOBALS环境变量
@@ -0,0 +1,188 @@
+import asyncio
+import threading
+from typing import Dict, List, Optional, Union
+
+from sqlalchemy import event
+from sqlalchemy.engine import URL, Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import await_only
+
+from core.metrics import format_labels, metric_header, register_collector
+from core.settings import settings
+
+# SQLite性能配置: 通过连接事件设置PRAGMA,并在进程内排队执行写事务.
+# - journal_mode=WAL: 读写互不阻塞,只有写事务之间互斥.设置保存在数据库文件中.
+# - synchronous=NORMAL: WAL模式下只在检查点时同步磁盘,进程崩溃不丢失数据,断电可能丢失最近提交的事务.
+# - mmap_size, cache_size: 内存映射与页缓存大小.
+# - busy_timeout: 数据库被其他连接(或其他进程)锁定时的最长等待时间.
+# - 连接池: 文件数据库未设置`db_pool_size`时使用大小为`sqlite_pool_size`的连接池(aiosqlite默认不使用连接池,
+#   每次请求新建连接并重新执行PRAGMA),见`core/pool.py`.
+# - 写入队列: 同一进程内的写事务排队执行(事务中第一条写语句前获取锁,驱动提交或回滚完成后释放),
+#   不再由多个连接同时等待SQLite的锁(轮询等待,超时报错"database is locked").读取不排队.
+#   等待超过`busy_timeout`时不再排队,由SQLite的锁等待处理.多进程部署时进程之间仍由`busy_timeout`等待.
+#   写入锁可重入: 持有锁的任务(同步引擎为线程)中其他连接的写入不排队(例如请求中另外打开连接写入),不等待自身释放锁.
+# 配置见`Settings.sqlite_*`,`Settings.sqlite_profile`为False时不修改驱动默认配置.排队情况见`/metrics`.
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE", "CREATE", "DROP", "ALTER")
+_HOLDER = "sqlite_writer"  # 持有写入锁的连接,在连接的`info`中记录写入队列
+
+
+def is_profiled(url: URL) -> bool:
+    """是否对该数据库应用性能配置: 启用配置的SQLite文件数据库"""
+    return settings.sqlite_profile and url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:")
+
+
+def is_write(statement: str) -> bool:
+    return statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS)
+
+
+class WriteQueue:
+    """写入队列: 同一时间只有一个任务(线程)写入.异步引擎使用`asyncio.Lock`(在事件循环中等待),同步引擎使用线程锁.
+    锁按任务(线程)可重入,记录持有者与持有次数.
+    """
+
+    def __init__(self, name: str, is_async: bool, timeout: float):
+        self.name = name
+        self.is_async = is_async
+        self.timeout = timeout  # 最长排队时间(秒)
+        self.thread_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._held: Optional[Union[asyncio.Lock, threading.Lock]] = None  # 已获取的锁
+        self._owner: Optional[object] = None  # 持有锁的任务或线程
+        self._depth = 0  # 持有次数
+        self.waits = 0  # 排队等待次数
+        self.timeouts = 0  # 排队超时次数
+
+    def _async_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:  # 每个事件循环使用各自的锁
+            self._loop, self._lock = loop, asyncio.Lock()
+        return self._lock
+
+    def _current_owner(self) -> object:
+        return asyncio.current_task() if self.is_async else threading.get_ident()
+
+    def acquire(self) -> bool:
+        """获取写入锁,当前任务(线程)已持有时直接返回;超时返回False"""
+        owner = self._current_owner()
+        if self._depth and self._owner == owner:
+            self._depth += 1
+            return True
+        lock = self._lock_acquire()
+        if lock is None:
+            return False
+        self._held, self._owner, self._depth = lock, owner, 1
+        return True
+
+    def _lock_acquire(self) -> Optional[Union[asyncio.Lock, threading.Lock]]:
+        if self.is_async:
+            lock = self._async_lock()
+            if lock.locked():
+                self.waits += 1
+            try:
+                await_only(asyncio.wait_for(lock.acquire(), self.timeout))
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                return None
+            return lock
+        if not self.thread_lock.acquire(blocking=False):
+            self.waits += 1
+            if not self.thread_lock.acquire(timeout=self.timeout):
+                self.timeouts += 1
+                return None
+        return self.thread_lock
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0:
+            lock, self._held, self._owner = self._held, None, None
+            lock.release()
+
+    @staticmethod
+    def release_holder(info: dict) -> None:
+        """释放连接持有的写入锁"""
+        queue = info.pop(_HOLDER, None)
+        if queue is not None:
+            queue.release()
+
+
+write_queues: Dict[str, WriteQueue] = {}
+"""按数据库名称记录的写入队列"""
+
+
+def apply_sqlite_profile(name: str, engine: Union[Engine, AsyncEngine]) -> Optional[WriteQueue]:
+    """为SQLite文件数据库注册连接事件,返回写入队列.其他数据库或未启用时不处理"""
+    is_async = isinstance(engine, AsyncEngine)
+    engine = engine.sync_engine if is_async else engine
+    if not is_profiled(engine.url):
+        return None
+    pragmas = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "busy_timeout": settings.sqlite_busy_timeout,
+    }
+
+    @event.listens_for(engine, "connect")
+    def receive_connect(dbapi_connection, record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if not settings.sqlite_write_queue:
+        return None
+    queue = write_queues[name] = WriteQueue(name, is_async, settings.sqlite_busy_timeout / 1000)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def receive_before_cursor_execute(connection, cursor, statement, parameters, context, executemany):
+        if _HOLDER not in connection.info and is_write(statement) and queue.acquire():
+            connection.info[_HOLDER] = queue
+
+    # 连接的`commit`/`rollback`事件在驱动执行COMMIT之前触发,此时事务仍持有SQLite的锁.
+    # 包装方言的`do_commit`/`do_rollback`(每个引擎各自的方言实例),在驱动提交或回滚完成后释放写入锁
+    dialect = engine.dialect
+    do_commit, do_rollback = dialect.do_commit, dialect.do_rollback
+
+    def release(dbapi_connection) -> None:
+        try:
+            info = dbapi_connection.info
+        except NotImplementedError:  # 引擎首次连接时使用的临时连接没有`info`,不会持有写入锁
+            return
+        WriteQueue.release_holder(info)
+
+    def commit_and_release(dbapi_connection):
+        try:
+            do_commit(dbapi_connection)
+        finally:
+            release(dbapi_connection)
+
+    def rollback_and_release(dbapi_connection):
+        try:
+            do_rollback(dbapi_connection)
+        finally:
+            release(dbapi_connection)
+
+    dialect.do_commit, dialect.do_rollback = commit_and_release, rollback_and_release
+
+    @event.listens_for(engine, "checkin")
+    def receive_checkin(dbapi_connection, record):
+        # 未通过事务提交或回滚结束(例如连接直接关闭)时释放
+        if record is not None:
+            WriteQueue.release_holder(record.info)
+
+    return queue
+
+
+@register_collector
+def collect_write_queue_metrics() -> List[str]:
+    lines = []
+    for name, documentation, attr in (
+        ("sqlite_write_queue_waits_total", "写事务排队等待次数", "waits"),
+        ("sqlite_write_queue_timeouts_total", "写事务排队超时次数", "timeouts"),
+    ):
+        lines += metric_header(name, "counter", documentation)
+        lines += [f"{name}{format_labels({'db': q.name})} {getattr(q, attr)}" for q in write_queues.values()]
+    return lines
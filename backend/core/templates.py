@@ -0,0 +1,33 @@
+import os
+from typing import Any, List, Union
+
+import jinja2
+from starlette.templating import Jinja2Templates
+
+from core.settings import settings
+
+# Jinja2模板引擎配置:
+# - 字节码缓存: 模板编译结果保存在`template_cache_dir`(默认为系统临时目录),新的工作进程与重启后直接加载,不再解析模板.
+#   模板文件修改后按修改时间重新编译.
+# - auto_reload: 只在调试模式下检查模板文件是否修改,生产环境每次渲染不再读取文件状态.
+# - 预编译: 启动时加载目录中的全部模板(`precompile`),首次请求不再编译.
+# 模板输出缓存(上下文不变或允许在一段时间内不变的页面)见`core/page_cache.py`的`PageCacheAdmin`.
+
+
+def create_templates(directory: Union[str, os.PathLike], **env_options: Any) -> Jinja2Templates:
+    """创建使用`Settings.template_*`配置的`Jinja2Templates`"""
+    if settings.template_bytecode_cache:
+        if settings.template_cache_dir:
+            os.makedirs(settings.template_cache_dir, exist_ok=True)
+        env_options.setdefault("bytecode_cache", jinja2.FileSystemBytecodeCache(settings.template_cache_dir))
+    env_options.setdefault("auto_reload", settings.debug)
+    env_options.setdefault("cache_size", -1)  # 已加载的模板不淘汰
+    return Jinja2Templates(directory=directory, **env_options)
+
+
+def precompile(templates: Jinja2Templates) -> List[str]:
+    """加载全部模板,返回模板名称.字节码缓存中没有的模板编译后写入缓存"""
+    names = templates.env.list_templates()
+    for name in names:
+        templates.get_template(name)
+    return names
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiofiles
+import aiofiles.os
+from fastapi import BackgroundTasks, File, HTTPException, UploadFile
+from fastapi._compat import ModelField
+from fastapi_amis_admin import admin
+from fastapi_amis_admin.admin.site import FileAdmin
+from fastapi_amis_admin.amis.components import TableColumn
+from fastapi_amis_admin.crud.parser import SqlaField
+from fastapi_amis_admin.crud.schema import BaseApiOut, ItemListSchema
+from sqlalchemy.engine import Result
+from starlette.requests import Request
+from starlette.responses import FileResponse
+from starlette.staticfiles import StaticFiles
+
+try:
+    from PIL import Image
+except ImportError:  # 未安装Pillow时不生成缩略图,使用原图
+    Image = None
+
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+"""上传文件与缩略图的响应缓存头.文件名唯一且文件不会修改,浏览器可长期缓存"""
+
+
+def make_thumbnail(src: str, dst: str, size: Tuple[int, int]) -> bool:
+    """生成缩略图,保持宽高比与原图格式.在进程池中执行,不阻塞事件循环.非图片文件返回False"""
+    tmp = f"{dst}.{uuid.uuid4().hex}.tmp"
+    try:
+        with Image.open(src) as image:
+            format_ = image.format
+            image.thumbnail(size)
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            image.save(tmp, format=format_)
+        os.replace(tmp, dst)
+        return True
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+
+class CachedStaticFiles(StaticFiles):
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers.setdefault("Cache-Control", CACHE_CONTROL)
+        return response
+
+
+class UploadAdmin(FileAdmin):
+    """文件上传管理,替换默认的`FileAdmin`,上传接口地址不变.
+    - 分块读取上传文件并写入临时文件,不在内存中读取整个文件.
+    - 文件按内容哈希命名,相同内容只保存一份.
+    - 上传接口保存文件后立即返回,缩略图在响应后于进程池中生成;生成完成前请求缩略图时按需生成.
+    - 原图与缩略图响应带有长期缓存头.
+    """
+
+    chunk_size: int = 64 * 1024
+    thumbnail_size: Tuple[int, int] = (200, 120)  # 列表图片列(100x60)的2倍,兼容高分辨率屏幕
+    thumbnail_directory: str = "thumb"  # 缩略图目录,位于上传目录下,与原图路径相同
+    thumbnail_suffixes = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+    thumbnail_workers: int = 2
+
+    class UploadOutSchema(FileAdmin.UploadOutSchema):
+        thumbnail: str = None
+
+    def __init__(self, app: "admin.AdminApp"):
+        super().__init__(app)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}  # 生成中的缩略图,同一文件不重复生成
+
+    def mount_staticfile(self) -> str:
+        self.site.fastapi.mount(
+            self.file_path,
+            CachedStaticFiles(directory=self.file_directory),
+            self.file_directory,
+        )
+        return self.site.router_path + self.file_path
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # 首次使用时创建,多进程部署时每个进程各自创建
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.thumbnail_workers)
+        return self._executor
+
+    def shutdown(self) -> None:
+        """关闭缩略图进程池,不等待生成中的缩略图(之后请求时按需生成).在应用关闭事件中调用"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_thumbnail_path(self, filename: str) -> Path:
+        return Path(self.file_directory, self.thumbnail_directory, filename)
+
+    def get_thumbnail_url(self, url: Optional[str]) -> Optional[str]:
+        """上传文件地址转换为缩略图地址;其他地址保持不变"""
+        prefix = f"{self.static_path}/"
+        if url and url.startswith(prefix):
+            return f"{self.router_path}/thumb/{url[len(prefix):]}"
+        return url
+
+    def can_thumbnail(self, filename: str) -> bool:
+        return Image is not None and Path(filename).suffix.lower() in self.thumbnail_suffixes
+
+    async def create_thumbnail(self, filename: str) -> bool:
+        """生成缩略图,已存在时直接返回.不是图片或未安装Pillow时返回False"""
+        if not self.can_thumbnail(filename):
+            return False
+        dst = self.get_thumbnail_path(filename)
+        if await aiofiles.os.path.exists(dst):
+            return True
+        future = self._pending.get(filename)
+        if future is None:
+            src = Path(self.file_directory, filename)
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, make_thumbnail, str(src), str(dst), self.thumbnail_size)
+            self._pending[filename] = future
+            future.add_done_callback(lambda _: self._pending.pop(filename, None))
+        return await asyncio.shield(future)
+
+    async def save_file(self, file: UploadFile) -> Optional[str]:
+        """分块写入临时文件并计算哈希,再移动到内容哈希对应的路径.超过大小限制返回None"""
+        suffix = os.path.splitext(file.filename or "")[1].lower()
+        tmp = Path(self.file_directory, f".{uuid.uuid4().hex}.tmp")
+        digest, size = hashlib.sha256(), 0
+        try:
+            async with aiofiles.open(tmp, "wb") as f:
+                while True:
+                    chunk = await file.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if self.file_max_size and size > self.file_max_size:
+                        return None
+                    digest.update(chunk)
+                    await f.write(chunk)
+            hexdigest = digest.hexdigest()
+            filename = f"{hexdigest[:2]}/{hexdigest}{suffix}"
+            path = Path(self.file_directory, filename)
+            if not await aiofiles.os.path.exists(path):
+                await aiofiles.os.makedirs(path.parent, exist_ok=True)
+                await aiofiles.os.replace(tmp, path)
+            return filename
+        finally:
+            if await aiofiles.os.path.exists(tmp):
+                await aiofiles.os.remove(tmp)
+
+    def register_router(self):
+        self.router.add_api_route(
+            self.file_path,
+            self.route_upload,
+            methods=["POST"],
+            response_model=BaseApiOut[self.UploadOutSchema],
+        )
+        self.router.add_api_route(f"/{self.thumbnail_directory}/{{filename:path}}", self.route_thumbnail, methods=["GET"])
+        return self
+
+    @property
+    def route_upload(self):
+        async def route(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
+            try:
+                filename = await self.save_file(file)
+                if filename is None:
+                    return BaseApiOut(status=-2, msg="The file size exceeds the limit")
+                url = f"{self.static_path}/{filename}"
+                thumbnail = url
+                if self.can_thumbnail(filename):
+                    # 响应后生成缩略图,不等待生成完成
+                    background_tasks.add_task(self.create_thumbnail, filename)
+                    thumbnail = self.get_thumbnail_url(url)
+                return BaseApiOut(data=self.UploadOutSchema(filename=filename, url=url, thumbnail=thumbnail))
+            except Exception as e:
+                return BaseApiOut(status=-1, msg=str(e))
+
+        return route
+
+    @property
+    def route_thumbnail(self):
+        async def route(filename: str):
+            """返回缩略图,不存在时生成.原有的上传文件同样适用"""
+            root = Path(self.file_directory).resolve()
+            src = (root / filename).resolve()
+            if root not in src.parents or src.relative_to(root).parts[0] == self.thumbnail_directory:
+                raise HTTPException(status_code=404)
+            if not await aiofiles.os.path.isfile(src):
+                raise HTTPException(status_code=404)
+            filename = src.relative_to(root).as_posix()
+            path = self.get_thumbnail_path(filename) if await self.create_thumbnail(filename) else src
+            return FileResponse(path, headers={"Cache-Control": CACHE_CONTROL})
+
+        return route
+
+
+class ThumbnailModelAdmin(admin.ModelAdmin):
+    """列表图片缩略图Mixin.
+    `thumbnail_fields`中的图片字段,列表数据增加`<字段>_thumb`缩略图地址,表格列显示缩略图,放大时显示原图.
+    """
+
+    thumbnail_fields: List[SqlaField] = []
+
+    async def get_list_column(self, request: Request, modelfield: ModelField) -> TableColumn:
+        column = await super().get_list_column(request, modelfield)
+        if modelfield.name in {self.parser.get_alias(field) for field in self.thumbnail_fields}:
+            column.src = f"${{{modelfield.name}_thumb}}"
+            column.originalSrc = f"${{{modelfield.name}}}"
+        return column
+
+    async def on_list_after(self, request: Request, result: Result, data: ItemListSchema, **kwargs) -> ItemListSchema:
+        data = await super().on_list_after(request, result, data, **kwargs)
+        uploads = self.site.get_admin_or_create(UploadAdmin, register=False)
+        if not uploads or not self.thumbnail_fields:
+            return data
+        aliases = [self.parser.get_alias(field) for field in self.thumbnail_fields]
+        for item in data.items:
+            for alias in aliases:
+                setattr(item, f"{alias}_thumb", uploads.get_thumbnail_url(getattr(item, alias, None)))
+        return data
@@ -1,5 +1,8 @@
-from core.globals import site
+from core import metrics, schema, server
+from core.globals import replica_router, site
+from core.jobs import job_runner
 from core.settings import settings
+from core.uploads import UploadAdmin
 from fastapi import FastAPI
 from sqlmodel import SQLModel
 from starlette.responses import RedirectResponse
@@ -18,6 +21,22 @@ blog.setup(app)
 # 挂载后台管理系统
 site.mount_app(app)
 
+# 读写分离(可选): 在挂载后台管理系统之后注册,标记只读请求.见`core/replicas.py`
+if settings.database_replicas:
+    from core.replicas import ReplicaMiddleware
+
+    app.add_middleware(ReplicaMiddleware, admin_path=site.router_path)
+
+# 运行指标: 数据库连接池等
+app.include_router(metrics.router)
+
+# 性能监控(可选): 在挂载后台管理系统之后注册,请求耗时包含数据库会话中间件
+if settings.instrumentation:
+    from core import instrumentation
+    from core.globals import async_db, sync_db
+
+    instrumentation.setup(app, engines=[sync_db.engine, async_db.engine])
+
 
 # 注意1: site.mount_app会默认添加site.db的session会话上下文中间件,如果你使用了其他的数据库连接,请自行添加.例如:
 # from core.globals import sync_db
@@ -31,13 +50,50 @@ site.mount_app(app)
 #     # do something
 
 
-@app.on_event("startup")
-async def startup():
-    await site.db.async_run_sync(SQLModel.metadata.create_all, is_session=False)
+async def startup_tasks():
+    """建表与后台管理系统启动事件.多进程部署时只需执行一次,见`core/server.py`"""
+    try:
+        if settings.db_schema == "create_all":
+            # `create_all`不会修改已存在的数据表: 由Alembic管理的数据库版本不是最新时启动失败,需先执行迁移
+            await schema.check_schema(site.db, allow_unversioned=True)
+            await site.db.async_run_sync(SQLModel.metadata.create_all, is_session=False)
+        elif settings.db_schema == "check":
+            # 只比较迁移版本,不反射数据表
+            await schema.check_schema(site.db)
+    except schema.SchemaVersionError:
+        # 关闭连接池中的连接,连接线程不阻止进程退出
+        await site.db.engine.dispose()
+        raise
     # 运行后台管理系统启动事件
     await site.router.startup()
 
 
+@app.on_event("startup")
+async def startup():
+    async with server.startup_once() as run:
+        if run:
+            await startup_tasks()
+    # 在后台注册延迟注册的管理类的路由
+    if settings.admin_prewarm:
+        site.start_prewarm()
+    # 启动后台任务执行器,每个进程各自执行
+    await job_runner.start()
+    # 从库健康检查,每个进程各自执行
+    await replica_router.start()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await job_runner.stop()
+    await replica_router.stop()
+    # 关闭缩略图进程池,每个进程各自创建
+    uploads = site.get_admin_or_create(UploadAdmin, register=False)
+    if uploads:
+        uploads.shutdown()
+    # 关闭连接池中的连接.aiosqlite连接使用非守护线程,未关闭时进程无法退出
+    await site.db.engine.dispose()
+
+
 @app.get("/")
 async def index():
     return RedirectResponse(url=site.router_path)
@@ -2,6 +2,7 @@ import asyncio
 from logging.config import fileConfig
 
 from alembic import context
+from core.settings import settings
 from sqlalchemy import engine_from_config, pool
 from sqlalchemy.ext.asyncio import AsyncEngine
 
@@ -14,7 +15,9 @@ config = context.config
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
-import main  # 导入全部模型
+# 只导入模型模块,不创建FastAPI应用与后台管理站点.新增应用的模型需在此导入
+import apps.blog.models  # noqa: E402, F401 博客应用模型
+import core.models  # noqa: E402, F401 站点公共模型: 后台任务,数据库心跳
 
 # 导入SQLModel
 from sqlmodel import SQLModel
@@ -68,7 +71,7 @@ async def run_migrations_online():
 
     """
     configuration = config.get_section(config.config_ini_section)
-    configuration["sqlalchemy.url"] = main.settings.database_url  # 更新数据库连接
+    configuration["sqlalchemy.url"] = settings.database_url  # 更新数据库连接
     connectable = engine_from_config(
         configuration,
         prefix="sqlalchemy.",
@@ -0,0 +1,27 @@
+import os
+import shutil
+import sys
+import tempfile
+from typing import Iterator
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# 未配置`.env`时使用默认设置
+os.environ.setdefault("ALLOW_ORIGINS", "[]")
+# 应用测试使用示例数据库的副本,不修改`backend/amisadmin.db`
+DATABASE = os.path.join(tempfile.mkdtemp(), "amisadmin.db")
+shutil.copy(os.path.join(BACKEND_DIR, "amisadmin.db"), DATABASE)
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE}?check_same_thread=False"
+os.environ["DATABASE_URL_ASYNC"] = f"sqlite+aiosqlite:///{DATABASE}?check_same_thread=False"
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator:
+    """应用测试客户端,执行启动与关闭事件"""
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        yield client
@@ -0,0 +1,91 @@
+import asyncio
+from typing import List, Tuple
+
+import pytest
+from apps.blog.cache import ResponseCache
+from core.replicas import RequestRouting, _request_routing
+from starlette.responses import JSONResponse
+
+ARTICLE_ID = 2  # 示例数据库中没有标签的文章
+TAG_ID = 1
+
+
+def read(client, id: int = ARTICLE_ID) -> Tuple[str, dict]:
+    response = client.get(f"/articles/read/{id}?expand=true")
+    assert response.status_code == 200
+    return response.headers["x-cache"], response.json()
+
+
+def tag_ids(data: dict) -> List[int]:
+    return [tag["id"] for tag in data["tags"]]
+
+
+def warm(client) -> dict:
+    read(client)
+    cache, data = read(client)
+    assert cache == "HIT"
+    return data
+
+
+@pytest.mark.parametrize(
+    "link, unlink",
+    [
+        # 文章管理中关联标签
+        (
+            ("post", f"/admin/BlogApp/ArticleAdmin/Tag/{ARTICLE_ID}?link_id={TAG_ID}"),
+            ("delete", f"/admin/BlogApp/ArticleAdmin/Tag/{ARTICLE_ID}?link_id={TAG_ID}"),
+        ),
+        # 标签管理中关联文章
+        (
+            ("post", f"/admin/BlogApp/TagAdmin/Article/{TAG_ID}?link_id={ARTICLE_ID}"),
+            ("delete", f"/admin/BlogApp/TagAdmin/Article/{TAG_ID}?link_id={ARTICLE_ID}"),
+        ),
+    ],
+)
+def test_link_route_invalidates_read(client, link, unlink):
+    assert tag_ids(warm(client)) == []
+    method, url = link
+    assert client.request(method, url).json()["data"] == 1
+    cache, data = read(client)
+    assert cache == "MISS" and tag_ids(data) == [TAG_ID]
+
+    warm(client)
+    method, url = unlink
+    assert client.request(method, url).json()["data"] == 1
+    cache, data = read(client)
+    assert cache == "MISS" and tag_ids(data) == []
+
+
+def test_update_invalidates_read(client):
+    before = warm(client)
+    assert client.get(f"/articles/update/{ARTICLE_ID}").status_code == 200
+    cache, data = read(client)
+    assert cache == "MISS" and data["create_time"] != before["create_time"]
+
+
+def test_missing_article_not_cached(client):
+    for _ in range(2):
+        response = client.get("/articles/read/99999")
+        assert response.status_code == 200 and response.json() is None
+        assert response.headers["x-cache"] == "MISS"
+
+
+def test_cache_fill_uses_primary():
+    """未命中缓存时从主库读取,从库的旧数据不会写入缓存"""
+    cache, routes = ResponseCache(), []
+
+    async def load():
+        routes.append(_request_routing.get().read_only)
+        return JSONResponse({"id": ARTICLE_ID})
+
+    async def run():
+        routing = RequestRouting(read_only=True)
+        token = _request_routing.set(routing)
+        try:
+            await cache.read_through("key", load)
+            assert not routing.read_only
+        finally:
+            _request_routing.reset(token)
+
+    asyncio.run(run())
+    assert routes == [False]
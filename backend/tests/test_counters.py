@@ -0,0 +1,71 @@
+from typing import Dict, List, Tuple
+
+import pytest
+from apps.blog.counters import reconcile
+from apps.blog.models import Category, Tag
+from apps.blog.stats import ArticleStats, read_stats, rebuild
+from conftest import DATABASE
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import Connection, Engine
+
+ADMIN = "/admin/BlogApp/ArticleAdmin"
+
+
+@pytest.fixture(scope="module")
+def engine() -> Engine:
+    engine = create_engine(f"sqlite:///{DATABASE}")
+    yield engine
+    engine.dispose()
+
+
+def counters(connection: Connection) -> Dict[str, List[Tuple[int, int, int]]]:
+    return {
+        model.__tablename__: connection.execute(
+            select(model.id, model.article_count, model.published_count).order_by(model.id)
+        ).all()
+        for model in (Category, Tag)
+    }
+
+
+def snapshot(engine: Engine) -> Tuple[Dict[str, List[Tuple[int, int, int]]], ArticleStats]:
+    with engine.connect() as connection:
+        return counters(connection), read_stats(connection)
+
+
+def rebuilt(engine: Engine) -> Tuple[Dict[str, List[Tuple[int, int, int]]], ArticleStats]:
+    """全量重新统计的结果,不提交"""
+    with engine.connect() as connection:
+        reconcile(connection)
+        rebuild(connection)
+        result = counters(connection), read_stats(connection)
+        connection.rollback()
+    return result
+
+
+def bulk(client, action: str, item_id: List[int], data: dict) -> int:
+    ids = ",".join(map(str, item_id))
+    result = client.post(f"{ADMIN}/{action}/api?item_id={ids}", json=data).json()
+    assert result["status"] == 0, result
+    return result["data"]
+
+
+def test_incremental_counters_match_reconcile(client, engine):
+    """关联接口,批量操作与ORM增删改按变化量维护的计数,与全量重新统计的结果一致"""
+    assert snapshot(engine) == rebuilt(engine)
+    # 关联接口: 文章管理与标签管理中添加,移除关联
+    assert client.post(f"{ADMIN}/Tag/5?link_id=2").json()["data"] == 1
+    assert client.post("/admin/BlogApp/TagAdmin/Article/3?link_id=6").json()["data"] == 1
+    assert client.delete(f"{ADMIN}/Tag/5?link_id=2").json()["data"] == 1
+    # 批量操作
+    assert bulk(client, "BulkStatusAction", [3, 4, 5], {"status": 0}) == 3
+    assert bulk(client, "BulkCategoryAction", [4, 5], {"category_id": 1}) == 2
+    bulk(client, "BulkTagAction", [6, 7], {"tag_ids": [1, 2]})
+    bulk(client, "BulkRemoveTagAction", [8, 9], {"tag_ids": [4]})
+    # ORM增删改
+    assert client.put(f"{ADMIN}/item/10", json={"status": 1, "category_id": 2}).json()["status"] == 0
+    created = client.post(f"{ADMIN}/item", json={"title": "counter", "content": "counter", "status": 1, "category_id": 1})
+    article_id = created.json()["data"]["id"]
+    assert client.post(f"{ADMIN}/Tag/{article_id}?link_id=3").json()["data"] == 1
+    assert client.delete(f"{ADMIN}/item/{article_id}").json()["status"] == 0
+
+    assert snapshot(engine) == rebuilt(engine)
@@ -0,0 +1,60 @@
+from contextlib import contextmanager
+from typing import Iterator, List
+
+import pytest
+from apps.blog.loaders import article_list_select, article_load_options, to_article_detail, to_article_summary
+from apps.blog.models import Article
+from benchmarks.seed import seed
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+
+@contextmanager
+def count_queries(engine: Engine) -> Iterator[List[str]]:
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory) -> Iterator[Engine]:
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('db') / 'blog.db'}")
+    seed(engine, articles=200, tags_per_article=3)
+    yield engine
+    engine.dispose()
+
+
+def list_queries(engine: Engine, limit: int) -> int:
+    """读取一页文章及其分类与标签,返回查询次数"""
+    with Session(engine) as session, count_queries(engine) as statements:
+        articles = session.scalars(article_list_select(expand=True).order_by(*Article.keyset_fields()).limit(limit)).all()
+        items = [to_article_summary(article, expand=True) for article in articles]
+    assert len(items) == limit
+    assert all(item.tags for item in items)
+    return len(statements)
+
+
+def detail_queries(engine: Engine, id: int) -> int:
+    with Session(engine) as session, count_queries(engine) as statements:
+        detail = to_article_detail(session.get(Article, id, options=article_load_options()), expand=True)
+    assert detail is not None and detail.tags
+    return len(statements)
+
+
+@pytest.mark.parametrize("limit", [1, 20, 200])
+def test_list_query_count(engine: Engine, limit: int):
+    # 文章,分类,标签各一条查询,与每页数量无关
+    assert list_queries(engine, limit) == 3
+
+
+@pytest.mark.parametrize("id", [1, 100, 200])
+def test_detail_query_count(engine: Engine, id: int):
+    assert detail_queries(engine, id) == 3
@@ -0,0 +1,89 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytest
+from core.jobs import JobRunner
+from core.models import Job, JobStatus
+from sqlalchemy_database import AsyncDatabase
+from sqlmodel import SQLModel
+
+NAME = "test_job"
+
+
+@pytest.fixture
+def runner(tmp_path) -> JobRunner:
+    db = AsyncDatabase.create(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}", session_options={"expire_on_commit": False})
+    asyncio.run(db.async_run_sync(SQLModel.metadata.create_all, tables=[Job.__table__], is_session=False))
+    yield JobRunner(db, concurrency=1, poll_interval=0.05, stale_seconds=60)
+    asyncio.run(db.engine.dispose())
+
+
+def register(runner: JobRunner) -> List[List[str]]:
+    chunks = []
+
+    async def handler(item_id: List[str], data: Dict[str, Any]) -> None:
+        chunks.append(item_id)
+
+    runner.register(NAME, handler)
+    return chunks
+
+
+async def add_job(runner: JobRunner, *, status: JobStatus, done: int, updated: timedelta) -> int:
+    payload = {"item_id": ["1", "2", "3"], "data": {}, "chunk_size": 1}
+    update_time = datetime.utcnow() - updated
+    job = Job(name=NAME, status=status, payload=json.dumps(payload), total=3, done=done, update_time=update_time)
+    async with runner.db.session_maker() as session:
+        session.add(job)
+        await session.commit()
+        return job.id
+
+
+def test_resume_stale_job(runner):
+    """执行中的任务超时未更新进度时重新领取,从已完成的批次之后继续"""
+    chunks = register(runner)
+
+    async def run():
+        stale = await add_job(runner, status=JobStatus.running, done=1, updated=timedelta(minutes=5))
+        await add_job(runner, status=JobStatus.running, done=1, updated=timedelta(seconds=1))
+        job = await runner._claim()
+        assert job.id == stale
+        assert await runner._claim() is None  # 未超时的任务仍由原进程执行
+        await runner._run(job)
+        return await runner.get(stale)
+
+    job = asyncio.run(run())
+    assert chunks == [["2"], ["3"]]
+    assert (job.status, job.done) == (JobStatus.success, 3)
+
+
+def test_worker_survives_errors(runner):
+    """领取任务出错(例如数据库被锁定)时记录日志并重试,执行器不退出"""
+    chunks = register(runner)
+    claim, errors = runner._claim, []
+
+    async def failing_claim():
+        if not errors:
+            errors.append(1)
+            raise RuntimeError("database is locked")
+        return await claim()
+
+    runner._claim = failing_claim
+
+    async def run():
+        await runner.start()
+        try:
+            job = await runner.enqueue(NAME, ["1", "2"], chunk_size=1)
+            for _ in range(100):
+                job = await runner.get(job.id)
+                if job.status == JobStatus.success:
+                    break
+                await asyncio.sleep(0.05)
+            return job
+        finally:
+            await runner.stop()
+
+    job = asyncio.run(run())
+    assert errors and job.status == JobStatus.success
+    assert chunks == [["1"], ["2"]]
@@ -0,0 +1,100 @@
+import asyncio
+import sqlite3
+import time
+from typing import Tuple
+
+import pytest
+from core.settings import settings
+from core.sqlite import WriteQueue, apply_sqlite_profile
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+TIMEOUT = 1  # 排队超时(秒)
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch) -> Tuple[AsyncEngine, WriteQueue]:
+    monkeypatch.setattr(settings, "sqlite_profile", True)
+    monkeypatch.setattr(settings, "sqlite_write_queue", True)
+    monkeypatch.setattr(settings, "sqlite_busy_timeout", TIMEOUT * 1000)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'queue.db'}")
+    queue = apply_sqlite_profile(f"test_{tmp_path.name}", engine)
+    asyncio.run(execute(engine, "CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+    queue.waits = queue.timeouts = 0
+    yield engine, queue
+    asyncio.run(engine.dispose())
+
+
+async def execute(engine: AsyncEngine, statement: str) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(text(statement))
+
+
+def test_same_task_reentrant(database):
+    """同一任务中的第二个连接写入时不等待第一个连接释放写入锁"""
+    engine, queue = database
+
+    async def run():
+        async with engine.begin() as first:
+            # 驱动自动提交CREATE语句,第一个连接只持有写入锁,不持有数据库锁
+            await first.execute(text("CREATE TABLE other (id INTEGER PRIMARY KEY)"))
+            begin = time.perf_counter()
+            await execute(engine, "INSERT INTO item (id) VALUES (1)")
+            return time.perf_counter() - begin
+
+    assert asyncio.run(run()) < TIMEOUT
+    assert (queue.waits, queue.timeouts) == (0, 0)
+    assert queue._depth == 0
+
+
+def test_other_task_waits(database):
+    """其他任务的写入排队,第一个事务提交后执行"""
+    engine, queue = database
+    order = []
+
+    async def first():
+        async with engine.begin() as connection:
+            await connection.execute(text("INSERT INTO item (id) VALUES (1)"))
+            await asyncio.sleep(0.1)
+            order.append(1)
+
+    async def second():
+        await asyncio.sleep(0.01)
+        await execute(engine, "INSERT INTO item (id) VALUES (2)")
+        order.append(2)
+
+    async def run():
+        await asyncio.gather(first(), second())
+
+    asyncio.run(run())
+    assert order == [1, 2]
+    assert (queue.waits, queue.timeouts) == (1, 0)
+
+
+@pytest.mark.parametrize("end", ["commit", "rollback"])
+def test_release_after_driver_end(database, end):
+    """写入锁在驱动提交或回滚完成后释放,此时数据库已解锁,下一个写事务不需要等待SQLite的锁"""
+    engine, queue = database
+    release, locked = queue.release, []
+
+    def check_release():
+        other = sqlite3.connect(engine.url.database, timeout=0, isolation_level=None)
+        try:
+            other.execute("BEGIN IMMEDIATE")
+            other.execute("ROLLBACK")
+            locked.append(False)
+        except sqlite3.OperationalError:
+            locked.append(True)
+        finally:
+            other.close()
+        release()
+
+    queue.release = check_release
+
+    async def run():
+        async with engine.connect() as connection:
+            await connection.execute(text("INSERT INTO item (id) VALUES (1)"))
+            await getattr(connection, end)()
+
+    asyncio.run(run())
+    assert locked == [False]